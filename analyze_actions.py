@@ -0,0 +1,59 @@
+import argparse
+import json
+import time
+import numpy as np
+import config
+from utils.action_log import read_action_log, analyze
+
+# Reads the always-on action log written by main.py (ACTION_LOG_PATH) and reports action rates,
+# gesture -> click latencies, near misses and cursor jitter. Safe to run while main.py is running.
+
+def fmt_dist(d):
+    if not d['count']:
+        return "-"
+    return f"n={d['count']}  p50 {d['p50_ms']:.0f} ms  p90 {d['p90_ms']:.0f} ms  p99 {d['p99_ms']:.0f} ms"
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze the TouchlessMouse action log.")
+    parser.add_argument('log', nargs='?', default=config.ACTION_LOG_PATH, help="Action log file (default: ACTION_LOG_PATH)")
+    parser.add_argument('--last', type=float, metavar='MIN', help="Only the last MIN minutes")
+    parser.add_argument('--camera', type=int, help="Only this session index (multi-camera mode)")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    parser.add_argument('--csv', metavar='FILE', help="Also export the selected records to FILE")
+    args = parser.parse_args()
+
+    records = read_action_log(args.log)
+    if args.last and len(records):
+        records = records[records['time'] >= records['time'][-1] - args.last * 60]
+    if args.camera is not None:
+        records = records[records['camera'] == args.camera]
+    if args.csv:
+        np.savetxt(args.csv, records, delimiter=',', header=','.join(records.dtype.names), comments='',
+                   fmt=['%.6f', '%d', '%.2f', '%.2f', '%d', '%d', '%d', '%d', '%d'])
+
+    report = analyze(records)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    if not report['frames']:
+        print(f"{args.log}: no records")
+        return
+
+    start, end = (time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(report[k])) for k in ('start', 'end'))
+    print(f"{args.log}: {report['frames']} frames, {start} -> {end}")
+    print(f"  active {report['active_s'] / 60:.1f} min at {report['fps']:.1f} FPS, {report['frame_gaps']} gaps, "
+          f"{report['frames_dropped']} frames dropped, hand locked {report['locked_fraction'] * 100:.0f}% of frames")
+    print(f"  camera -> action  {fmt_dist(report['latency'])}")
+    print("  actions:")
+    for name, a in report['actions'].items():
+        print(f"    {name:<15} {a['count']:>8}  {a['per_min']:8.1f}/min")
+    print("  gesture -> action latency:")
+    for name, d in report['click_latency'].items():
+        print(f"    {name:<15} {fmt_dist(d)}")
+    misses = report['near_misses']
+    print(f"  near misses: {misses['right_click_holds_released_early']} right-click holds released early, "
+          f"{misses['taps_without_click']} sniper taps without a click, {misses['drags_rolled_back']} early drags rolled back")
+    for name, j in report['jitter_px'].items():
+        print(f"  jitter {name:<15} rms {j['rms']:.2f} px  p95 {j['p95']:.2f} px")
+
+if __name__ == "__main__": main()
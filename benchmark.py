@@ -0,0 +1,83 @@
+import argparse
+import json
+import sys
+from utils.replay import ReplayDriver, compare_filters, compare_interpreters, compare_prediction, compare_subscribers
+
+# Offline benchmark: replays recorded sessions (python main.py --record session.npz)
+# without a webcam, a screen or a human. Exits with 1 if the action sequence
+# differs from an expected one, so it can gate CI.
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded TouchlessMouse sessions and report performance.")
+    parser.add_argument('recordings', nargs='+', help=".npz files written by main.py --record")
+    parser.add_argument('--detect', action='store_true', help="Re-run MediaPipe on recorded frames instead of using recorded landmarks")
+    parser.add_argument('--filters', action='store_true', help="Also compare cursor filters (jitter / lag) on the recorded fingertip traces")
+    parser.add_argument('--gestures', action='store_true', help="Also time the gesture rule machine against the legacy hand-written interpreter")
+    parser.add_argument('--predict', action='store_true', help="Also compare predictive early-fire gestures with the fixed hold timers")
+    parser.add_argument('--ipc', type=int, metavar='N', help="Also measure the gesture stream (--serve) with 1..N subscriber processes")
+    parser.add_argument('--alloc', action='store_true', help="Measure per-frame allocations / memory bandwidth (slower run)")
+    parser.add_argument('--json', action='store_true', help="Print the full report as JSON")
+    parser.add_argument('--save-actions', metavar='FILE', help="Write the action sequences to FILE (baseline for --expect)")
+    parser.add_argument('--expect', metavar='FILE', help="Fail if the action sequences differ from FILE")
+    args = parser.parse_args()
+
+    reports = {}
+    for path in args.recordings:
+        reports[path] = ReplayDriver(path, detect=args.detect).run(track_alloc=args.alloc)
+        if args.filters:
+            reports[path]['filters'] = compare_filters(path)
+        if args.gestures:
+            reports[path]['gestures'] = compare_interpreters(path)
+        if args.predict:
+            reports[path]['predict'] = compare_prediction(path)
+        if args.ipc:
+            reports[path]['ipc'] = compare_subscribers(path, args.ipc)
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for path, r in reports.items():
+            print(f"{path}: {r['frames']} frames, {r['fps']:.0f} frames/s")
+            for stage, lat in r['latency_ms'].items():
+                print(f"  {stage:<10} p50 {lat['p50']:.3f} ms  p99 {lat['p99']:.3f} ms")
+            print("  actions: " + ", ".join(f"{a}={c}" for a, c in sorted(r['action_counts'].items())))
+            if 'preprocess' in r:
+                p = r['preprocess']
+                print(f"  preprocess {p['gated']}/{p['frames']} frames gated at {p['gate_ms']:.3f} ms/frame, "
+                      f"{p['enhanced']} enhanced at {p['enhance_ms']:.3f} ms")
+            if 'alloc' in r:
+                a = r['alloc']
+                print(f"  alloc      {a['kb_per_frame']:.1f} KB/frame (max {a['max_kb_per_frame']:.1f}), "
+                      f"{a['mb_per_s_at_target_fps']:.1f} MB/s at target fps")
+            for name, f in r.get('filters', {}).items():
+                print(f"  filter {name:<12} jitter {f['jitter_px']:.2f} px  lag {f['lag_ms']:.0f} ms  cost {f['cost_us']:.1f} us")
+            g = r.get('gestures')
+            if g:
+                print(f"  gestures   rules {g['rules']['cost_us']:.1f} us/frame (p99 {g['rules']['p99_us']:.1f})  "
+                      f"legacy {g['legacy']['cost_us']:.1f} us/frame (p99 {g['legacy']['p99_us']:.1f})  "
+                      f"{'identical' if g['identical'] else 'ACTIONS DIFFER'}")
+            for hold, p in r.get('predict', {}).items():
+                f, q = p['fixed'], p['predictive']
+                print(f"  predict {hold:<12} fixed {f['fires']} fires p50 {f['latency_ms']['p50']:.0f} ms | "
+                      f"predictive {q['fires']} fires p50 {q['latency_ms']['p50']:.0f} ms, {q['early']} early, "
+                      f"{q['false_fires']} false ({q['false_fire_rate']:.0%}), {q['not_in_fixed']} not fired by the fixed timers")
+            for k, s in r.get('ipc', {}).items():
+                print(f"  stream x{k:<2}  {s['received_per_s']:.0f}/{s['rate_hz']:.0f} msg/s per subscriber  "
+                      f"missed {s['missed_pct']:.1f}%  publish {s['publish_us']:.1f} us  "
+                      f"latency p50 {s['latency_ms']['p50']:.3f} ms  p99 {s['latency_ms']['p99']:.3f} ms")
+
+    sequences = {path: r['actions'] for path, r in reports.items()}
+    if args.save_actions:
+        with open(args.save_actions, 'w') as f:
+            json.dump(sequences, f, indent=1)
+
+    if args.expect:
+        with open(args.expect) as f:
+            expected = json.load(f)
+        failed = [path for path in sequences if path in expected and expected[path] != sequences[path]]
+        for path in failed:
+            print(f"Action sequence changed: {path}")
+        if failed:
+            sys.exit(1)
+
+if __name__ == "__main__": main()
@@ -0,0 +1,90 @@
+import argparse
+import time
+import cv2
+import numpy as np
+import config
+from core.camera import CameraStream
+from core.detector import HandDetector
+from core.overlay import DisplayBuffer
+from utils.calibration import STEPS, compute_thresholds, hand_size, save_calibration
+
+# Guided per-user calibration of the gesture thresholds (about 20 s).
+# Shows one pose at a time, records the hand's normalized landmarks while it is held, and writes the
+# thresholds to CALIBRATION_PATH, which main.py applies on top of config.py at startup.
+
+WINDOW_NAME = "Touchless Mouse Calibration"
+
+def show(display_buf, frame, lines, progress=None):
+    display = display_buf.mirror(frame)
+    for i, text in enumerate(lines):
+        cv2.putText(display, text, (20, 40 + 30 * i), cv2.FONT_HERSHEY_PLAIN, 1.6, (0, 255, 0), 2)
+    if progress is not None:
+        h, w = display.shape[:2]
+        cv2.rectangle(display, (0, h - 10), (int(w * progress), h), (0, 255, 0), cv2.FILLED)
+    cv2.imshow(WINDOW_NAME, display)
+    if cv2.waitKey(1) & 0xFF == ord('q'):
+        raise KeyboardInterrupt
+
+def record_pose(camera, detector, display_buf, prompt, prepare, hold):
+    # Countdown, then `hold` seconds of one-hand frames. Returns (normalized landmarks, world landmarks or None)
+    norm, world = [], []
+    start = time.perf_counter()
+    while True:
+        frame_id, frame_ts, frame = camera.read_next(timeout=config.FRAME_WAIT_TIMEOUT)
+        if frame is None:
+            if camera.stopped: raise RuntimeError("camera stopped")
+            continue
+        elapsed = time.perf_counter() - start
+        hands_data = detector.get_hands_info(detector.find_hands(frame))
+        if elapsed < prepare:
+            show(display_buf, frame, [prompt, f"Starting in {prepare - elapsed:.0f} s"])
+            continue
+        if elapsed > prepare + hold:
+            break
+        if hands_data:
+            norm.append(hands_data[0].norm.copy())
+            if hands_data[0].world is not None: world.append(hands_data[0].world.copy())
+        show(display_buf, frame, [prompt, "Hold still"], (elapsed - prepare) / hold)
+    if not norm:
+        raise RuntimeError(f"no hand seen during '{prompt}'")
+    return np.stack(norm), np.stack(world) if world else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate TouchlessMouse gesture thresholds to your hand.")
+    parser.add_argument('--output', default=config.CALIBRATION_PATH or 'calibration.json', help="Calibration file (default: CALIBRATION_PATH)")
+    parser.add_argument('--prepare', type=float, default=3.0, help="Seconds to get into each pose")
+    parser.add_argument('--hold', type=float, default=2.0, help="Seconds recorded per pose")
+    args = parser.parse_args()
+
+    camera = CameraStream().start()
+    detector = HandDetector()
+    detector.keep_world = True
+    detector.set_max_hands(1)
+    display_buf = DisplayBuffer()
+    cv2.namedWindow(WINDOW_NAME, cv2.WINDOW_NORMAL)
+    samples, world = {}, []
+    try:
+        for name, prompt in STEPS:
+            print(prompt)
+            samples[name], w = record_pose(camera, detector, display_buf, prompt, args.prepare, args.hold)
+            if w is not None: world.append(w)
+            print(f"  {len(samples[name])} frames")
+    except KeyboardInterrupt:
+        print("Calibration cancelled")
+        return
+    finally:
+        camera.release()
+        detector.close()
+        cv2.destroyAllWindows()
+
+    try:
+        thresholds = compute_thresholds(samples)
+    except ValueError as e:
+        raise SystemExit(f"Calibration failed: {e}")
+    hand = hand_size(samples, np.concatenate(world) if world else None)
+    save_calibration(args.output, thresholds, hand)
+    for key, value in thresholds.items():
+        print(f"{key} = {value:.3f} (config.py: {getattr(config, key)})")
+    print(f"Saved to {args.output}")
+
+if __name__ == "__main__": main()
@@ -4,16 +4,103 @@
 CAMERA_INDEX = 0          # Usually 0 is the built-in webcam
 FRAME_WIDTH = 640         # Standard resolution for better precision
 FRAME_HEIGHT = 480
+REFERENCE_WIDTH = 640     # Pixel-valued settings (SENSITIVITY, smoothing filters, FLOW_MAX_DRIFT) are tuned at this
+                          # capture width and rescaled for others, so FRAME_WIDTH can change without retuning
 FPS_TARGET = 60
+FRAME_BUFFER_SIZE = 8     # Slots in the camera ring buffer (frames are handed out zero-copy, so this bounds their lifetime)
+FRAME_WAIT_TIMEOUT = 1.0  # Seconds to wait for a new frame before re-checking
+CAMERA_INDICES = None     # e.g. [0, 1] for multi-camera sessions (one detector process per camera). None = CAMERA_INDEX
+CAMERA_BACKEND = 'v4l2'   # 'v4l2' (Linux: explicit backend, format negotiation, small driver queue) or 'auto' (OpenCV default)
+CAMERA_FOURCC = ('MJPG', 'YUYV') # Pixel formats to try; the one with the highest measured frame rate wins. () = driver default
+CAMERA_PROBE_FRAMES = 8   # Frames timed per format at startup (only when CAMERA_FOURCC has more than one)
+CAMERA_DRIVER_BUFFERS = 1 # Driver frame queue length (1 = always the freshest frame). 0 = driver default
+CAMERA_RECONNECT_DELAY = 0.5     # Seconds before reopening the camera after a failed grab (doubles per failed attempt). 0 = stop instead
+CAMERA_RECONNECT_MAX_DELAY = 5.0
+
+# Multi-camera Sessions
+SESSION_CURSOR_POLICY = 'first_lock' # 'first_lock' (keep the cursor until unlock) or 'latest_lock' (newest lock takes over)
+SESSION_OWNER_TIMEOUT = 2.0 # Seconds without the owner's hand before another camera can take the cursor
+
+# Preprocessing (between the camera and the detector, see core/preprocess.py)
+PREPROCESS_ENABLED = True
+PREPROCESS_GATE = True           # Skip inference on unchanged frames while no hand is locked
+PREPROCESS_GATE_SIZE = (80, 60)  # Size of the grayscale copy used for change detection and luminance
+PREPROCESS_MOTION_PIXEL = 12     # A pixel changed if it differs by more than this (0-255) from the last detected frame
+PREPROCESS_MOTION_AREA = 0.004   # Run inference when more than this fraction of pixels changed
+PREPROCESS_MAX_SKIP = 10         # Run inference at least every N+1 frames, even on a static scene
+PREPROCESS_ENHANCE = 'gamma'     # Low-light correction: 'gamma' (~0.2 ms), 'clahe' (stronger, ~2 ms) or None
+PREPROCESS_LOW_LIGHT = 80        # Mean luminance (0-255) below which the correction is applied
+PREPROCESS_TARGET_LIGHT = 120    # 'gamma': luminance the correction aims for
+PREPROCESS_CLAHE_CLIP = 2.0      # 'clahe': contrast limit
 
 # Hand Detection
 MIN_DETECTION_CONFIDENCE = 0.5 # Lowered for better detection in various lighting
 MIN_TRACKING_CONFIDENCE = 0.5 # Lowered to keep the lock more easily
 MAX_HANDS = 2             # Track 2 hands to handle "Hand Locking" logic
 MODEL_COMPLEXITY = 1     # 0 = Lite (Fastest), 1 = Full (Default). 0 is much faster for real-time.
+ROI_TRACKING = True       # When a hand is locked, run the model only on a crop around it
+ROI_PADDING = 0.5         # Extra crop around the hand bbox (fraction of bbox size on each side)
+ROI_INPUT_SIZE = 256      # Crops larger than this are downscaled before inference
+ROI_MIN_CONFIDENCE = 0.8  # Below this, fall back to full-frame detection
+FLOW_TRACKING = False     # Locked hand: run the model only on keyframes, optical flow in between (CPU-only machines)
+FLOW_KEYFRAME_INTERVAL = 2 # Run the model at least every Nth frame (2 = every other frame)
+FLOW_MAX_MOTION = 0.25    # Re-detect if the hand moved more than this fraction of its size in one frame
+FLOW_MAX_DRIFT = 2.0      # Re-detect if the forward-backward flow error (median, px) is above this
+FLOW_MIN_TRACKED = 0.9    # Re-detect if fewer than this fraction of the 21 points were tracked
+FLOW_WIN_SIZE = 15        # Lucas-Kanade window (px)
+FLOW_PYR_LEVELS = 2
+
+# Adaptive Governor (frame rate / model complexity / resolution from measured load)
+GOVERNOR_ENABLED = True
+GOVERNOR_BUDGET_MS = 25.0      # Inference time per frame considered "keeping up"
+GOVERNOR_RECOVER_RATIO = 0.6   # Restore quality only when under budget * ratio (hysteresis band)
+GOVERNOR_EMA_ALPHA = 0.1       # Smoothing of the measured inference time
+GOVERNOR_HOLD = 1.0            # Seconds over budget before shedding load
+GOVERNOR_RECOVER_HOLD = 5.0    # Seconds under budget before restoring quality (doubles after a failed restore)
+GOVERNOR_MAX_RECOVER_HOLD = 60.0
+GOVERNOR_IDLE_AFTER = 3.0      # Seconds without any hand before entering idle mode
+GOVERNOR_IDLE_HZ = 5           # Detection rate while idle
+GOVERNOR_IDLE_RESOLUTION = (320, 240) # Capture size while idle (None = keep FRAME_WIDTH x FRAME_HEIGHT)
+
+# Pipeline
+PIPELINE_MODE = False     # True = detect / act / render on separate threads (latest-wins queues)
+
+# Live Configuration (changes apply without restarting, see utils/live_config.py)
+CONFIG_WATCH = True       # Reload this file when it is saved
+CONFIG_SOCKET = None      # Unix socket for configctl.py, e.g. '/tmp/touchless-mouse.sock'. None = off
+
+# Calibration (calibrate.py)
+CALIBRATION_PATH = 'calibration.json' # Per-user gesture thresholds, applied at startup when the file exists. None = off
+
+# Gesture Stream (main.py --serve): hands + actions for other programs, read with gesture_client.py
+SERVE_SOCKET = '/tmp/touchless-mouse-gestures.sock' # Unix socket path used by --serve
+PUBLISH_STALL_TIMEOUT = 5.0 # Seconds a subscriber may stay unable to receive before it is disconnected
+
+# Action Log (always-on record of every frame's action, read with analyze_actions.py)
+ACTION_LOG_PATH = 'actions.log' # Memory-mapped ring file. None = disabled
+ACTION_LOG_CAPACITY = 262144    # Records (32 bytes each, ~2.4 h at 30 FPS)
+
+# Metrics (per-stage latency)
+METRICS_ENABLED = True
+METRICS_WINDOW = 1024      # Samples kept per stage for the rolling percentiles
+METRICS_LOG_INTERVAL = 0   # Seconds between latency log lines (0 = off)
+METRICS_JSON_PATH = None   # e.g. "metrics.json" to dump all latencies on exit
+METRICS_HTTP_PORT = 0      # e.g. 9464 to serve /metrics (Prometheus) and /metrics.json on localhost (0 = off)
+
+# Cursor Output
+OUTPUT_BACKEND = 'auto'   # 'auto', 'xtest' (X11, needs python-xlib), 'uinput' (Linux, needs python-evdev), 'pyautogui', 'null'
+OUTPUT_RATE_HZ = 125      # Movement is coalesced and sent by an output thread at this rate (0 = send on every call)
 
 # Smoothing (Jitter Reduction)
-SMOOTHING_FACTOR = 1      # Higher = Smoother but more lag (Try 2-3 for speed)
+SMOOTHING_FILTER = 'one_euro' # 'one_euro', 'kalman' or 'exponential' (legacy, frame-rate dependent)
+SMOOTHING_FACTOR = 1      # 'exponential' only: Higher = Smoother but more lag (Try 2-3 for speed)
+ONE_EURO_MIN_CUTOFF = 1.0 # Hz. Lower = less jitter when still, more lag
+ONE_EURO_BETA = 0.01      # Higher = less lag on fast movement
+ONE_EURO_D_CUTOFF = 1.0   # Hz. Cutoff for the speed estimate
+KALMAN_PROCESS_NOISE = 2000.0  # Higher = follows the hand faster, less smoothing
+KALMAN_MEASUREMENT_NOISE = 4.0 # Higher = more smoothing
+FILTER_LATENCY_COMPENSATION = True # Extrapolate the filtered position by the measured capture -> action latency
+FILTER_RESET_GAP = 0.25  # Seconds between tracked frames after which the filter restarts at the new position
 
 # Interaction Zones
 PINKY_TRIGGER_RATIO = 0.5 # Separation required to ACTIVATE (Pinky Tip vs Ring Tip)
@@ -26,8 +113,21 @@ SCREEN_MARGIN = 0       # Dead zone around the camera frame edges
 SENSITIVITY = 20.0        # High sensitivity for low-res input (Speed Match)
 SENSITIVITY_PRECISION = 4.0 # Precision Mode (Slow/Sniper) when Pinky is out
 
+# Predictive Gestures (fire right click / drag before the full hold time when the pose looks deliberate)
+PREDICT_ENABLED = False   # Compare with the fixed timers first: python benchmark.py session.npz --predict
+PREDICT_MIN_HOLD = 0.3    # Seconds a pose must be held before it can fire early
+PREDICT_CONFIDENCE = 0.6  # Pose confidence (0-1) needed to start a drag early (rolled back if not confirmed)
+PREDICT_CLICK_CONFIDENCE = 0.8 # Pose confidence needed for an early right click (cannot be rolled back)
+PREDICT_CONFIRM_TIME = 0.6 # Seconds from pose onset after which an early fire is confirmed. Let go before = false fire
+PREDICT_WINDOW = 0.15     # Seconds of finger trajectory the confidence is computed over
+PREDICT_SETTLE_SPEED = 1.0 # Finger speed (palm lengths/s) at which the confidence is halved
+PREDICT_MARGIN = 0.1      # Tip-to-joint distance (palm lengths) at which a finger counts as clearly up / down
+
 # Debug
 SHOW_DEBUG_WINDOW = True
 DISPLAY_WIDTH = 600       # Size of the debug window on screen
 DISPLAY_HEIGHT = 400
+OVERLAY_RATE_HZ = 30      # Max debug window refreshes per second (drawn on its own thread, never blocks tracking)
+OVERLAY_GRAPHS = True     # Draw rolling latency / stage timing graphs on the debug window
+OVERLAY_GRAPH_SAMPLES = 120 # Frames shown in the latency graph
 DRAW_LANDMARKS = True
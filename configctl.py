@@ -0,0 +1,49 @@
+import argparse
+import ast
+import json
+import socket
+import config
+
+# Changes TouchlessMouse settings while it runs, through its control socket (CONFIG_SOCKET).
+#   python configctl.py                          -> print the running configuration
+#   python configctl.py SENSITIVITY=25 MAX_HANDS=1
+# Values are Python literals (numbers, True/False, None, 'strings', tuples); anything else is sent as a string.
+
+def parse_value(text):
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+def main():
+    parser = argparse.ArgumentParser(description="Change TouchlessMouse settings at runtime.")
+    parser.add_argument('changes', nargs='*', metavar='KEY=VALUE', help="Settings to change (none = print the current config)")
+    parser.add_argument('--socket', default=config.CONFIG_SOCKET, help="Control socket (default: CONFIG_SOCKET)")
+    args = parser.parse_args()
+    if not args.socket:
+        parser.error("no control socket: set CONFIG_SOCKET in config.py or pass --socket")
+
+    changes = {}
+    for item in args.changes:
+        key, sep, value = item.partition('=')
+        if not sep: parser.error(f"expected KEY=VALUE, got {item!r}")
+        changes[key.strip().upper()] = parse_value(value.strip())
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(args.socket)
+        with s.makefile('rw') as f:
+            f.write(json.dumps(changes) + "\n")
+            f.flush()
+            reply = json.loads(f.readline())
+
+    if not reply['ok']:
+        raise SystemExit(f"Rejected: {reply['error']}")
+    if reply['config'] is not None:
+        for key, value in reply['config'].items():
+            print(f"{key} = {value!r}")
+        return
+    print(f"Changed: {', '.join(reply['changed']) or 'nothing'} (config version {reply['version']})")
+    if reply['restart']:
+        print(f"Restart needed for: {', '.join(reply['restart'])}")
+
+if __name__ == "__main__": main()
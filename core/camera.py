@@ -1,48 +1,289 @@
+import sys
 import cv2
+import numpy as np
 import config
-from threading import Thread
+from threading import Thread, Condition
 import time
+from utils.metrics import metrics
+
+# Pixel formats are negotiated by FOURCC code, read back from the driver as a packed little-endian int
+def fourcc_name(code):
+    code = int(code)
+    name = bytes((code >> (8 * i)) & 0xFF for i in range(4)).decode('ascii', 'replace')
+    return name if code and name.isprintable() else '?'
 
 class CameraStream:
-    def __init__(self):
-        self.stream = cv2.VideoCapture(config.CAMERA_INDEX)
-        self.stream.set(cv2.CAP_PROP_FRAME_WIDTH, config.FRAME_WIDTH)
-        self.stream.set(cv2.CAP_PROP_FRAME_HEIGHT, config.FRAME_HEIGHT)
-        # Try to force 30 FPS on hardware level
-        self.stream.set(cv2.CAP_PROP_FPS, config.FPS_TARGET)
-        
-        (self.grabbed, self.frame) = self.stream.read()
+    def __init__(self, src=None):
+        self.src = config.CAMERA_INDEX if src is None else src
+        self.resolution = (config.FRAME_WIDTH, config.FRAME_HEIGHT)
+        self.fourcc = None  # Format picked by negotiate(), reused when reconnecting
+        self.format = {}    # What the driver actually gave us (see negotiate)
+        self.reconnects = 0
+        self.thread = None
+        self.stream, frame = self.open(probe=isinstance(self.src, int)) # Video files play as they are
+        self.grabbed = frame is not None
         self.stopped = False
 
+        # --- FRAME RING BUFFER ---
+        # Preallocated slots, sized from the first frame the driver gives us.
+        # Each slot carries a monotonically increasing frame id and a capture timestamp.
+        self.buffer_size = max(2, config.FRAME_BUFFER_SIZE)
+        shape = frame.shape if self.grabbed else (config.FRAME_HEIGHT, config.FRAME_WIDTH, 3)
+        self.buffer = np.zeros((self.buffer_size,) + shape, dtype=np.uint8)
+        self.frame_ids = np.full(self.buffer_size, -1, dtype=np.int64)
+        self.timestamps = np.zeros(self.buffer_size, dtype=np.float64)
+        self.latest_id = -1
+        self.cond = Condition()
+
+        # Counters
+        self.frames_captured = 0
+        self.frames_dropped = 0    # Captured but never handed to read_next()
+        self.frames_duplicate = 0  # read() returned a frame id already returned before
+        self.last_read_id = -1
+        self.pending_resolution = None # (w, h) applied by the capture thread between reads
+        self.delivered = 0
+        self.delivery_time = 0.0   # Sum of capture -> read_next() latencies
+
+        if self.grabbed:
+            self._store(frame, time.perf_counter())
+
+    # --- DEVICE ---
+    def open(self, probe=False):
+        # Returns (stream, first frame or None). V4L2 explicitly on Linux: the default backend may pick
+        # GStreamer, which adds its own queue and ignores the buffer count.
+        use_v4l2 = config.CAMERA_BACKEND == 'v4l2' and sys.platform.startswith('linux') and isinstance(self.src, int)
+        stream = cv2.VideoCapture(self.src, cv2.CAP_V4L2) if use_v4l2 else cv2.VideoCapture(self.src)
+        if use_v4l2 and not stream.isOpened():
+            print(f"Camera {self.src}: V4L2 open failed, falling back to the default backend")
+            stream = cv2.VideoCapture(self.src)
+        if not stream.isOpened():
+            return stream, None
+        if probe:
+            frame = self.negotiate(stream)
+        else:
+            self.configure(stream, self.fourcc)
+            grabbed, frame = stream.read()
+            frame = frame if grabbed else None
+        self.format = self.read_format(stream, self.format.get('measured_fps', 0.0))
+        return stream, frame
+
+    def configure(self, stream, fourcc):
+        # FOURCC first: on V4L2 the sizes / rates on offer depend on the pixel format
+        if fourcc:
+            stream.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+        stream.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolution[0])
+        stream.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
+        # Try to force FPS_TARGET on hardware level
+        stream.set(cv2.CAP_PROP_FPS, config.FPS_TARGET)
+        # Fewer driver buffers = the frame we dequeue is the newest one, not one that waited in the queue
+        if config.CAMERA_DRIVER_BUFFERS:
+            stream.set(cv2.CAP_PROP_BUFFERSIZE, config.CAMERA_DRIVER_BUFFERS)
+
+    def negotiate(self, stream):
+        # Tries each CAMERA_FOURCC format and keeps the one with the highest measured frame rate
+        # (drivers report the rate they were asked for, not the one USB bandwidth / exposure allow,
+        # e.g. YUYV at 640x480 is often 30 FPS or less while MJPG does 60).
+        # Runs in parallel with the model load at startup (main.py), so the few probe frames are free.
+        candidates = list(config.CAMERA_FOURCC or ()) or [None]
+        best, best_fps, frame = None, -1.0, None
+        for fourcc in candidates:
+            self.configure(stream, fourcc)
+            if fourcc and fourcc_name(stream.get(cv2.CAP_PROP_FOURCC)) != fourcc:
+                continue # Not supported: the driver kept its previous format
+            fps, probe_frame = self.measure_fps(stream, config.CAMERA_PROBE_FRAMES if len(candidates) > 1 else 1)
+            if probe_frame is not None and fps > best_fps:
+                best, best_fps, frame = fourcc, fps, probe_frame
+        if best is None and candidates[0] is not None:
+            # No preferred format took: let the driver keep whatever it defaults to
+            self.configure(stream, None)
+            best_fps, frame = self.measure_fps(stream, 1)
+        elif best != candidates[-1]:
+            self.configure(stream, best) # Probing left the last candidate selected
+            grabbed, new_frame = stream.read()
+            if grabbed: frame = new_frame
+        self.fourcc = best
+        self.format['measured_fps'] = best_fps
+        return frame
+
+    def measure_fps(self, stream, n):
+        # Returns (frames per second over n frames after the first one, last frame)
+        grabbed, frame = stream.read() # The first frame also waits for the stream to start
+        if not grabbed:
+            return 0.0, None
+        if n <= 1:
+            return 0.0, frame
+        t0 = time.perf_counter()
+        for _ in range(n):
+            grabbed, frame = stream.read()
+            if not grabbed:
+                return 0.0, None
+        return n / (time.perf_counter() - t0), frame
+
+    @staticmethod
+    def read_format(stream, measured_fps=0.0):
+        return {
+            'backend': stream.getBackendName() if stream.isOpened() else 'none',
+            'fourcc': fourcc_name(stream.get(cv2.CAP_PROP_FOURCC)),
+            'width': int(stream.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(stream.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'fps': stream.get(cv2.CAP_PROP_FPS),
+            'measured_fps': measured_fps,
+            'driver_buffers': int(stream.get(cv2.CAP_PROP_BUFFERSIZE)),
+        }
+
+    def describe(self):
+        f = self.format
+        if not f or f['backend'] == 'none':
+            return f"Camera {self.src}: not available"
+        measured = f" (measured {f['measured_fps']:.1f})" if f['measured_fps'] else ""
+        buffers = f", {f['driver_buffers']} driver buffer(s)" if f['driver_buffers'] > 0 else ""
+        return (f"Camera {self.src}: {f['backend']} {f['fourcc']} {f['width']}x{f['height']} @ {f['fps']:.0f} FPS"
+                f"{measured}{buffers}")
+
+    def reconnect(self):
+        # Called by the capture thread after a failed grab: reopen with the negotiated format,
+        # backing off from CAMERA_RECONNECT_DELAY up to CAMERA_RECONNECT_MAX_DELAY between attempts.
+        # Returns the first frame, or None once released.
+        print(f"Camera {self.src}: capture failed, reconnecting")
+        self.grabbed = False
+        delay = config.CAMERA_RECONNECT_DELAY
+        while not self.stopped:
+            self.stream.release()
+            time.sleep(delay)
+            if self.stopped: break
+            self.stream, frame = self.open()
+            if frame is not None:
+                self.reconnects += 1
+                metrics.inc('camera_reconnects')
+                print(f"Camera {self.src}: reconnected. " + self.describe())
+                return frame
+            delay = min(delay * 2, config.CAMERA_RECONNECT_MAX_DELAY)
+        return None
+
     def start(self):
         # Start the thread to read frames from the video stream
-        t = Thread(target=self.update, args=())
-        t.daemon = True
-        t.start()
+        print(self.describe())
+        self.thread = Thread(target=self.update, args=(), name="camera", daemon=True)
+        self.thread.start()
         return self
 
+    def _store(self, frame, timestamp, in_slot=False):
+        # Write into the next slot, then publish it under the lock.
+        # in_slot: the frame was already decoded into that slot (update()), no copy needed
+        frame_id = self.latest_id + 1
+        slot = frame_id % self.buffer_size
+        if frame.shape != self.buffer.shape[1:]:
+            # Driver changed resolution behind our back: reallocate the ring
+            self.buffer = np.zeros((self.buffer_size,) + frame.shape, dtype=np.uint8)
+            in_slot = False
+        if not in_slot:
+            np.copyto(self.buffer[slot], frame)
+        with self.cond:
+            self.frame_ids[slot] = frame_id
+            self.timestamps[slot] = timestamp
+            self.latest_id = frame_id
+            self.frames_captured += 1
+            self.cond.notify_all()
+
     def update(self):
-        # Keep looping infinitely until the thread is stopped
+        # Event-driven: grab() sleeps in the driver until the next frame is ready (V4L2 select()),
+        # so the loop runs exactly once per captured frame instead of spinning.
+        # A camera that never delivered a frame is missing, not failing: stop as before
+        reconnectable = isinstance(self.src, int) and config.CAMERA_RECONNECT_DELAY > 0 and self.grabbed
         while True:
             if self.stopped:
                 return
-            
-            (grabbed, frame) = self.stream.read()
+
+            if self.pending_resolution is not None:
+                self.resolution = self.pending_resolution
+                self.pending_resolution = None
+                self.stream.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolution[0])
+                self.stream.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
+                self.format = self.read_format(self.stream, self.format.get('measured_fps', 0.0))
+
+            slot = (self.latest_id + 1) % self.buffer_size
+            target = self.buffer[slot]
+            grabbed = self.stream.grab()
+            t0 = time.perf_counter()
+            if grabbed:
+                # Decode straight into the ring slot when the size matches (no extra allocation)
+                (grabbed, frame) = self.stream.retrieve(target)
+            timestamp = time.perf_counter()
+            metrics.observe('capture', timestamp - t0)
             if grabbed:
                 self.grabbed = grabbed
-                self.frame = frame
-            else:
-                self.stopped = True
+                # The capture time is when the driver dequeued the frame; V4L2 stamps buffers with
+                # CLOCK_MONOTONIC (= perf_counter on Linux), use that when it looks sane
+                driver_ts = self.stream.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                in_slot = frame.__array_interface__['data'][0] == target.__array_interface__['data'][0]
+                self._store(frame, driver_ts if 0 < t0 - driver_ts < 1.0 else t0, in_slot)
+                continue
+            frame = self.reconnect() if reconnectable else None
+            if frame is not None:
+                self._store(frame, time.perf_counter())
+                continue
+            self.stopped = True
+            with self.cond:
+                self.cond.notify_all()
+
+    def _get(self, frame_id):
+        # Zero-copy: the caller gets a view of the ring slot, raw (not mirrored).
+        # Mirroring is applied to landmark coordinates by the detector, and to pixels only for the debug window.
+        # The slot is rewritten FRAME_BUFFER_SIZE frames later, so copy it to keep it longer.
+        slot = frame_id % self.buffer_size
+        return self.buffer[slot], self.timestamps[slot]
 
     def read(self):
-        # Return the most recent frame
-        if self.frame is not None:
-             # Flip logic happens here so the main thread gets the correct view
-            return cv2.flip(self.frame, 1)
-        return None
+        # Return the most recent frame (may be one that was already returned)
+        with self.cond:
+            frame_id = self.latest_id
+            if frame_id < 0:
+                return None
+            if frame_id == self.last_read_id:
+                self.frames_duplicate += 1
+            self.last_read_id = frame_id
+            frame, _ = self._get(frame_id)
+        return frame
+
+    def read_next(self, timeout=None):
+        # Block until a frame newer than the last one returned arrives.
+        # Returns (frame_id, timestamp, frame) or (None, None, None) on timeout / stop.
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.latest_id > self.last_read_id or self.stopped, timeout):
+                return None, None, None
+            if self.latest_id <= self.last_read_id:
+                return None, None, None
+            frame_id = self.latest_id
+            if self.last_read_id >= 0:
+                self.frames_dropped += frame_id - self.last_read_id - 1
+            self.last_read_id = frame_id
+            frame, timestamp = self._get(frame_id)
+        # Capture -> delivery: time the frame spent in the driver and the ring before anyone took it
+        latency = time.perf_counter() - float(timestamp)
+        self.delivered += 1
+        self.delivery_time += latency
+        metrics.observe('camera_delivery', latency)
+        return frame_id, timestamp, frame
+
+    def set_resolution(self, width, height):
+        # Asynchronous: the capture thread applies it, the ring reallocates on the first new-size frame
+        self.pending_resolution = (width, height)
+
+    def get_stats(self):
+        return {
+            'captured': self.frames_captured,
+            'dropped': self.frames_dropped,
+            'duplicate': self.frames_duplicate,
+            'reconnects': self.reconnects,
+            'delivery_ms': self.delivery_time / max(self.delivered, 1) * 1000,
+            'format': dict(self.format),
+        }
 
     def release(self):
         self.stopped = True
-        # Give thread time to stop
-        time.sleep(0.1)
-        self.stream.release()
\ No newline at end of file
+        with self.cond:
+            self.cond.notify_all()
+        # Give the thread time to stop (at most one frame interval while it waits in grab())
+        if self.thread is not None:
+            self.thread.join(1.0)
+        self.stream.release()
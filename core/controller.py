@@ -1,13 +1,82 @@
-import pyautogui
 import numpy as np
 import config
+from threading import Thread, Lock, Event
+from core.output import create_backend
 
 class CursorController:
-    def __init__(self):
-        self.screen_w, self.screen_h = pyautogui.size()
-        pyautogui.FAILSAFE = False # Allow reaching corners without crashing
-        pyautogui.PAUSE = 0       # CRITICAL: Remove 0.1s delay for smooth real-time control
+    # Coalescing front-end for an output backend (see core/output.py):
+    # - move_relative() only accumulates; sub-pixel remainders are carried over, never lost
+    # - button changes that don't change anything (mouseDown while already down) are dropped
+    # - with rate_hz > 0 a dedicated thread sends the accumulated movement at that rate,
+    #   button events wake it immediately and keep their order relative to movement
+    def __init__(self, backend=None, rate_hz=None):
+        self.backend = backend if backend is not None else create_backend(config.OUTPUT_BACKEND)
+        self.screen_w, self.screen_h = self.backend.size()
+        self.rate_hz = config.OUTPUT_RATE_HZ if rate_hz is None else rate_hz
 
+        self.lock = Lock()
+        self.acc_x, self.acc_y = 0.0, 0.0 # Movement not sent yet (float pixels)
+        self.events = []                  # Ordered ('move', dx, dy) / ('button', name, down)
+        self.buttons = {'left': False, 'right': False}
+        self.drag_sent = (0, 0)           # Movement sent since the left button went down, for cancel_drag()
+        self.drag_remainder = (0.0, 0.0)  # Sub-pixel remainder at that moment
+
+        # Stats
+        self.moves_requested = 0
+        self.events_sent = 0
+        self.buttons_dropped = 0
+
+        self.stopped = False
+        self.wake = Event()
+        self.thread = None
+        if self.rate_hz > 0:
+            self.thread = Thread(target=self.run, name="output", daemon=True)
+            self.thread.start()
+
+    # --- OUTPUT THREAD ---
+    def run(self):
+        period = 1.0 / self.rate_hz
+        while not self.stopped:
+            self.wake.wait(period)
+            self.wake.clear()
+            self.flush()
+
+    def _take_movement(self):
+        # Integer part of the accumulated movement becomes an event, the remainder stays (lock held)
+        ix, iy = int(self.acc_x), int(self.acc_y)
+        if ix or iy:
+            self.acc_x -= ix
+            self.acc_y -= iy
+            self.events.append(('move', ix, iy))
+            if self.buttons['left']:
+                self.drag_sent = (self.drag_sent[0] + ix, self.drag_sent[1] + iy)
+
+    def flush(self):
+        with self.lock:
+            self._take_movement()
+            events, self.events = self.events, []
+        for kind, a, b in events:
+            if kind == 'move': self.backend.move_relative(a, b)
+            else: self.backend.button(a, b)
+        self.events_sent += len(events)
+
+    def _button(self, name, down):
+        with self.lock:
+            if self.buttons[name] == down:
+                self.buttons_dropped += 1
+                return
+            self._take_movement() # Movement before the button change is sent before it
+            self.buttons[name] = down
+            if name == 'left' and down:
+                self.drag_sent, self.drag_remainder = (0, 0), (self.acc_x, self.acc_y)
+            self.events.append(('button', name, down))
+        self._send()
+
+    def _send(self):
+        if self.thread is None: self.flush()
+        else: self.wake.set()
+
+    # --- PUBLIC API ---
     def move(self, x, y):
         # Absolute movement (Legacy/Fallback)
         # Convert Camera Coordinates to Screen Coordinates with Margins
@@ -15,23 +84,56 @@ class CursorController:
         y = np.clip(y, config.SCREEN_MARGIN, config.FRAME_HEIGHT - config.SCREEN_MARGIN)
         screen_x = np.interp(x, (config.SCREEN_MARGIN, config.FRAME_WIDTH - config.SCREEN_MARGIN), (0, self.screen_w))
         screen_y = np.interp(y, (config.SCREEN_MARGIN, config.FRAME_HEIGHT - config.SCREEN_MARGIN), (0, self.screen_h))
-        pyautogui.moveTo(screen_x, screen_y)
+        self.flush()
+        self.backend.move_to(screen_x, screen_y)
 
     def move_relative(self, dx, dy):
         # Relative movement (Trackpad style)
         # Sensitivity is now applied externally (in main.py) to support different modes (Normal vs Precision)
-        
-        # PyAutoGUI handles float inputs gracefully, but let's be safe
-        pyautogui.move(dx, dy)
+        with self.lock:
+            self.acc_x += dx
+            self.acc_y += dy
+            self.moves_requested += 1
+        if self.thread is None: self.flush()
 
     def click(self):
-        pyautogui.click()
+        self._button('left', True)
+        self._button('left', False)
 
     def right_click(self):
-        pyautogui.rightClick()
+        self._button('right', True)
+        self._button('right', False)
 
     def start_drag(self):
-        pyautogui.mouseDown()
+        self._button('left', True)
 
     def stop_drag(self):
-        pyautogui.mouseUp()
+        self._button('left', False)
+
+    def cancel_drag(self):
+        # Rollback of a speculative drag: back to the exact point where the button went down, then
+        # release, so the drop lands where the drag started
+        with self.lock:
+            if self.buttons['left']:
+                self._take_movement()
+                dx, dy = self.drag_sent
+                if dx or dy: self.events.append(('move', -dx, -dy))
+                self.acc_x, self.acc_y = self.drag_remainder
+        self._button('left', False)
+
+    def get_stats(self):
+        return {
+            'moves_requested': self.moves_requested,
+            'events_sent': self.events_sent,
+            'buttons_dropped': self.buttons_dropped,
+        }
+
+    def close(self):
+        # Never leave a button held down (e.g. exiting in the middle of a drag)
+        for name, down in list(self.buttons.items()):
+            if down: self._button(name, False)
+        self.stopped = True
+        self.wake.set()
+        if self.thread is not None: self.thread.join(1.0)
+        self.flush()
+        self.backend.close()
@@ -1,49 +1,336 @@
-import mediapipe as mp
 import cv2
 import config
-import math
+import numpy as np
+import time
+from utils.live_config import settings
+from utils.metrics import metrics
+
+LANDMARK_POOL_SIZE = 4 # Frames of landmark blocks kept alive (covers the frames in flight in PIPELINE_MODE)
+
+# Frames arrive unmirrored (no pixel flip), but MediaPipe's handedness assumes a mirrored selfie view.
+# Landmark x is mirrored instead, and labels are swapped so they still name the user's real hand.
+MIRRORED_LABEL = {'Left': 'Right', 'Right': 'Left'}
+
+def load_mediapipe():
+    # Deferred import: mediapipe takes ~0.5 s to import, and landmark-only users (replay, recording) never need it
+    import mediapipe as mp
+    return mp
+
+class HandInfo:
+    # Compact per-hand result, all (21, 3) float32 in the mirrored view:
+    # lm:    x, y in pixels, z normalized (MediaPipe depth relative to the wrist, in frame widths). For drawing / crops.
+    # norm:  x, y, z all in frame widths: isotropic and resolution independent. For gesture geometry and the cursor.
+    # world: metres, origin at the hand's centre (MediaPipe world landmarks). Only when the detector has
+    #        keep_world set (calibration), else None.
+    # The views live in the detector's landmark pool, so copy them to keep them past LANDMARK_POOL_SIZE frames.
+    __slots__ = ('type', 'score', 'lm', 'bbox', 'norm', 'world')
+
+    def __init__(self, type, score, lm, bbox, norm=None, world=None):
+        self.type = type     # 'Left' / 'Right'
+        self.score = score   # Handedness confidence
+        self.lm = lm
+        self.bbox = bbox     # (x, y, w, h) in pixels
+        self.norm = norm
+        self.world = world
+
+def normalize_landmarks(lm, width, out=None):
+    # Pixel landmarks -> frame-width units (z already is)
+    if out is None: out = np.empty_like(lm)
+    np.multiply(lm[..., :2], 1.0 / width, out=out[..., :2])
+    out[..., 2] = lm[..., 2]
+    return out
 
 class HandDetector:
     def __init__(self):
-        self.mp_hands = mp.solutions.hands
-        # Start with the default from config
-        self.setup_hands(config.MAX_HANDS)
+        self.mp_hands = load_mediapipe().solutions.hands
+        # Persistent graphs, keyed by (role, model complexity), built once and kept warm:
+        # - 2 (search): 2 hands, used while waiting for a hand to lock
+        # - 1 (tracking): 1 hand, used once a hand is locked (Performance Mode)
+        # - 'roi': 1 hand, only ever fed crops around the tracked hand (ROI_TRACKING)
+        # Graphs for another complexity are built by prepare_complexity() (main.py does it for the
+        # governor's Lite model at startup), else the first time the governor asks for it.
+        self.graphs = {}
+        self.model_complexity = config.MODEL_COMPLEXITY
+        self.max_hands = 2 # Start in Search Mode
+        for role in (1, 'roi', 2):
+            self.get_graph(role)
+        self.select_graphs()
+        self.results = None
+        self.last_switch_ms = 0.0 # Time spent in the last set_max_hands() / set_model_complexity() call
+        self.last_inference_time = 0.0 # Seconds spent in hands.process() for the last frame (None: tracked by flow)
 
-    def setup_hands(self, max_hands):
-        """Re-initializes the MediaPipe Hands object with a new max_hands limit."""
-        self.hands = self.mp_hands.Hands(
+        # ROI tracking state
+        self.track_bbox = None # bbox of the tracked hand in the previous frame
+        self.roi = None        # (x, y, w, h) crop used for the current results, None = full frame
+        self.roi_frames = 0
+        self.full_frames = 0
+
+        # Optical flow state (FLOW_TRACKING): what the next frame needs to propagate the locked hand
+        self.flow_prev = None # (gray patch, (x0, y0) raw patch origin, points (21, 2) in patch coords, frame shape)
+        self.flow_hand = None # (label, score, z) of the hand at the last keyframe
+        self.flow_lm = None   # (21, 3) mirrored landmarks for the current frame when it was tracked by flow
+        self.flow_run = 0     # Flow frames since the last keyframe
+        self.flow_frames = 0
+        self.flow_rejected = 0
+        self.keep_world = False # Also convert world landmarks (costs a Python loop per hand)
+        self.lm_pool = self.new_lm_pool()
+        self.lm_pool_idx = 0
+        self.rgb_buf = None # Reused BGR -> RGB destination (no per-frame allocation)
+
+    def new_lm_pool(self):
+        # Per frame: one (3, max_hands, 21, 3) block = pixel, normalized and world landmarks
+        return [np.zeros((3, max(config.MAX_HANDS, 1), 21, 3), dtype=np.float32) for _ in range(LANDMARK_POOL_SIZE)]
+
+    def setup_hands(self, max_hands, model_complexity=config.MODEL_COMPLEXITY):
+        """Builds a MediaPipe Hands graph with the given max_hands limit."""
+        return self.mp_hands.Hands(
             max_num_hands=max_hands,
-            model_complexity=config.MODEL_COMPLEXITY,
+            model_complexity=model_complexity,
             min_detection_confidence=config.MIN_DETECTION_CONFIDENCE,
             min_tracking_confidence=config.MIN_TRACKING_CONFIDENCE
         )
 
+    def get_graph(self, role, complexity=None):
+        complexity = self.model_complexity if complexity is None else complexity
+        key = (role, complexity)
+        graph = self.graphs.get(key)
+        if graph is None:
+            if role == 'roi' and not config.ROI_TRACKING:
+                return None
+            graph = self.graphs[key] = self.setup_hands(config.MAX_HANDS if role == 2 else 1, complexity)
+        return graph
+
+    def prepare_complexity(self, complexity):
+        # Builds the graphs of another model complexity without switching to it, so that
+        # set_model_complexity() never builds on the tracking thread. warm_up() warms them with the rest.
+        for role in (1, 'roi', 2):
+            self.get_graph(role, complexity)
+
+    def select_graphs(self):
+        self.hands = self.get_graph(self.max_hands)
+        self.roi_graph = self.get_graph('roi')
+        self.track_bbox = None
+        self.flow_prev = None
+
     def set_max_hands(self, n):
-        self.setup_hands(n)
+        # O(1) switch between the pre-warmed graphs (no rebuild, no leak)
+        t0 = time.perf_counter()
+        n = 1 if n <= 1 else 2
+        if n != self.max_hands:
+            self.max_hands = n
+            self.select_graphs()
+        self.last_switch_ms = (time.perf_counter() - t0) * 1000
+        return self.last_switch_ms
+
+    def set_model_complexity(self, complexity):
+        # 0 = Lite, 1 = Full. O(1) for prepared complexities, else the first switch builds its graphs
+        t0 = time.perf_counter()
+        if complexity != self.model_complexity:
+            self.model_complexity = complexity
+            self.select_graphs()
+        self.last_switch_ms = (time.perf_counter() - t0) * 1000
+        return self.last_switch_ms
+
+    def reset_graphs(self):
+        # Graph settings changed (MAX_HANDS, confidences, ROI_TRACKING): rebuild and warm the graphs of
+        # every complexity built so far, so the governor's later switches stay O(1)
+        t0 = time.perf_counter()
+        built = {complexity for role, complexity in self.graphs}
+        self.close()
+        self.lm_pool = self.new_lm_pool()
+        for complexity in built:
+            for role in (1, 'roi', 2):
+                self.get_graph(role, complexity)
+        self.select_graphs()
+        self.warm_up()
+        self.last_switch_ms = (time.perf_counter() - t0) * 1000
+        return self.last_switch_ms
+
+    def warm_up(self):
+        # One inference per built graph on a blank frame, so the first real frame does not pay for
+        # MediaPipe's lazy setup (calculators, model load). Returns ms. Not thread-safe with find_hands().
+        t0 = time.perf_counter()
+        blank = np.zeros((config.FRAME_HEIGHT, config.FRAME_WIDTH, 3), dtype=np.uint8)
+        blank_roi = np.zeros((config.ROI_INPUT_SIZE, config.ROI_INPUT_SIZE, 3), dtype=np.uint8)
+        for (role, _), graph in self.graphs.items():
+            graph.process(blank_roi if role == 'roi' else blank)
+        return (time.perf_counter() - t0) * 1000
+
+    def close(self):
+        for graph in self.graphs.values():
+            graph.close()
+        self.graphs = {}
+        self.hands = None
+        self.roi_graph = None
+
+    def get_roi(self, frame_shape, bbox, padding):
+        # Square crop around the bbox, padded on every side, clamped to the frame
+        h, w = frame_shape[:2]
+        bx, by, bw, bh = bbox
+        side = max(int(max(bw, bh) * (1 + 2 * padding)), w // 10) # Minimum: 64 px at 640 wide
+        cx, cy = bx + bw // 2, by + bh // 2
+        x0 = max(0, min(cx - side // 2, w - side))
+        y0 = max(0, min(cy - side // 2, h - side))
+        return x0, y0, min(side, w - x0), min(side, h - y0)
+
+    def track_flow(self, frame, cfg):
+        # Propagates the locked hand's landmarks from the previous frame with sparse Lucas-Kanade flow
+        # on the same small patch. Returns (21, 3) mirrored landmarks, or None if the result can't be trusted.
+        prev_gray, (x0, y0), prev_pts, _ = self.flow_prev
+        ph, pw = prev_gray.shape
+        gray = cv2.cvtColor(frame[y0:y0 + ph, x0:x0 + pw], cv2.COLOR_BGR2GRAY)
+        lk = dict(winSize=(cfg.FLOW_WIN_SIZE, cfg.FLOW_WIN_SIZE), maxLevel=cfg.FLOW_PYR_LEVELS)
+        pts, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, prev_pts, None, **lk)
+        back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, prev_gray, pts, None, **lk)
+        ok = (status[:, 0] == 1) & (back_status[:, 0] == 1)
+        if ok.mean() < cfg.FLOW_MIN_TRACKED:
+            return None
+
+        # Drift: a point that flows forward then back should land where it started
+        max_drift = cfg.FLOW_MAX_DRIFT * frame.shape[1] / cfg.REFERENCE_WIDTH
+        if np.median(np.linalg.norm(back[ok] - prev_pts[ok], axis=1)) > max_drift:
+            return None
+        motion = np.median(pts[ok] - prev_pts[ok], axis=0)
+        hand_size = max(np.ptp(prev_pts[:, 0]), np.ptp(prev_pts[:, 1]), 1.0)
+        if np.hypot(*motion) > cfg.FLOW_MAX_MOTION * hand_size:
+            return None # Fast motion: worth a real detection
+        pts[~ok] = prev_pts[~ok] + motion # Lost points follow the hand
+
+        lm = np.empty((21, 3), dtype=np.float32)
+        lm[:, 0] = frame.shape[1] - (pts[:, 0] + x0) # Raw -> mirrored view
+        lm[:, 1] = pts[:, 1] + y0
+        lm[:, 2] = self.flow_hand[2]
+        return lm
+
+    def prepare_flow(self, frame, hand, cfg):
+        # Keeps the patch around the tracked hand (and its points) for the next frame's optical flow
+        x0, y0, cw, ch = self.get_roi(frame.shape, hand.bbox, cfg.ROI_PADDING) # Mirrored view coords
+        raw_x0 = frame.shape[1] - x0 - cw
+        gray = cv2.cvtColor(frame[y0:y0 + ch, raw_x0:raw_x0 + cw], cv2.COLOR_BGR2GRAY)
+        pts = np.empty((21, 2), dtype=np.float32)
+        pts[:, 0] = frame.shape[1] - hand.lm[:, 0] - raw_x0
+        pts[:, 1] = hand.lm[:, 1] - y0
+        self.flow_prev = (gray, (raw_x0, y0), pts, frame.shape)
+        if self.flow_lm is None: # Keyframe: remember what flow can't measure
+            self.flow_hand = (hand.type, hand.score, hand.lm[:, 2].copy())
 
     def find_hands(self, frame):
+        # frame: raw (unmirrored) BGR camera frame. Results are reported in the mirrored view.
+        cfg = settings.current # One configuration for the whole frame
+        self.roi = None
+        self.last_inference_time = 0.0
+        self.flow_lm = None
+        if (self.flow_prev is not None and self.max_hands == 1 and self.flow_prev[3] == frame.shape
+                and self.flow_run < cfg.FLOW_KEYFRAME_INTERVAL - 1):
+            # Between keyframes: no inference at all if the flow result is trustworthy
+            t0 = time.perf_counter()
+            self.flow_lm = self.track_flow(frame, cfg)
+            metrics.observe('flow', time.perf_counter() - t0)
+            if self.flow_lm is not None:
+                self.flow_run += 1
+                self.flow_frames += 1
+                self.last_inference_time = None # No model ran: keep it out of the governor's inference average
+                return frame
+            self.flow_rejected += 1
+        self.flow_run = 0
+        if self.roi_graph is not None and self.max_hands == 1 and self.track_bbox is not None:
+            # Tracking Mode: only run the model on a crop around the previous bbox
+            t0 = time.perf_counter()
+            x0, y0, cw, ch = roi = self.get_roi(frame.shape, self.track_bbox, cfg.ROI_PADDING) # Mirrored view coords
+            raw_x0 = frame.shape[1] - x0 - cw
+            crop = frame[y0:y0 + ch, raw_x0:raw_x0 + cw]
+            scale = cfg.ROI_INPUT_SIZE / max(cw, ch)
+            if scale < 1: # Downscale to the model input size (aspect kept, so normalized coords are unchanged)
+                crop = cv2.resize(crop, (max(1, int(cw * scale)), max(1, int(ch * scale))), interpolation=cv2.INTER_AREA)
+            crop_rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+            t1 = time.perf_counter()
+            results = self.roi_graph.process(crop_rgb)
+            inference_time = time.perf_counter() - t1
+            self.last_inference_time += inference_time
+            metrics.observe('color_convert', t1 - t0)
+            metrics.observe('inference', inference_time)
+            if results.multi_hand_landmarks and results.multi_handedness[0].classification[0].score >= cfg.ROI_MIN_CONFIDENCE:
+                self.results = results
+                self.roi = roi
+                self.roi_frames += 1
+                return frame
+            # Hand left the ROI or confidence dropped: fall back to full-frame detection on this same frame
+            self.track_bbox = None
+
         # MediaPipe needs RGB, OpenCV uses BGR
-        img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        t0 = time.perf_counter()
+        if self.rgb_buf is None or self.rgb_buf.shape != frame.shape:
+            self.rgb_buf = np.empty_like(frame)
+        img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.rgb_buf)
+        t1 = time.perf_counter()
         self.results = self.hands.process(img_rgb)
+        inference_time = time.perf_counter() - t1
+        self.last_inference_time += inference_time # Includes a failed ROI attempt on this same frame
+        metrics.observe('color_convert', t1 - t0)
+        metrics.observe('inference', inference_time)
+        self.full_frames += 1
         return frame
 
     def get_hands_info(self, frame):
+        t0 = time.perf_counter()
+        cfg = settings.current
         hands_data = []
-        if self.results.multi_hand_landmarks and self.results.multi_handedness:
+        if self.flow_lm is not None:
+            pool = self.lm_pool[self.lm_pool_idx]
+            self.lm_pool_idx = (self.lm_pool_idx + 1) % len(self.lm_pool)
+            block, norm = pool[0], pool[1]
+            block[0] = self.flow_lm
+            normalize_landmarks(block[:1], frame.shape[1], out=norm[:1])
+            x_min, y_min = block[0, :, :2].min(axis=0)
+            x_max, y_max = block[0, :, :2].max(axis=0)
+            label, score, _ = self.flow_hand
+            hands_data.append(HandInfo(label, score, block[0],
+                                       (int(x_min), int(y_min), int(x_max - x_min), int(y_max - y_min)), norm[0]))
+        elif self.results.multi_hand_landmarks and self.results.multi_handedness:
             h, w, c = frame.shape
-            for hand_lms, hand_info in zip(self.results.multi_hand_landmarks, self.results.multi_handedness):
-                lm_list = []
-                x_list, y_list = [], []
-                for id, lm in enumerate(hand_lms.landmark):
-                    cx, cy = int(lm.x * w), int(lm.y * h)
-                    lm_list.append([id, cx, cy])
-                    x_list.append(cx)
-                    y_list.append(cy)
-
-                label = hand_info.classification[0].label 
-                hands_data.append({
-                    'type': label,
-                    'lm_list': lm_list,
-                    'bbox': (min(x_list), min(y_list), max(x_list)-min(x_list), max(y_list)-min(y_list))
-                })
+            # One preallocated (3, max_hands, 21, 3) block per frame, taken from a small ring
+            pool = self.lm_pool[self.lm_pool_idx]
+            self.lm_pool_idx = (self.lm_pool_idx + 1) % len(self.lm_pool)
+            block, norm = pool[0], pool[1]
+            n = min(len(self.results.multi_hand_landmarks), block.shape[0])
+            for i, hand_lms in enumerate(self.results.multi_hand_landmarks[:n]):
+                block[i] = [(lm.x, lm.y, lm.z) for lm in hand_lms.landmark]
+            # Normalized -> mirrored pixel coordinates for all hands at once (z stays normalized)
+            if self.roi is None:
+                block[:n, :, 0] = (1 - block[:n, :, 0]) * w
+                block[:n, :, 1] *= h
+            else:
+                # Landmarks are normalized to the crop: map them back to frame coordinates
+                x0, y0, cw, ch = self.roi
+                block[:n, :, 0] = (1 - block[:n, :, 0]) * cw + x0
+                block[:n, :, 1] = block[:n, :, 1] * ch + y0
+                block[:n, :, 2] *= cw / w
+            normalize_landmarks(block[:n], w, out=norm[:n])
+            world = None
+            if self.keep_world and self.results.multi_hand_world_landmarks:
+                world = pool[2]
+                for i, hand_lms in enumerate(self.results.multi_hand_world_landmarks[:n]):
+                    world[i] = [(-lm.x, lm.y, lm.z) for lm in hand_lms.landmark] # Mirrored like the rest
+            mins = block[:n, :, :2].min(axis=1)
+            maxs = block[:n, :, :2].max(axis=1)
+
+            for i, hand_info in enumerate(self.results.multi_handedness[:n]):
+                x_min, y_min = mins[i]
+                x_max, y_max = maxs[i]
+                cls = hand_info.classification[0]
+                hands_data.append(HandInfo(
+                    MIRRORED_LABEL[cls.label],
+                    cls.score,
+                    block[i],
+                    (int(x_min), int(y_min), int(x_max - x_min), int(y_max - y_min)),
+                    norm[i],
+                    world[i] if world is not None else None
+                ))
+        # Remember where the single tracked hand is, so the next frame can use an ROI
+        self.track_bbox = hands_data[0].bbox if self.max_hands == 1 and hands_data else None
+        if cfg.FLOW_TRACKING and self.track_bbox is not None:
+            self.prepare_flow(frame, hands_data[0], cfg)
+        else:
+            self.flow_prev = None
+        metrics.observe('landmarks', time.perf_counter() - t0)
         return hands_data
@@ -0,0 +1,69 @@
+import time
+from utils.live_config import settings
+from utils.metrics import metrics
+
+class ActionExecutor:
+    # Turns interpreter actions into controller calls (smoothing + relative trackpad movement)
+    MOVE_ACTIONS = ("MOVE", "DRAG", "PRECISION", "DRAG_PRECISION")
+
+    def __init__(self, controller, smoother, clock=time.perf_counter):
+        self.controller = controller
+        self.smoother = smoother
+        self.clock = clock # Same time base as the frame timestamps
+        self.prev_x, self.prev_y = None, None
+        self.last_t = None # Timestamp of the last tracked frame
+        self.latency_ema = 0.0 # Capture -> execute latency, used as the filter's prediction lead
+
+    def release(self, action):
+        # Ends a hold outside the frame loop (gesture rules reloaded in the middle of a drag)
+        if action == "DROP":
+            self.controller.stop_drag()
+        elif action == "CANCEL":
+            self.controller.cancel_drag()
+
+    def reanchor(self):
+        # Forget the reference point and the filter state, so the next position starts fresh
+        self.prev_x, self.prev_y = None, None
+        self.last_t = None
+        self.smoother.reset()
+
+    def execute(self, action, coords, timestamp=None):
+        # timestamp: capture time of the frame the coords come from (enables time-aware filtering)
+        if action == "NONE" or action == "STOP":
+            self.reanchor()
+            return
+
+        cfg = settings.current
+        t = timestamp if timestamp is not None else self.clock()
+        if self.last_t is not None and t - self.last_t > cfg.FILTER_RESET_GAP:
+            self.reanchor() # Tracking paused: a stale filter would drift the cursor toward the new position
+        self.last_t = t
+        x_raw, y_raw = coords
+        lead = 0.0
+        if timestamp is not None and cfg.FILTER_LATENCY_COMPENSATION:
+            self.latency_ema += 0.1 * ((self.clock() - timestamp) - self.latency_ema)
+            lead = self.latency_ema
+        t0 = time.perf_counter()
+        x_smooth, y_smooth = self.smoother.smooth(x_raw, y_raw, timestamp, lead)
+        t1 = time.perf_counter()
+        metrics.observe('smoothing', t1 - t0)
+
+        if action in self.MOVE_ACTIONS:
+            if self.prev_x is not None:
+                dx = x_smooth - self.prev_x
+                dy = y_smooth - self.prev_y
+                sens = cfg.SENSITIVITY_PRECISION if "PRECISION" in action else cfg.SENSITIVITY
+                if "DRAG" in action: self.controller.start_drag()
+                self.controller.move_relative(dx * sens, dy * sens)
+        elif action == "CLICK":
+            self.controller.click()
+        elif action == "RIGHT_CLICK":
+            self.controller.right_click()
+        elif action == "DROP":
+            self.controller.stop_drag()
+        elif action == "CANCEL":
+            self.controller.cancel_drag()
+        # FREEZE: only re-anchor the reference point
+        metrics.observe('output', time.perf_counter() - t1)
+
+        self.prev_x, self.prev_y = x_smooth, y_smooth
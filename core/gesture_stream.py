@@ -0,0 +1,252 @@
+import os
+import socket
+import struct
+import time
+import numpy as np
+import config
+from threading import Thread, Lock
+from core.pipeline import LatestQueue
+from utils.action_log import ACTIONS, ACTION_CODES, UNKNOWN_ACTION
+from utils.metrics import metrics
+from utils.recording import HAND_LABELS
+
+# Local gesture stream (main.py --serve): every processed frame's hands and action, published over a
+# Unix socket so other programs can use the tracker without running their own MediaPipe.
+#
+# Wire format, little-endian. On connect the server sends HELLO once, then one message per frame:
+#   FRAME_HEADER, then n_hands HAND_DTYPE records.
+# All times are time.perf_counter() seconds (CLOCK_MONOTONIC on Linux: comparable across processes).
+# Landmarks are HandInfo.norm (frame-width units, mirrored view); multiply by width for pixels.
+
+MAGIC = b'TMGS'
+VERSION = 1
+HELLO = struct.Struct('<4sHH')   # magic, version, HAND_DTYPE.itemsize
+FRAME_HEADER = struct.Struct(
+    '<I'    # length: whole message in bytes (header + hands)
+    'I'     # seq: message number, a gap means this client missed frames (back-pressure)
+    'q'     # frame_id
+    'd'     # capture_ts
+    'd'     # publish_ts
+    'HH'    # frame width, height (pixels)
+    'BBBBB' # action (index into ACTIONS), lock (0 = none, else HAND_LABELS index + 1), mask, n_hands, camera
+    'xxx'
+    'ff'    # action coords (REFERENCE_WIDTH pixels), NaN when the action has none
+)
+HAND_DTYPE = np.dtype([('label', 'u1'), ('score', '<f4'), ('norm', '<f4', (21, 3))])
+
+class GestureFrame:
+    # Decoded FRAME message (client side)
+    __slots__ = ('seq', 'frame_id', 'capture_ts', 'publish_ts', 'width', 'height', 'action', 'locked_hand_type',
+                 'mask', 'camera', 'coords', 'hands')
+
+    def __init__(self, seq, frame_id, capture_ts, publish_ts, width, height, action, locked_hand_type, mask, camera, coords, hands):
+        self.seq = seq
+        self.frame_id = frame_id
+        self.capture_ts = capture_ts
+        self.publish_ts = publish_ts
+        self.width = width
+        self.height = height
+        self.action = action
+        self.locked_hand_type = locked_hand_type
+        self.mask = mask
+        self.camera = camera
+        self.coords = coords
+        self.hands = hands # HAND_DTYPE array: 'label' (HAND_LABELS index), 'score', 'norm' (21, 3)
+
+def encode_frame(seq, frame_id, frame_ts, frame_size, hands_data, action, coords, locked_hand_type, mask, camera=0):
+    n = len(hands_data)
+    hands = np.empty(n, dtype=HAND_DTYPE)
+    for i, hand in enumerate(hands_data):
+        hands[i] = (HAND_LABELS.index(hand.type), hand.score, hand.norm)
+    x, y = coords if coords is not None else (np.nan, np.nan)
+    lock = HAND_LABELS.index(locked_hand_type) + 1 if locked_hand_type else 0
+    header = FRAME_HEADER.pack(FRAME_HEADER.size + hands.nbytes, seq & 0xFFFFFFFF, frame_id, frame_ts, time.perf_counter(),
+                               frame_size[1], frame_size[0], ACTION_CODES.get(action, UNKNOWN_ACTION), lock, mask, n,
+                               camera, x, y)
+    return header + hands.tobytes()
+
+def decode_frame(data):
+    (length, seq, frame_id, capture_ts, publish_ts, width, height, action, lock, mask, n, camera,
+     x, y) = FRAME_HEADER.unpack_from(data)
+    hands = np.frombuffer(data, dtype=HAND_DTYPE, count=n, offset=FRAME_HEADER.size)
+    return GestureFrame(seq, frame_id, capture_ts, publish_ts, width, height,
+                        ACTIONS[action] if action < len(ACTIONS) else 'UNKNOWN',
+                        HAND_LABELS[lock - 1] if lock else None, mask, camera,
+                        None if np.isnan(x) else (x, y), hands)
+
+
+class Subscriber:
+    __slots__ = ('sock', 'pending', 'stalled_since', 'sent', 'skipped')
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.pending = None      # Unsent tail of the last message (memoryview)
+        self.stalled_since = None
+        self.sent = 0
+        self.skipped = 0         # Frames not sent because the client was still behind
+
+
+class GesturePublisher:
+    # Server side. publish() is called on the tracking path and only encodes the frame (skipped when
+    # nobody is connected) into a latest-wins slot; a sender thread writes it to every subscriber
+    # with non-blocking sends, so a slow client can never stall tracking or the other clients.
+    # Back-pressure: each client's socket buffer is its queue. When a message does not fit whole,
+    # its tail is kept and newer frames are skipped for that client until it drained (it sees a gap
+    # in seq); messages are never split or interleaved. A client stalled for PUBLISH_STALL_TIMEOUT
+    # seconds is disconnected.
+    def __init__(self, path, stall_timeout=None):
+        self.path = path
+        self.stall_timeout = config.PUBLISH_STALL_TIMEOUT if stall_timeout is None else stall_timeout
+        self.queue = LatestQueue()
+        self.subscribers = []
+        self.lock = Lock() # Guards `subscribers` for get_stats()
+        self.seq = 0
+        self.server = None
+        self.thread = None
+        self.stopped = False
+        # Stats
+        self.published = 0
+        self.connected = 0
+        self.disconnected = 0
+
+    def start(self):
+        if os.path.exists(self.path): os.unlink(self.path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.path)
+        os.chmod(self.path, 0o600) # Landmarks are biometric data: local user only
+        self.server.listen(16)
+        self.server.setblocking(False)
+        self.thread = Thread(target=self.run, name="publisher", daemon=True)
+        self.thread.start()
+        return self
+
+    # --- TRACKING SIDE ---
+    def publish(self, frame_id, frame_ts, frame_size, hands_data, action, coords, locked_hand_type, mask, camera=0):
+        if not self.subscribers: return
+        t0 = time.perf_counter()
+        self.seq += 1
+        self.queue.put(encode_frame(self.seq, frame_id, frame_ts, frame_size, hands_data, action, coords,
+                                    locked_hand_type, mask, camera))
+        self.published += 1
+        metrics.observe('publish', time.perf_counter() - t0)
+
+    # --- SENDER THREAD ---
+    def accept(self):
+        while True:
+            try:
+                sock, _ = self.server.accept()
+            except (BlockingIOError, OSError):
+                return
+            sock.setblocking(False)
+            try:
+                sock.send(HELLO.pack(MAGIC, VERSION, HAND_DTYPE.itemsize)) # Fits in any empty socket buffer
+            except OSError:
+                sock.close()
+                continue
+            with self.lock:
+                self.subscribers.append(Subscriber(sock))
+            self.connected += 1
+
+    def send(self, sub, data):
+        # True if everything queued so far went out
+        try:
+            n = sub.sock.send(data)
+        except BlockingIOError:
+            n = 0
+        if n < len(data):
+            sub.pending = memoryview(data)[n:]
+            return False
+        sub.pending = None
+        return True
+
+    def drop(self, sub):
+        with self.lock:
+            self.subscribers.remove(sub)
+        sub.sock.close()
+        self.disconnected += 1
+
+    def run(self):
+        while not self.stopped:
+            msg = self.queue.get(timeout=0.02) # Also the retry period for clients that are behind
+            self.accept()
+            now = time.perf_counter()
+            for sub in list(self.subscribers):
+                try:
+                    if sub.pending is not None and not self.send(sub, sub.pending):
+                        if msg is not None: sub.skipped += 1
+                        if sub.stalled_since is None: sub.stalled_since = now
+                        elif now - sub.stalled_since > self.stall_timeout: self.drop(sub)
+                        continue
+                    sub.stalled_since = None
+                    if msg is not None:
+                        self.send(sub, msg)
+                        sub.sent += 1
+                except OSError: # Client went away
+                    self.drop(sub)
+
+    def get_stats(self):
+        with self.lock:
+            subs = list(self.subscribers)
+        return {
+            'published': self.published,
+            'subscribers': len(subs),
+            'connected': self.connected,
+            'disconnected': self.disconnected,
+            'sent': sum(s.sent for s in subs),
+            'skipped': sum(s.skipped for s in subs),
+            'coalesced': self.queue.dropped,
+        }
+
+    def close(self):
+        self.stopped = True
+        self.queue.close()
+        if self.thread is not None: self.thread.join(1.0)
+        for sub in list(self.subscribers):
+            sub.sock.close()
+        self.subscribers = []
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+            if os.path.exists(self.path): os.unlink(self.path)
+
+
+class GestureClient:
+    # Subscriber: `for frame in GestureClient(path): ...` yields GestureFrame objects, newest data only
+    # as fast as the client keeps up (frames it was too slow for are skipped server-side, see `missed`).
+    def __init__(self, path=None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path or config.SERVE_SOCKET)
+        self.file = self.sock.makefile('rb')
+        magic, version, hand_size = HELLO.unpack(self.read(HELLO.size))
+        if magic != MAGIC or version != VERSION or hand_size != HAND_DTYPE.itemsize:
+            raise ValueError(f"Unsupported gesture stream (version {version})")
+        self.last_seq = None
+        self.received = 0
+        self.missed = 0 # Frames the server skipped for this client
+
+    def read(self, n):
+        data = self.file.read(n)
+        if len(data) < n:
+            raise EOFError("gesture stream closed")
+        return data
+
+    def next(self):
+        head = self.read(FRAME_HEADER.size)
+        length = struct.unpack_from('<I', head)[0]
+        frame = decode_frame(head + self.read(length - FRAME_HEADER.size))
+        if self.last_seq is not None:
+            self.missed += (frame.seq - self.last_seq - 1) & 0xFFFFFFFF
+        self.last_seq = frame.seq
+        self.received += 1
+        return frame
+
+    def __iter__(self):
+        try:
+            while True:
+                yield self.next()
+        except EOFError:
+            return
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
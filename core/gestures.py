@@ -0,0 +1,242 @@
+import config
+
+# Declarative gesture rules, compiled once into lookup tables (GestureMachine).
+#
+# The interpreter measures the hand once per frame and packs the finger states into one bitmask;
+# every rule is a pattern over that mask. Each frame then costs one table lookup plus a few timer
+# comparisons against a single timestamp, however many rules there are.
+
+# --- FINGER-STATE BITS ---
+THUMB, INDEX, MIDDLE, RING, PINKY = 1, 2, 4, 8, 16
+RING_LIFTED = 32 # Ring tip above its MCP (a raised pinky drags the ring finger half up)
+SNIPER = 64      # Pinky extended, after the interpreter's hysteresis filter
+MASK_SIZE = 128
+
+DOUBLE_TAP_TIMEOUT = 0.4 # Seconds between two sniper onsets for a click
+
+class Pose:
+    # Pattern over the finger mask: every bit in `up` set, every bit in `down` clear
+    def __init__(self, up=0, down=0):
+        self.up = up
+        self.down = down
+
+    def __call__(self, mask):
+        return mask & (self.up | self.down) == self.up
+
+
+class Hold:
+    # A pose that has to be held for `seconds` before it does anything.
+    #   action:  sent once when the hold completes, then latched until the pose is let go (click-like)
+    #   active:  (normal, sniper) actions sent every frame while the completed pose is held (drag-like)
+    #   release: sent once when a completed `active` hold is let go. Not sent when another
+    #            hold or STOP takes over (those reset it silently)
+    #   marks:   (landmark, bit) pairs drawn with the hold's progress (1 = arming, 2 = done) if bit is up
+    # Predictive mode (GestureMachine(predict=True)):
+    #   early_after, early_confidence: the hold may complete after early_after seconds, as soon as the
+    #            interpreter's pose confidence reaches early_confidence (None = always waits `seconds`)
+    #   confirm: an early completion counts as a false fire if the pose is let go within `confirm` seconds
+    #            of its onset; `rollback` is then sent instead of `release` (undoes an `active` hold)
+    def __init__(self, name, pose, seconds, action=None, active=None, release=None, marks=(),
+                 early_after=None, early_confidence=1.0, confirm=0.0, rollback=None):
+        self.name = name
+        self.pose = pose
+        self.seconds = seconds
+        self.action = action
+        self.active = active
+        self.release = release
+        self.marks = marks
+        self.early_after = early_after
+        self.early_confidence = early_confidence
+        self.confirm = confirm
+        self.rollback = rollback
+
+
+class Pointer:
+    # Cursor gesture: `pose` moves the cursor with `actions` = (normal, sniper).
+    # Two sniper onsets within `double_tap` seconds send `tap`; for `linger` seconds
+    # after sniper mode ends the cursor sends `freeze` (absorbs the pinky's own movement).
+    def __init__(self, pose, actions, tap, double_tap, freeze, linger):
+        self.pose = pose
+        self.actions = actions
+        self.tap = tap
+        self.double_tap = double_tap
+        self.freeze = freeze
+        self.linger = linger
+
+
+# --- DEFAULT GESTURE SET ---
+STOP = Pose(up=THUMB | INDEX | MIDDLE | RING | PINKY) # Matched on the raw finger states
+RING_ASSIST = Pose(up=PINKY | RING_LIFTED)             # Counts the ring as up
+SNIPER_MARK = (4, 20)
+STOP_MARK = (3, 0)
+
+def default_holds():
+    # First matching hold wins where poses overlap.
+    # An early right click cannot be taken back, so it needs a higher confidence than an early drag
+    # (rolled back with CANCEL: cursor restored, then button up).
+    return (
+        Hold('right_click', Pose(up=INDEX | RING), config.RIGHT_CLICK_DELAY,
+             action='RIGHT_CLICK', marks=((16, RING), (12, MIDDLE)),
+             early_after=config.PREDICT_MIN_HOLD, early_confidence=config.PREDICT_CLICK_CONFIDENCE,
+             confirm=config.PREDICT_CONFIRM_TIME),
+        Hold('drag', Pose(up=INDEX | MIDDLE, down=RING), config.DRAG_ACTIVATION_TIME,
+             active=('DRAG', 'DRAG_PRECISION'), release='DROP', marks=((12, MIDDLE),),
+             early_after=config.PREDICT_MIN_HOLD, early_confidence=config.PREDICT_CONFIDENCE,
+             confirm=config.PREDICT_CONFIRM_TIME, rollback='CANCEL'),
+    )
+
+def default_pointer():
+    return Pointer(Pose(up=INDEX), ('MOVE', 'PRECISION'), tap='CLICK', double_tap=DOUBLE_TAP_TIMEOUT,
+                   freeze='FREEZE', linger=config.UNFREEZE_DELAY)
+
+
+class GestureMachine:
+    # Table-driven state machine compiled from the rules above.
+    # States: 0 = idle, then (arming, done) per hold. Every (state, mask, timer expired) triple
+    # maps to one precomputed entry:
+    #   (next_state, restart_timer, event, active_actions, visual_states)
+    # event != None ends the frame with that action (hold completed / released).
+    # predict: arming states may also complete early on the confidence passed to step() (see Hold);
+    # early completions stay speculative until confirmed or let go.
+    IDLE = 0
+
+    def __init__(self, holds=None, pointer=None, stop=STOP, ring_assist=RING_ASSIST, predict=None):
+        self.holds = default_holds() if holds is None else holds
+        self.pointer = default_pointer() if pointer is None else pointer
+        self.predict = config.PREDICT_ENABLED if predict is None else predict
+        self.n_states = 1 + 2 * len(self.holds)
+        self.seconds = [float('inf')] * self.n_states # Timer length per state (only arming states expire)
+        self.early_after = [float('inf')] * self.n_states
+        self.early_confidence = [float('inf')] * self.n_states
+        for k, hold in enumerate(self.holds):
+            self.seconds[1 + 2 * k] = hold.seconds
+            if self.predict and hold.early_after is not None:
+                self.early_after[1 + 2 * k] = hold.early_after
+                self.early_confidence[1 + 2 * k] = hold.early_confidence
+
+        # Per-mask tables
+        self.ring_up = [bool(m & RING) or ring_assist(m) for m in range(MASK_SIZE)]
+        self.stop = [stop(m) for m in range(MASK_SIZE)]
+        self.pointing = [self.pointer.pose(self.effective(m)) for m in range(MASK_SIZE)]
+        self.table = [self.compile_entry(s, m, e)
+                      for s in range(self.n_states) for m in range(MASK_SIZE) for e in (False, True)]
+        # Stats, and an optional list of (kind, hold name, onset, time, early) hold events
+        # ('fire' / 'false_fire'), filled when set to a list (utils/replay.py compare_prediction)
+        self.fires = 0
+        self.early_fires = 0
+        self.false_fires = 0
+        self.log = None
+        self.reset()
+
+    def effective(self, mask):
+        return mask | RING if self.ring_up[mask] else mask
+
+    def compile_entry(self, state, mask, expired):
+        m = self.effective(mask)
+        sniper_marks = (SNIPER_MARK,) if m & SNIPER else ()
+        current, done = (state - 1) // 2, state > 0 and state % 2 == 0
+        match = next((k for k, hold in enumerate(self.holds) if hold.pose(m)), None)
+
+        if match is None:
+            if state and done and self.holds[current].release:
+                return (self.IDLE, False, self.holds[current].release, None, ())
+            return (self.IDLE, False, None, None, sniper_marks)
+
+        hold = self.holds[match]
+        if state == 0 or current != match:
+            next_state, restart, level = 1 + 2 * match, True, 1 # Start arming (elapsed 0)
+        elif not done and not expired:
+            next_state, restart, level = state, False, 1
+        else:
+            next_state, restart, level = 2 + 2 * match, False, 2
+        marks = sniper_marks + tuple((level, lm_id) for lm_id, bit in hold.marks if m & bit)
+        completed_now = not done and level == 2
+        event = hold.action if completed_now and hold.action else None
+        active = hold.active if level == 2 else None
+        return (next_state, restart, event, active, marks)
+
+    def reset(self):
+        self.state = self.IDLE
+        self.since = 0.0
+        self.sniper_prev = False
+        self.last_tap = float('-inf')
+        self.sniper_seen = float('-inf')
+        self.speculative = None # (hold index, onset) of an early completion not confirmed yet
+
+    def pending_release(self):
+        # Action that ends the hold in progress if this machine is discarded (rules reloaded):
+        # the release of a completed hold, or the rollback of a speculative one. None if nothing is held.
+        if not self.state or self.state & 1:
+            return None
+        hold = self.holds[(self.state - 2) // 2]
+        if self.speculative is not None and hold.rollback:
+            return hold.rollback
+        return hold.release
+
+    def settle(self, next_state, now):
+        # Speculative hold: confirmed once held `confirm` seconds, a false fire if let go before that
+        # (pose released, STOP, another hold). Returns the hold's rollback action for a false fire.
+        k, onset = self.speculative
+        hold = self.holds[k]
+        if now - onset >= hold.confirm:
+            self.speculative = None
+            return None
+        if next_state == 2 + 2 * k:
+            return None
+        self.speculative = None
+        self.false_fires += 1
+        if self.log is not None: self.log.append(('false_fire', hold.name, onset, now, True))
+        return hold.rollback
+
+    def step(self, mask, now, confidence=0.0):
+        # Returns (action, visual_states); action None = no gesture.
+        # confidence: interpreter's pose confidence (0-1), only used in predictive mode
+        if self.stop[mask]:
+            self.state = self.IDLE
+            if self.speculative is not None:
+                rollback = self.settle(self.IDLE, now)
+                if rollback is not None: return rollback, [STOP_MARK]
+            return "STOP", [STOP_MARK]
+
+        state = self.state
+        held = now - self.since
+        expired = held > self.seconds[state]
+        early = not expired and held >= self.early_after[state] and confidence >= self.early_confidence[state]
+        next_state, restart, event, active, visual = self.table[(state * MASK_SIZE + mask) * 2 + (expired or early)]
+        self.state = next_state
+        if restart: self.since = now
+        if self.speculative is not None:
+            rollback = self.settle(next_state, now)
+            if rollback is not None:
+                return rollback, list(visual)
+        if state & 1 and next_state == state + 1: # Hold completed this frame
+            self.fires += 1
+            if early:
+                self.early_fires += 1
+                self.speculative = ((state - 1) // 2, self.since)
+            if self.log is not None: self.log.append(('fire', self.holds[(state - 1) // 2].name, self.since, now, early))
+        if event is not None:
+            return event, list(visual)
+
+        sniper = bool(mask & SNIPER)
+        if active is not None:
+            return active[sniper], list(visual)
+        if not self.pointing[mask]:
+            return None, list(visual)
+
+        p = self.pointer
+        if sniper:
+            self.sniper_seen = now
+            action = p.actions[1]
+            if not self.sniper_prev:
+                if now - self.last_tap < p.double_tap:
+                    action = p.tap
+                    self.last_tap = float('-inf')
+                else:
+                    self.last_tap = now
+            self.sniper_prev = True
+            return action, list(visual)
+        self.sniper_prev = False
+        if now - self.sniper_seen < p.linger:
+            return p.freeze, list(visual)
+        return p.actions[0], list(visual)
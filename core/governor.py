@@ -0,0 +1,120 @@
+import config
+from utils.metrics import metrics
+
+class AdaptiveGovernor:
+    # Adjusts frame rate, model complexity and capture resolution from measured load and hand presence.
+    # Modes:
+    #   ACTIVE: full-rate detection, with load shedding levels (see LOAD_LEVELS)
+    #   IDLE:   nobody in front of the camera -> GOVERNOR_IDLE_HZ detection, Lite model, low resolution
+    # Any detected hand (e.g. the fist used to lock) switches back to ACTIVE on the same frame.
+    # Hysteresis: load must stay over budget for GOVERNOR_HOLD seconds to degrade and under
+    # budget * GOVERNOR_RECOVER_RATIO for recover_hold seconds to restore. A restore that has to be
+    # undone quickly doubles recover_hold, so the governor cannot flap between two levels.
+
+    # (model complexity, process 1 of every N frames). None = config.MODEL_COMPLEXITY
+    LOAD_LEVELS = ((None, 1), (0, 1), (0, 2))
+
+    def __init__(self, detector, camera=None):
+        self.detector = detector
+        self.camera = camera
+        self.mode = 'ACTIVE'
+        self.level = 0
+        self.inference_ema = None
+        self.frame_count = 0
+        self.last_processed = None
+        self.last_hand_time = None
+        self.resolution = (config.FRAME_WIDTH, config.FRAME_HEIGHT)
+
+        # Hysteresis state
+        self.over_since = None
+        self.under_since = None
+        self.last_restore = None
+        self.recover_hold = config.GOVERNOR_RECOVER_HOLD
+
+    def should_process(self, now):
+        # Called for every new frame: False = skip inference on this one
+        self.frame_count += 1
+        if self.mode == 'IDLE':
+            if self.last_processed is not None and now - self.last_processed < 1.0 / config.GOVERNOR_IDLE_HZ:
+                metrics.inc('frames_skipped')
+                return False
+        elif self.frame_count % self.LOAD_LEVELS[self.level][1]:
+            metrics.inc('frames_skipped')
+            return False
+        self.last_processed = now
+        return True
+
+    def update(self, now, inference_time, hand_present):
+        # Called after each processed frame. inference_time is None when the model did not run (optical flow)
+        if self.last_hand_time is None:
+            self.last_hand_time = now
+        if hand_present:
+            self.last_hand_time = now
+            if self.mode == 'IDLE':
+                self.set_mode('ACTIVE')
+                return
+        elif self.mode == 'ACTIVE' and now - self.last_hand_time > config.GOVERNOR_IDLE_AFTER:
+            self.set_mode('IDLE')
+            return
+
+        if self.mode == 'ACTIVE' and inference_time is not None:
+            if self.inference_ema is None:
+                self.inference_ema = inference_time
+            else:
+                self.inference_ema += config.GOVERNOR_EMA_ALPHA * (inference_time - self.inference_ema)
+            self.update_load(now)
+
+    def update_load(self, now):
+        budget = config.GOVERNOR_BUDGET_MS / 1000
+        if self.inference_ema > budget:
+            self.under_since = None
+            if self.over_since is None:
+                self.over_since = now
+            elif now - self.over_since >= config.GOVERNOR_HOLD and self.level < len(self.LOAD_LEVELS) - 1:
+                if self.last_restore is not None and now - self.last_restore < self.recover_hold:
+                    # The last restore did not hold: wait longer before trying again
+                    self.recover_hold = min(self.recover_hold * 2, config.GOVERNOR_MAX_RECOVER_HOLD)
+                self.set_level(self.level + 1)
+        elif self.inference_ema < budget * config.GOVERNOR_RECOVER_RATIO:
+            self.over_since = None
+            if self.under_since is None:
+                self.under_since = now
+            elif now - self.under_since >= self.recover_hold and self.level > 0:
+                self.set_level(self.level - 1)
+                self.last_restore = now
+        else:
+            self.over_since = None
+            self.under_since = None
+
+    def set_level(self, level):
+        self.level = level
+        self.reset_load()
+        self.apply()
+
+    def set_mode(self, mode):
+        self.mode = mode
+        self.reset_load()
+        self.apply()
+
+    def reset_load(self):
+        # Measurements taken under the previous setting no longer apply
+        self.inference_ema = None
+        self.over_since = None
+        self.under_since = None
+
+    def apply(self):
+        if self.mode == 'IDLE':
+            complexity = 0
+            resolution = config.GOVERNOR_IDLE_RESOLUTION
+            rate = f"{config.GOVERNOR_IDLE_HZ} Hz"
+        else:
+            complexity, skip = self.LOAD_LEVELS[self.level]
+            if complexity is None: complexity = config.MODEL_COMPLEXITY
+            resolution = (config.FRAME_WIDTH, config.FRAME_HEIGHT)
+            rate = f"1/{skip} frames"
+
+        switch_ms = self.detector.set_model_complexity(complexity)
+        if self.camera is not None and resolution is not None and resolution != self.resolution:
+            self.camera.set_resolution(*resolution)
+            self.resolution = resolution
+        print(f"Governor: {self.mode} level {self.level} (complexity {complexity}, {rate}, switch {switch_ms:.1f} ms)")
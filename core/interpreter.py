@@ -1,9 +1,27 @@
 import math
+import numpy as np
 import time
-import config
+from collections import deque
+from core import gestures
+from utils.live_config import settings
+
+TIP_IDS = np.array([8, 12, 16, 20])
+PIP_IDS = np.array([6, 10, 14, 18])
+# Finger mask: (tip, reference joint, bit). Index/middle/ring/pinky tip vs PIP, plus ring tip vs ring MCP
+FINGER_RULES = ((8, 6, gestures.INDEX), (12, 10, gestures.MIDDLE), (16, 14, gestures.RING),
+                (20, 18, gestures.PINKY), (16, 13, gestures.RING_LIFTED))
+RULE_TIPS, RULE_REFS, RULE_BITS = (np.array(column) for column in zip(*FINGER_RULES))
+THUMB_IDS = np.array([4, 3]) # Thumb tip, IP
+# Pairs for the batched distance: (wrist, middle MCP) = palm size, (pinky tip, ring tip) = separation
+PINKY_PAIR_A = np.array([0, 20])
+PINKY_PAIR_B = np.array([9, 16])
 
 class GestureInterpreter:
-    def __init__(self):
+    def __init__(self, clock=time.time, predict=None):
+        # Time source for all gesture timers (replaced by a virtual clock when replaying recordings)
+        self.clock = clock
+        self.predict = predict # None = PREDICT_ENABLED
+
         # --- HAND LOCKING STATE ---
         self.locked_hand_type = None # None, 'Left', 'Right'
         
@@ -12,38 +30,19 @@ class GestureInterpreter:
         self.fist_history = {} 
         
         # --- GESTURE STATES ---
-        self.last_pinky_time = 0
-        self.is_extended_prev = False
-        self.double_tap_timeout = 0.4 
-        self.pinky_release_time = 0
+        # Click / drag / pointer rules live in core/gestures.py, compiled to a state machine
+        self.machine = gestures.GestureMachine(predict=predict)
+        self.trajectory = deque() # (time, finger extensions) over the last PREDICT_WINDOW seconds
         self.pinky_active = False # State for Hysteresis Filter
-        
-        # Drag / Middle Finger State
-        self.middle_finger_start_time = 0
-        self.is_dragging = False
+        self.last_mask = 0 # Finger bitmask of the last interpreted hand (0 = none), for the action log
 
-        # Right Click State
-        self.rc_start_time = 0
-        self.rc_triggered = False
-        self.rc_needs_reset = False
+    def is_fist(self, lm):
+        # Tip below PIP = Closed (all 4 fingers)
+        return bool((lm[TIP_IDS, 1] > lm[PIP_IDS, 1]).all())
 
-    def is_fist(self, lm_list):
-        tips = [8, 12, 16, 20]
-        pips = [6, 10, 14, 18]
-        closed_count = 0
-        for i in range(4):
-            if lm_list[tips[i]][2] > lm_list[pips[i]][2]: # Tip below PIP = Closed
-                closed_count += 1
-        return closed_count == 4
-
-    def is_open_hand(self, lm_list):
-        tips = [8, 12, 16, 20]
-        pips = [6, 10, 14, 18]
-        open_count = 0
-        for i in range(4):
-            if lm_list[tips[i]][2] < lm_list[pips[i]][2]: # Tip above PIP = Open
-                open_count += 1
-        return open_count == 4
+    def is_open_hand(self, lm):
+        # Tip above PIP = Open (all 4 fingers)
+        return bool((lm[TIP_IDS, 1] < lm[PIP_IDS, 1]).all())
 
     def process_hands(self, hands_data):
         # Wrapper to handle locking logic before processing gestures
@@ -51,6 +50,7 @@ class GestureInterpreter:
         
         target_hand = None
         visual_feedback = [] # Global visual feedback (like the white circle)
+        self.last_mask = 0
         
         # --- STEP 1: IDENTIFY TARGET HAND ---
         
@@ -61,19 +61,18 @@ class GestureInterpreter:
             # Actually, we update history live.
             
             for hand in hands_data:
-                label = hand['type']
-                lm_list = hand['lm_list']
+                label = hand.type
+                lm = hand.lm
                 
                 # Check posture
-                is_fist_now = self.is_fist(lm_list)
-                is_open_now = self.is_open_hand(lm_list)
+                is_fist_now = self.is_fist(lm)
+                is_open_now = self.is_open_hand(lm)
                 
                 was_fist_before = self.fist_history.get(label, False)
 
                 if is_fist_now:
                     # Found a fist! Show feedback (White Circle on Wrist)
-                    wrist = lm_list[0]
-                    visual_feedback.append(('CIRCLE_WHITE', (wrist[1], wrist[2])))
+                    visual_feedback.append(('CIRCLE_WHITE', (float(lm[0, 0]), float(lm[0, 1]))))
                     
                     # Update History: This hand IS a fist right now.
                     self.fist_history[label] = True
@@ -100,7 +99,7 @@ class GestureInterpreter:
             # LOCKED MODE: Only look for the specific hand
             found = False
             for hand in hands_data:
-                if hand['type'] == self.locked_hand_type:
+                if hand.type == self.locked_hand_type:
                     target_hand = hand
                     found = True
                     break
@@ -109,149 +108,87 @@ class GestureInterpreter:
                 pass
             else:
                 # Check for UNLOCK Gesture (Fist)
-                if self.is_fist(target_hand['lm_list']):
+                if self.is_fist(target_hand.lm):
                     # UNLOCKED
                     self.locked_hand_type = None
                     target_hand = None 
                     self.fist_history = {} # Reset
                     
                     # Show white circle feedback
-                    wrist = hand['lm_list'][0]
-                    visual_feedback.append(('CIRCLE_WHITE', (wrist[1], wrist[2])))
+                    wrist = hand.lm[0]
+                    visual_feedback.append(('CIRCLE_WHITE', (float(wrist[0]), float(wrist[1]))))
 
         # --- STEP 2: PROCESS GESTURES ON TARGET HAND ---
         if target_hand:
-            action, coords, v_list = self.get_gesture(target_hand['lm_list'])
+            action, coords, v_list = self.get_gesture(target_hand.norm)
             return action, coords, v_list, visual_feedback
         else:
             return "NONE", None, [], visual_feedback
 
-    def get_gesture(self, lm_list):
-        visual_states = []
-        if len(lm_list) < 21: return "NONE", None, []
-
-        fingers = []
-        tip_ids = [8, 12, 16, 20]
-        pip_ids = [6, 10, 14, 18]
-
-        for i in range(4):
-            if lm_list[tip_ids[i]][2] < lm_list[pip_ids[i]][2]:
-                fingers.append(True)
-            else:
-                fingers.append(False)
-
-        index_up, middle_up, ring_up, pinky_up = fingers
-
-        # Thumb Detection
-        x_tip, x_ip = lm_list[4][1], lm_list[3][1]
-        x_center = lm_list[9][1]
-        dist_tip_center = abs(x_tip - x_center)
-        dist_ip_center = abs(x_ip - x_center)
-        thumb_up = dist_tip_center > (dist_ip_center * config.STOP_THUMB_SENSITIVITY)
-
-        x_index, y_index = lm_list[8][1], lm_list[8][2]
-        x_pinky, y_pinky = lm_list[20][1], lm_list[20][2]
-        x_ring, y_ring = lm_list[16][1], lm_list[16][2]
-        
-        # STOP Logic (5 Fingers)
-        if index_up and middle_up and ring_up and pinky_up and thumb_up:
-            self.middle_finger_start_time = 0
-            self.is_dragging = False
-            self.rc_start_time = 0
-            self.rc_triggered = False
-            self.rc_needs_reset = False
-            visual_states.append((3, 0)) 
-            return "STOP", (x_index, y_index), visual_states
-
-        # Anatomical Assist
-        if pinky_up and not ring_up:
-             if lm_list[16][2] < lm_list[13][2]: ring_up = True
-
-        # Pinky Logic
-        if ring_up:
-            self.pinky_active = pinky_up
+    def reload_rules(self):
+        # Gesture timings changed (RIGHT_CLICK_DELAY, DRAG_ACTIVATION_TIME, ...): recompile the rules.
+        # Any gesture in progress starts over. Returns the action that ends a hold still in progress
+        # (DROP / CANCEL for a drag), for the caller to execute, or None.
+        release = self.machine.pending_release()
+        self.machine = gestures.GestureMachine(predict=self.predict)
+        return release
+
+    def finger_mask(self, lm, cfg):
+        # Raw finger states packed into one bitmask (see core/gestures.py), as batched array operations
+        ys = lm[:, 1]
+        mask = int(RULE_BITS @ (ys[RULE_TIPS] < ys[RULE_REFS])) # Tip above reference joint = Up
+        # Thumb Detection (tip and IP horizontal distance to the middle MCP)
+        dist_tip, dist_ip = np.abs(lm[THUMB_IDS, 0] - lm[9, 0]).tolist()
+        if dist_tip > dist_ip * cfg.STOP_THUMB_SENSITIVITY: mask |= gestures.THUMB
+        return mask
+
+    def update_sniper(self, lm, mask, cfg):
+        # Pinky (Sniper Mode) with a hysteresis filter, returns the SNIPER bit
+        if self.machine.ring_up[mask]:
+            self.pinky_active = bool(mask & gestures.PINKY)
         else:
-            x_wrist, y_wrist = lm_list[0][1], lm_list[0][2]
-            x_mid_mcp, y_mid_mcp = lm_list[9][1], lm_list[9][2]
-            palm_size = math.hypot(x_wrist - x_mid_mcp, y_wrist - y_mid_mcp)
+            # Palm size (wrist -> middle MCP) and pinky/ring tip separation in one batched op
+            diffs = lm[PINKY_PAIR_A, :2] - lm[PINKY_PAIR_B, :2]
+            palm_size, separation = np.hypot(diffs[:, 0], diffs[:, 1]).tolist()
             if palm_size == 0: palm_size = 1
-            separation = math.hypot(x_pinky - x_ring, y_pinky - y_ring)
             ratio = separation / palm_size
             if not self.pinky_active:
-                if ratio > config.PINKY_TRIGGER_RATIO: self.pinky_active = True
+                if ratio > cfg.PINKY_TRIGGER_RATIO: self.pinky_active = True
             else:
-                if ratio < config.PINKY_RELEASE_RATIO: self.pinky_active = False
-        is_sniper = self.pinky_active
-        
-        # Add visual feedback for Pinky (Sniper Mode)
-        if is_sniper:
-            visual_states.append((4, 20)) 
-        
-        # Right Click Logic
-        if index_up and ring_up:
-            self.middle_finger_start_time = 0
-            self.is_dragging = False
-            if self.rc_needs_reset:
-                visual_states.append((2, 16))
-                if middle_up: visual_states.append((2, 12))
-            else:
-                if self.rc_start_time == 0: self.rc_start_time = time.time()
-                elapsed = time.time() - self.rc_start_time
-                if elapsed > config.RIGHT_CLICK_DELAY:
-                    self.rc_triggered = True
-                    self.rc_needs_reset = True
-                    visual_states.append((2, 16))
-                    if middle_up: visual_states.append((2, 12))
-                    return "RIGHT_CLICK", (x_index, y_index), visual_states
-                else:
-                    visual_states.append((1, 16))
-                    if middle_up: visual_states.append((1, 12))
-        else:
-            self.rc_start_time = 0
-            self.rc_needs_reset = False
-            self.rc_triggered = False
-
-            # Drag Logic
-            drag_state_val = 0
-            if index_up and middle_up and not ring_up: 
-                if self.middle_finger_start_time == 0: self.middle_finger_start_time = time.time()
-                elapsed = time.time() - self.middle_finger_start_time
-                if elapsed > config.DRAG_ACTIVATION_TIME:
-                    self.is_dragging = True
-                    drag_state_val = 2 
-                else:
-                    drag_state_val = 1 
-            else:
-                self.middle_finger_start_time = 0
-                if self.is_dragging:
-                    self.is_dragging = False
-                    return "DROP", (x_index, y_index), []
-            if drag_state_val > 0:
-                 visual_states.append((drag_state_val, 12))
-
-        # Combined Action
-        if self.is_dragging:
-            if is_sniper: return "DRAG_PRECISION", (x_index, y_index), visual_states
-            else: return "DRAG", (x_index, y_index), visual_states
-
-        if index_up:
-            if is_sniper:
-                self.pinky_release_time = time.time()
-                action = "PRECISION" 
-                if not self.is_extended_prev:
-                    current_time = time.time()
-                    dt = current_time - self.last_pinky_time
-                    if dt < self.double_tap_timeout:
-                        action = "CLICK"
-                        self.last_pinky_time = 0 
-                    else:
-                        self.last_pinky_time = current_time
-                self.is_extended_prev = True
-                return action, (x_index, y_index), visual_states
-            else:
-                self.is_extended_prev = False
-                if time.time() - self.pinky_release_time < config.UNFREEZE_DELAY:
-                    return "FREEZE", (x_index, y_index), visual_states
-                return "MOVE", (x_index, y_index), visual_states
-
-        return "NONE", None, visual_states
+                if ratio < cfg.PINKY_RELEASE_RATIO: self.pinky_active = False
+        return gestures.SNIPER if self.pinky_active else 0
+
+    def pose_confidence(self, lm, now, cfg):
+        # How deliberate the current pose looks (0-1), from the finger trajectory over PREDICT_WINDOW:
+        # fingers that stopped moving and are clearly up or down score high; a hand passing through
+        # a pose on its way to another one (fingers still moving, or half bent) scores low.
+        palm = math.hypot(*(lm[0, :2] - lm[9, :2]).tolist()) or 1.0
+        ext = (lm[PIP_IDS, 1] - lm[TIP_IDS, 1]) / palm # Per finger, > 0 = up
+        trajectory = self.trajectory
+        trajectory.append((now, ext))
+        while now - trajectory[0][0] > cfg.PREDICT_WINDOW:
+            trajectory.popleft()
+        t0, ext0 = trajectory[0]
+        if now <= t0:
+            return 0.0 # No history yet
+        speed = float(np.abs(ext - ext0).max()) / (now - t0)
+        margin = float(np.abs(ext).min())
+        return min(margin / cfg.PREDICT_MARGIN, 1.0) / (1.0 + speed / cfg.PREDICT_SETTLE_SPEED)
+
+    def get_gesture(self, lm):
+        # lm: normalized landmarks (HandInfo.norm). The rules only compare positions and ratios, so they
+        # behave the same at any capture resolution; coords come out in REFERENCE_WIDTH pixels.
+        if lm.shape[0] < 21: return "NONE", None, []
+        now = self.clock() # One timestamp for every rule this frame
+        cfg = settings.current # One configuration for every rule this frame
+
+        mask = self.finger_mask(lm, cfg)
+        if not self.machine.stop[mask]: # STOP leaves the pinky filter untouched
+            mask |= self.update_sniper(lm, mask, cfg)
+        self.last_mask = mask
+        confidence = self.pose_confidence(lm, now, cfg) if self.machine.predict else 0.0
+        action, visual_states = self.machine.step(mask, now, confidence)
+        if action is None:
+            return "NONE", None, visual_states
+        x, y = lm[8, :2].tolist()
+        return action, (x * cfg.REFERENCE_WIDTH, y * cfg.REFERENCE_WIDTH), visual_states
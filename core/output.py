@@ -0,0 +1,193 @@
+import os
+import time
+
+# Optional backends: each one is only available if its library imports
+try:
+    from Xlib import X
+    from Xlib import display as xdisplay
+    from Xlib.ext import xtest
+except ImportError:
+    xdisplay = None
+
+try:
+    from evdev import UInput, ecodes
+except ImportError:
+    UInput = None
+
+def load_pyautogui():
+    # Deferred import: pyautogui is slow to import and only the fallback backend needs it
+    try:
+        import pyautogui
+    except Exception: # ImportError, or no display on a headless box
+        return None
+    return pyautogui
+
+# Output backends: the minimal set of primitives CursorController needs.
+#   move_relative(dx, dy) -> integer pixels
+#   move_to(x, y)         -> absolute pixels
+#   button(name, down)    -> name is 'left' or 'right'
+#   size()                -> (screen_w, screen_h)
+
+class PyAutoGUIBackend:
+    # Portable fallback (Windows / macOS / X11). Every call goes through pyautogui's checks.
+    def __init__(self):
+        self.gui = load_pyautogui()
+        if self.gui is None:
+            raise RuntimeError("pyautogui is not available")
+        self.gui.FAILSAFE = False # Allow reaching corners without crashing
+        self.gui.PAUSE = 0       # CRITICAL: Remove 0.1s delay for smooth real-time control
+
+    def size(self):
+        return self.gui.size()
+
+    def move_relative(self, dx, dy):
+        self.gui.move(dx, dy)
+
+    def move_to(self, x, y):
+        self.gui.moveTo(x, y)
+
+    def button(self, name, down):
+        if down: self.gui.mouseDown(button=name)
+        else: self.gui.mouseUp(button=name)
+
+    def close(self):
+        pass
+
+
+class XTestBackend:
+    # Linux/X11 fast path: XTest fake input through python-xlib, one flush per call, no position query
+    BUTTONS = {'left': 1, 'right': 3}
+
+    def __init__(self):
+        if xdisplay is None:
+            raise RuntimeError("python-xlib is not installed")
+        self.display = xdisplay.Display()
+        if not self.display.has_extension('XTEST'):
+            raise RuntimeError("X server has no XTEST extension")
+        self.screen = self.display.screen()
+
+    def size(self):
+        return self.screen.width_in_pixels, self.screen.height_in_pixels
+
+    def move_relative(self, dx, dy):
+        xtest.fake_input(self.display, X.MotionNotify, detail=True, x=dx, y=dy) # detail=True: relative
+        self.display.flush()
+
+    def move_to(self, x, y):
+        xtest.fake_input(self.display, X.MotionNotify, x=int(x), y=int(y))
+        self.display.flush()
+
+    def button(self, name, down):
+        xtest.fake_input(self.display, X.ButtonPress if down else X.ButtonRelease, self.BUTTONS[name])
+        self.display.flush()
+
+    def close(self):
+        self.display.close()
+
+
+class UInputBackend:
+    # Linux kernel fast path: a virtual relative mouse through /dev/uinput (works on X11 and Wayland).
+    # Needs write access to /dev/uinput. Note that the desktop applies its pointer acceleration to it.
+    # Absolute moves are relative moves from a tracked position: the device cannot read the pointer,
+    # so the first one homes it to the top-left corner (a move larger than the screen, clamped there).
+    # With pointer acceleration on, the tracked position is approximate.
+    BUTTONS = {'left': 'BTN_LEFT', 'right': 'BTN_RIGHT'}
+
+    def __init__(self):
+        if UInput is None:
+            raise RuntimeError("python-evdev is not installed")
+        self.ui = UInput({
+            ecodes.EV_REL: [ecodes.REL_X, ecodes.REL_Y],
+            ecodes.EV_KEY: [ecodes.BTN_LEFT, ecodes.BTN_RIGHT],
+        }, name='touchless-mouse')
+        self.screen = None
+        self.pos = None # Tracked pointer position, None until the first move_to()
+
+    def size(self):
+        # uinput has no notion of the screen; ask the display server if we can
+        if self.screen is None:
+            self.screen = 1920, 1080
+            if xdisplay is not None and os.environ.get('DISPLAY'):
+                screen = xdisplay.Display().screen()
+                self.screen = screen.width_in_pixels, screen.height_in_pixels
+            else:
+                gui = load_pyautogui()
+                if gui is not None:
+                    self.screen = tuple(gui.size())
+        return self.screen
+
+    def _write_rel(self, dx, dy):
+        if dx: self.ui.write(ecodes.EV_REL, ecodes.REL_X, dx)
+        if dy: self.ui.write(ecodes.EV_REL, ecodes.REL_Y, dy)
+        self.ui.syn()
+
+    def move_relative(self, dx, dy):
+        self._write_rel(dx, dy)
+        if self.pos is not None:
+            w, h = self.size()
+            self.pos = (min(max(self.pos[0] + dx, 0), w - 1), min(max(self.pos[1] + dy, 0), h - 1))
+
+    def move_to(self, x, y):
+        w, h = self.size()
+        if self.pos is None:
+            self._write_rel(-2 * w, -2 * h)
+            self.pos = (0, 0)
+        self.move_relative(int(round(x)) - self.pos[0], int(round(y)) - self.pos[1])
+
+    def button(self, name, down):
+        self.ui.write(ecodes.EV_KEY, getattr(ecodes, self.BUTTONS[name]), 1 if down else 0)
+        self.ui.syn()
+
+    def close(self):
+        self.ui.close()
+
+
+class NullBackend:
+    # Sends nothing. Used for benchmarks / replay; with record=True it keeps (time, kind, args) per event.
+    def __init__(self, clock=time.perf_counter, record=False):
+        self.clock = clock
+        self.record = record
+        self.events = []
+        self.count = 0
+
+    def size(self):
+        return 1920, 1080
+
+    def _log(self, kind, args):
+        self.count += 1
+        if self.record: self.events.append((self.clock(), kind, args))
+
+    def move_relative(self, dx, dy):
+        self._log('move_relative', (dx, dy))
+
+    def move_to(self, x, y):
+        self._log('move_to', (x, y))
+
+    def button(self, name, down):
+        self._log('button', (name, down))
+
+    def close(self):
+        pass
+
+
+BACKENDS = {
+    'pyautogui': PyAutoGUIBackend,
+    'xtest': XTestBackend,
+    'uinput': UInputBackend,
+    'null': NullBackend,
+}
+
+def create_backend(name):
+    # 'auto' = fastest backend that works here: XTest on X11, then uinput, then pyautogui
+    if name != 'auto':
+        return BACKENDS[name]()
+    candidates = []
+    if os.environ.get('DISPLAY'): candidates.append(XTestBackend)
+    if os.access('/dev/uinput', os.W_OK): candidates.append(UInputBackend)
+    candidates.append(PyAutoGUIBackend)
+    for backend in candidates:
+        try:
+            return backend()
+        except Exception as e:
+            print(f"Output backend {backend.__name__} unavailable: {e}")
+    raise RuntimeError("No output backend available")
@@ -0,0 +1,185 @@
+import cv2
+import time
+import numpy as np
+import config
+from threading import Event
+from core.detector import HandInfo
+from core.pipeline import LatestQueue
+from utils.metrics import metrics
+
+# Stage timings shown on the overlay, in pipeline order
+OVERLAY_STAGES = ('capture', 'color_convert', 'inference', 'landmarks', 'interpret', 'smoothing', 'output')
+
+class DisplayBuffer:
+    # Reused destination for the mirrored debug view: camera frames stay raw, pixels are only flipped here
+    def __init__(self):
+        self.buf = None
+
+    def mirror(self, frame):
+        if self.buf is None or self.buf.shape != frame.shape:
+            self.buf = np.empty_like(frame)
+        return cv2.flip(frame, 1, dst=self.buf)
+
+def _pt(lm, i):
+    # Landmark i as an integer pixel point for OpenCV drawing
+    return int(lm[i, 0]), int(lm[i, 1])
+
+def draw_feedback(frame, hands_data, locked_hand_type, action, coords, visual_list, extra_feedback):
+    # Global Feedback (Small White Circle)
+    for fb_type, fb_coords in extra_feedback:
+        if fb_type == 'CIRCLE_WHITE':
+            cv2.circle(frame, (int(fb_coords[0]), int(fb_coords[1])), 8, (255, 255, 255), cv2.FILLED)
+            cv2.circle(frame, (int(fb_coords[0]), int(fb_coords[1])), 10, (0, 0, 0), 2)
+
+    # Active Hand Feedback
+    if locked_hand_type:
+        active_hand = next((h for h in hands_data if h.type == locked_hand_type), None)
+        if active_hand:
+            lm = active_hand.lm
+            # Index (Green)
+            cv2.circle(frame, _pt(lm, 8), 8, (0, 255, 0), cv2.FILLED)
+            # Gestures
+            for v_state, v_id in visual_list:
+                color = (0, 165, 255) if v_state == 1 else (255, 255, 0) # Orange vs Cyan
+                if v_state == 3: # STOP
+                    for fid in [8, 12, 16, 20]: cv2.circle(frame, _pt(lm, fid), 8, (0, 0, 255), cv2.FILLED)
+                elif v_state == 4: # Sniper
+                    cv2.circle(frame, _pt(lm, v_id), 8, (0, 0, 255), cv2.FILLED)
+                elif v_state > 0:
+                    cv2.circle(frame, _pt(lm, v_id), 8, color, cv2.FILLED)
+            # Action Pops (at the index tip: action coords are in REFERENCE_WIDTH pixels, not display pixels)
+            if action == "CLICK": cv2.circle(frame, _pt(lm, 8), 8, (0, 255, 0), cv2.FILLED)
+            elif action == "RIGHT_CLICK": cv2.circle(frame, _pt(lm, 8), 12, (255, 255, 0), cv2.FILLED)
+
+def draw_stats(frame, fps, latency_ms):
+    # FPS (Minimal)
+    cv2.putText(frame, f'FPS: {int(fps)}', (20, 50), cv2.FONT_HERSHEY_PLAIN, 3, (255, 0, 0), 3)
+    cv2.putText(frame, f'LAT: {int(latency_ms)}ms', (20, 90), cv2.FONT_HERSHEY_PLAIN, 2, (255, 0, 0), 2)
+
+def draw_latency_graph(frame, samples_ms, budget_ms, origin, size):
+    # Rolling camera -> cursor latency, newest on the right, with the frame budget as a reference line
+    x0, y0 = origin
+    gw, gh = size
+    cv2.rectangle(frame, (x0, y0), (x0 + gw, y0 + gh), (0, 0, 0), cv2.FILLED)
+    if len(samples_ms) < 2: return
+    top = max(budget_ms * 2, float(samples_ms.max()))
+    ys = (y0 + gh - np.minimum(samples_ms / top, 1.0) * gh).astype(np.int32)
+    xs = (x0 + np.arange(len(samples_ms)) * gw / (config.OVERLAY_GRAPH_SAMPLES - 1)).astype(np.int32)
+    by = int(y0 + gh - budget_ms / top * gh)
+    cv2.line(frame, (x0, by), (x0 + gw, by), (0, 165, 255), 1)
+    cv2.polylines(frame, [np.stack([xs, ys], axis=1)], False, (0, 255, 0), 1)
+    cv2.putText(frame, f'{samples_ms[-1]:.0f}/{top:.0f} ms', (x0 + 4, y0 + 12), cv2.FONT_HERSHEY_PLAIN, 0.9, (255, 255, 255), 1)
+
+def draw_stage_bars(frame, stages_ms, origin, width, row_h=12):
+    # p50 per pipeline stage as horizontal bars, scaled to the slowest stage
+    x0, y0 = origin
+    top = max(max(stages_ms.values()), 1e-3)
+    cv2.rectangle(frame, (x0, y0), (x0 + width, y0 + len(stages_ms) * row_h), (0, 0, 0), cv2.FILLED)
+    for i, (name, ms) in enumerate(stages_ms.items()):
+        y = y0 + i * row_h
+        cv2.rectangle(frame, (x0, y), (x0 + int(ms / top * width), y + row_h - 3), (128, 64, 0), cv2.FILLED)
+        cv2.putText(frame, f'{name} {ms:.2f}', (x0 + 2, y + row_h - 4), cv2.FONT_HERSHEY_PLAIN, 0.8, (255, 255, 255), 1)
+
+
+class OverlaySnapshot:
+    # Everything the overlay needs for one frame, owned by the snapshot (no views into the camera ring
+    # or the landmark pool) and already in display coordinates. Never modified after submit().
+    __slots__ = ('image', 'hands_data', 'locked_hand_type', 'action', 'coords', 'visual_list', 'extra_feedback', 'latency_ms')
+
+    def __init__(self, image, hands_data, locked_hand_type, action, coords, visual_list, extra_feedback, latency_ms):
+        self.image = image # Downscaled, still unmirrored (flipped on the overlay thread)
+        self.hands_data = hands_data
+        self.locked_hand_type = locked_hand_type
+        self.action = action
+        self.coords = coords
+        self.visual_list = visual_list
+        self.extra_feedback = extra_feedback
+        self.latency_ms = latency_ms
+
+
+class OverlayRenderer:
+    # Debug window, decoupled from tracking.
+    # The tracking path only calls submit(): at most OVERLAY_RATE_HZ times per second it takes a
+    # DISPLAY_WIDTH x DISPLAY_HEIGHT copy of the frame plus scaled copies of the landmarks, and drops the
+    # snapshot in a latest-wins slot. Other frames cost one clock read.
+    # run() draws and shows snapshots; HighGUI must stay on one thread, so it runs on the main thread.
+    def __init__(self, window_name, rate_hz=None):
+        self.window_name = window_name
+        self.rate_hz = rate_hz or config.OVERLAY_RATE_HZ
+        self.size = (config.DISPLAY_WIDTH, config.DISPLAY_HEIGHT)
+        self.queue = LatestQueue()
+        self.display_buf = DisplayBuffer()
+        self.quit = Event() # Set when the user presses 'q'
+        self.next_submit = 0.0
+
+        # Tracking rate, counted in submit()
+        self.frames = 0
+        self.rate_frames = 0
+        self.rate_time = time.perf_counter()
+        self.fps = 0.0
+        self.rendered = 0
+
+    def open(self):
+        cv2.namedWindow(self.window_name, cv2.WINDOW_NORMAL)
+        cv2.resizeWindow(self.window_name, *self.size)
+
+    # --- TRACKING SIDE ---
+    def submit(self, frame, hands_data, locked_hand_type, action, coords, visual_list, extra_feedback, latency_ms):
+        self.frames += 1
+        now = time.perf_counter()
+        if now < self.next_submit: return
+        self.next_submit = now + 1.0 / self.rate_hz
+
+        t0 = now
+        h, w = frame.shape[:2]
+        sx, sy = self.size[0] / w, self.size[1] / h
+        image = cv2.resize(frame, self.size, interpolation=cv2.INTER_NEAREST)
+        scale = np.array([sx, sy, 1.0], dtype=np.float32)
+        hands = [HandInfo(hand.type, hand.score, hand.lm * scale,
+                          (int(hand.bbox[0] * sx), int(hand.bbox[1] * sy), int(hand.bbox[2] * sx), int(hand.bbox[3] * sy)))
+                 for hand in hands_data]
+        feedback = [(kind, (x * sx, y * sy)) for kind, (x, y) in extra_feedback]
+        self.queue.put(OverlaySnapshot(image, hands, locked_hand_type, action, coords, list(visual_list), feedback, latency_ms))
+        metrics.observe('overlay_submit', time.perf_counter() - t0)
+
+    # --- OVERLAY THREAD ---
+    def render(self, snap):
+        display = self.display_buf.mirror(snap.image)
+        draw_feedback(display, snap.hands_data, snap.locked_hand_type, snap.action, snap.coords,
+                      snap.visual_list, snap.extra_feedback)
+
+        now = time.perf_counter()
+        if now - self.rate_time >= 0.5:
+            self.fps = (self.frames - self.rate_frames) / (now - self.rate_time)
+            self.rate_frames, self.rate_time = self.frames, now
+        draw_stats(display, self.fps, snap.latency_ms)
+
+        if config.OVERLAY_GRAPHS:
+            dw, dh = self.size
+            hist = metrics.histograms.get('camera_to_cursor')
+            if hist is not None:
+                draw_latency_graph(display, hist.recent(config.OVERLAY_GRAPH_SAMPLES) * 1000, 1000 / config.FPS_TARGET,
+                                   (10, dh - 70), (dw // 2 - 20, 60))
+            stages = {name: float(np.median(metrics.histograms[name].recent(config.OVERLAY_GRAPH_SAMPLES))) * 1000
+                      for name in OVERLAY_STAGES if name in metrics.histograms}
+            if stages:
+                draw_stage_bars(display, stages, (dw // 2 + 10, dh - 10 - 12 * len(stages)), dw // 2 - 20)
+
+        cv2.imshow(self.window_name, display)
+        self.rendered += 1
+
+    def run(self, should_stop):
+        # Blocks until 'q' is pressed or should_stop() returns True
+        period = 1.0 / self.rate_hz
+        while not self.quit.is_set() and not should_stop():
+            snap = self.queue.get(timeout=period)
+            if snap is not None:
+                with metrics.time('overlay_render'):
+                    self.render(snap)
+            if cv2.waitKey(1) & 0xFF == ord('q'): # Also keeps the window responsive between snapshots
+                self.quit.set()
+
+    def close(self):
+        self.quit.set()
+        self.queue.close()
+        cv2.destroyWindow(self.window_name)
@@ -0,0 +1,97 @@
+import time
+from threading import Thread, Condition
+
+class LatestQueue:
+    # Single-slot, latest-wins queue: put() replaces stale work instead of building a backlog
+    def __init__(self):
+        self.cond = Condition()
+        self.item = None
+        self.has_item = False
+        self.closed = False
+        self.dropped = 0 # Items overwritten before a consumer picked them up
+
+    def put(self, item):
+        with self.cond:
+            if self.has_item:
+                self.dropped += 1
+            self.item = item
+            self.has_item = True
+            self.cond.notify()
+
+    def get(self, timeout=None):
+        # Returns the newest item, or None on timeout / close
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.has_item or self.closed, timeout):
+                return None
+            if not self.has_item:
+                return None
+            item = self.item
+            self.item = None
+            self.has_item = False
+            return item
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+class Stage:
+    # One pipeline step: pull from `source`, run `func`, push the result to `sink`.
+    # `source` is any callable taking a timeout and returning an item or None (e.g. LatestQueue.get).
+    # `func` returning None means "nothing to pass downstream".
+    def __init__(self, name, func, source, sink=None, poll_timeout=0.5):
+        self.name = name
+        self.func = func
+        self.source = source
+        self.sink = sink
+        self.poll_timeout = poll_timeout
+        self.stopped = False
+        self.thread = None
+
+        # Stats
+        self.processed = 0
+        self.wait_time = 0.0 # Seconds spent blocked on the source
+        self.busy_time = 0.0 # Seconds spent inside func
+        self.start_time = None
+
+    def start(self):
+        self.thread = Thread(target=self.run, name=self.name, daemon=True)
+        self.thread.start()
+        return self
+
+    def run(self):
+        self.start_time = time.perf_counter()
+        while not self.stopped:
+            t0 = time.perf_counter()
+            item = self.source(self.poll_timeout)
+            t1 = time.perf_counter()
+            self.wait_time += t1 - t0
+            if item is None:
+                continue
+            result = self.func(item)
+            t2 = time.perf_counter()
+
+            self.busy_time += t2 - t1
+            self.processed += 1
+            if result is not None and self.sink is not None:
+                self.sink.put(result)
+
+    def stop(self):
+        self.stopped = True
+
+    def join(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def get_stats(self):
+        elapsed = time.perf_counter() - self.start_time if self.start_time else 0
+        n = max(self.processed, 1)
+        return {
+            'name': self.name,
+            'processed': self.processed,
+            'fps': self.processed / elapsed if elapsed > 0 else 0.0,
+            'avg_wait_ms': self.wait_time / n * 1000,
+            'avg_busy_ms': self.busy_time / n * 1000,
+            'dropped_out': self.sink.dropped if isinstance(self.sink, LatestQueue) else 0,
+        }
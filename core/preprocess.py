@@ -0,0 +1,103 @@
+import math
+import time
+import cv2
+import numpy as np
+from core.detector import LANDMARK_POOL_SIZE
+from utils.live_config import settings
+from utils.metrics import metrics
+
+class FramePreprocessor:
+    # Runs between the camera and the detector, on the raw frame:
+    # 1. Change gate: while no hand is locked, a frame that barely differs from the last frame that
+    #    went to the detector skips inference. The comparison runs on a tiny grayscale copy
+    #    (PREPROCESS_GATE_SIZE), which also gives the scene luminance for free.
+    #    At least every PREPROCESS_MAX_SKIP-th frame still runs, so a hand that arrives slowly is found.
+    # 2. Low-light enhancement: only when that luminance is below PREPROCESS_LOW_LIGHT, gamma (LUT,
+    #    cheap) or CLAHE on the luma channel (stronger, a few ms). The result goes to the detector and
+    #    the overlay; enhanced frames are written to a small ring of buffers, the camera ring stays raw.
+    # Each step is timed (metrics 'preprocess_gate' / 'preprocess_enhance'), see get_stats().
+    def __init__(self):
+        self.reference = None # Small gray copy of the last frame that went to the detector
+        self.small = None
+        self.skipped_run = 0
+        self.luminance = None # EMA of the small copy's mean (0-255)
+        self.luts = {}        # gamma (rounded) -> LUT
+        self.clahe = None
+        self.buffers = [None] * LANDMARK_POOL_SIZE # Same lifetime as the landmark views in flight
+        self.buf_idx = 0
+
+        # Stats
+        self.frames = 0
+        self.gated = 0
+        self.enhanced = 0
+        self.gate_time = 0.0
+        self.enhance_time = 0.0
+
+    def process(self, frame, locked):
+        # Returns the frame for the detector, or None to skip inference on this one
+        cfg = settings.current
+        t0 = time.perf_counter()
+        self.frames += 1
+        self.small = cv2.cvtColor(cv2.resize(frame, cfg.PREPROCESS_GATE_SIZE, interpolation=cv2.INTER_AREA),
+                                  cv2.COLOR_BGR2GRAY, dst=self.small)
+        mean = float(self.small.mean())
+        self.luminance = mean if self.luminance is None else self.luminance + 0.1 * (mean - self.luminance)
+
+        if (cfg.PREPROCESS_GATE and not locked and self.skipped_run < cfg.PREPROCESS_MAX_SKIP
+                and self.reference is not None and self.reference.shape == self.small.shape):
+            changed = np.count_nonzero(cv2.absdiff(self.small, self.reference) > cfg.PREPROCESS_MOTION_PIXEL)
+            if changed < cfg.PREPROCESS_MOTION_AREA * self.small.size:
+                self.skipped_run += 1
+                self.gated += 1
+                metrics.inc('frames_gated')
+                t1 = time.perf_counter()
+                self.gate_time += t1 - t0
+                metrics.observe('preprocess_gate', t1 - t0)
+                return None
+        self.skipped_run = 0
+        self.small, self.reference = self.reference, self.small # Keep this one, reuse the old buffer next frame
+        t1 = time.perf_counter()
+        self.gate_time += t1 - t0
+        metrics.observe('preprocess_gate', t1 - t0)
+
+        if cfg.PREPROCESS_ENHANCE and self.luminance < cfg.PREPROCESS_LOW_LIGHT:
+            frame = self.enhance(frame, cfg)
+            t2 = time.perf_counter()
+            self.enhanced += 1
+            self.enhance_time += t2 - t1
+            metrics.observe('preprocess_enhance', t2 - t1)
+        return frame
+
+    def enhance(self, frame, cfg):
+        buf = self.buffers[self.buf_idx]
+        if buf is None or buf.shape != frame.shape:
+            buf = self.buffers[self.buf_idx] = np.empty_like(frame)
+        self.buf_idx = (self.buf_idx + 1) % len(self.buffers)
+
+        if cfg.PREPROCESS_ENHANCE == 'clahe':
+            if self.clahe is None or self.clahe.getClipLimit() != cfg.PREPROCESS_CLAHE_CLIP:
+                self.clahe = cv2.createCLAHE(clipLimit=cfg.PREPROCESS_CLAHE_CLIP, tileGridSize=(8, 8))
+            cv2.cvtColor(frame, cv2.COLOR_BGR2YCrCb, dst=buf)
+            luma = cv2.extractChannel(buf, 0)
+            cv2.insertChannel(self.clahe.apply(luma), buf, 0)
+            return cv2.cvtColor(buf, cv2.COLOR_YCrCb2BGR, dst=buf)
+
+        # Gamma that maps the measured luminance to PREPROCESS_TARGET_LIGHT, in 0.05 steps so the
+        # LUT (and the image, which optical flow compares frame to frame) only changes when the light does
+        lum = max(self.luminance, 1.0) / 255
+        gamma = round(math.log(cfg.PREPROCESS_TARGET_LIGHT / 255) / math.log(lum) / 0.05) * 0.05
+        gamma = min(max(gamma, 0.2), 1.0)
+        lut = self.luts.get(gamma)
+        if lut is None:
+            lut = self.luts[gamma] = (np.linspace(0, 1, 256) ** gamma * 255).round().astype(np.uint8)
+        return cv2.LUT(frame, lut, dst=buf)
+
+    def get_stats(self):
+        return {
+            'frames': self.frames,
+            'gated': self.gated,
+            'enhanced': self.enhanced,
+            'gate_ms': self.gate_time / max(self.frames, 1) * 1000,
+            'enhance_ms': self.enhance_time / max(self.enhanced, 1) * 1000,
+            'luminance': self.luminance or 0.0,
+        }
@@ -0,0 +1,260 @@
+import time
+import queue
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+import config
+from core.camera import CameraStream
+from core.detector import HandDetector, HandInfo, normalize_landmarks
+from core.interpreter import GestureInterpreter
+from core.preprocess import FramePreprocessor
+from utils.live_config import settings, CONFIG_NAMES, RESTART_KEYS
+from utils.metrics import metrics
+from utils.recording import HAND_LABELS
+
+# Live settings read on the capture / detection side. Workers are separate processes with their own
+# settings, so the manager forwards changes to these (SessionManager.forward_config)
+WORKER_KEYS = tuple(name for name in CONFIG_NAMES if name not in RESTART_KEYS and (
+    name.startswith(('ROI_', 'FLOW_', 'PREPROCESS_')) or name in (
+        'FRAME_WIDTH', 'FRAME_HEIGHT', 'MODEL_COMPLEXITY', 'MAX_HANDS', 'MIN_DETECTION_CONFIDENCE',
+        'MIN_TRACKING_CONFIDENCE', 'REFERENCE_WIDTH')))
+
+class SessionBlock:
+    # Per-camera shared memory block: the worker publishes landmarks, the manager reads them.
+    # Guarded by a sequence lock (seq is odd while the worker is writing), so nothing blocks.
+    # Layout (fixed, max_hands slots):
+    #   seq int64 | frame_id int64 | timestamp float64 | n_hands int32 | lock int32 (manager -> worker)
+    #   frame_size int32[2] (h, w) | labels int8[H] | scores float32[H] | bbox int32[H, 4] | lm float32[H, 21, 3]
+    def __init__(self, max_hands, name=None):
+        self.max_hands = max_hands
+        fields = [
+            ('seq', np.int64, (1,)), ('frame_id', np.int64, (1,)), ('timestamp', np.float64, (1,)),
+            ('n_hands', np.int32, (1,)), ('lock', np.int32, (1,)), ('frame_size', np.int32, (2,)),
+            ('labels', np.int8, (max_hands,)), ('scores', np.float32, (max_hands,)),
+            ('bbox', np.int32, (max_hands, 4)), ('lm', np.float32, (max_hands, 21, 3)),
+        ]
+        offsets, size = [], 0
+        for _, dtype, shape in fields:
+            size = -(-size // np.dtype(dtype).itemsize) * np.dtype(dtype).itemsize # Align
+            offsets.append(size)
+            size += int(np.prod(shape)) * np.dtype(dtype).itemsize
+
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            # Spawned workers share the manager's resource tracker, so attaching does not double-register
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.name = self.shm.name
+        for (field, dtype, shape), offset in zip(fields, offsets):
+            setattr(self, field, np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset))
+        if self.owner:
+            self.seq[0] = 0
+            self.lock[0] = 0
+
+    # --- WORKER SIDE ---
+    def write(self, frame_id, timestamp, hands_data, frame_size):
+        n = min(len(hands_data), self.max_hands)
+        self.seq[0] += 1 # Odd: write in progress
+        self.frame_id[0] = frame_id
+        self.timestamp[0] = timestamp
+        self.n_hands[0] = n
+        self.frame_size[:] = frame_size[:2]
+        for i, hand in enumerate(hands_data[:n]):
+            self.labels[i] = HAND_LABELS.index(hand.type)
+            self.scores[i] = hand.score
+            self.bbox[i] = hand.bbox
+            self.lm[i] = hand.lm
+        self.seq[0] += 1 # Even: consistent
+
+    def read_lock(self):
+        lock = int(self.lock[0])
+        return HAND_LABELS[lock - 1] if lock else None
+
+    # --- MANAGER SIDE ---
+    def set_lock(self, locked_hand_type):
+        self.lock[0] = HAND_LABELS.index(locked_hand_type) + 1 if locked_hand_type else 0
+
+    def read(self, last_seq):
+        # Returns (seq, frame_id, timestamp, frame_size, hands_data) if newer than last_seq, else None
+        while True:
+            seq = int(self.seq[0])
+            if seq == last_seq:
+                return None
+            if seq % 2:
+                continue # Writer is mid-update; it only takes microseconds
+            frame_id, timestamp, n = int(self.frame_id[0]), float(self.timestamp[0]), int(self.n_hands[0])
+            frame_size = (int(self.frame_size[0]), int(self.frame_size[1]))
+            labels, scores = self.labels[:n].copy(), self.scores[:n].copy()
+            bbox, lm = self.bbox[:n].copy(), self.lm[:n].copy()
+            if int(self.seq[0]) == seq:
+                break
+        norm = normalize_landmarks(lm, frame_size[1])
+        hands_data = [HandInfo(HAND_LABELS[labels[i]], float(scores[i]), lm[i], tuple(int(v) for v in bbox[i]), norm[i])
+                      for i in range(n)]
+        return seq, frame_id, timestamp, frame_size, hands_data
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def session_worker(camera_index, shm_name, max_hands, notify, stop, config_q):
+    # Runs in its own process: capture + detection for one camera
+    camera = CameraStream(camera_index).start()
+    detector = HandDetector()
+    preprocess = FramePreprocessor() if config.PREPROCESS_ENABLED else None
+    block = SessionBlock(max_hands, shm_name)
+    last_lock_state = None
+    # Same handlers as main.register_reload_handlers() for the camera and detector (no governor here)
+    settings.on_change(('FRAME_WIDTH', 'FRAME_HEIGHT'), lambda cfg: camera.set_resolution(cfg.FRAME_WIDTH, cfg.FRAME_HEIGHT))
+    settings.on_change(('MODEL_COMPLEXITY',), lambda cfg: detector.set_model_complexity(cfg.MODEL_COMPLEXITY))
+    settings.on_change(('MAX_HANDS', 'MIN_DETECTION_CONFIDENCE', 'MIN_TRACKING_CONFIDENCE', 'ROI_TRACKING'),
+                       lambda cfg: detector.reset_graphs())
+    try:
+        while not stop.is_set():
+            changes = {}
+            try:
+                while True: changes.update(config_q.get_nowait()) # Live config forwarded by the manager
+            except queue.Empty:
+                pass
+            if changes and settings.update(changes, source=f"camera {camera_index}")[0]:
+                settings.apply_pending()
+            frame_id, frame_ts, frame = camera.read_next(timeout=config.FRAME_WAIT_TIMEOUT)
+            if frame is None:
+                if camera.stopped: break
+                continue
+            current_lock = block.read_lock()
+            if current_lock != last_lock_state:
+                detector.set_max_hands(2 if current_lock is None else 1)
+                last_lock_state = current_lock
+            if preprocess:
+                frame = preprocess.process(frame, current_lock is not None)
+                if frame is None: continue
+            frame = detector.find_hands(frame)
+            block.write(frame_id, frame_ts, detector.get_hands_info(frame), frame.shape)
+            notify.release()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        camera.release()
+        detector.close()
+        block.close()
+
+
+class Session:
+    # Manager-side state for one camera: its worker process, shared block and its own interpreter
+    def __init__(self, index, camera_index, ctx, notify, stop):
+        self.index = index
+        self.camera_index = camera_index
+        self.max_hands = max(config.MAX_HANDS, 1)
+        self.block = SessionBlock(self.max_hands)
+        self.interpreter = GestureInterpreter()
+        self.config_q = ctx.Queue() # Manager -> worker live config changes (WORKER_KEYS)
+        self.process = ctx.Process(target=session_worker, name=f"camera-{camera_index}",
+                                   args=(camera_index, self.block.name, self.max_hands, notify, stop, self.config_q),
+                                   daemon=True)
+        self.last_seq = 0
+        self.frames = 0
+        self.start_time = None
+
+
+class SessionManager:
+    # One capture+detection worker process per camera (no GIL contention between cameras, MediaPipe
+    # graphs isolated per process). Landmarks come back through shared memory; interpretation stays
+    # here, one GestureInterpreter per camera. Only the session that owns the cursor drives it:
+    #   'first_lock':  the first session to lock a hand keeps the cursor until it unlocks
+    #                  or its hand is gone for SESSION_OWNER_TIMEOUT seconds
+    #   'latest_lock': a session that newly locks a hand takes the cursor over
+    def __init__(self, camera_indices, executor, policy=None, action_log=None, publisher=None):
+        ctx = mp.get_context('spawn') # Workers must not inherit the parent's threads / graphs
+        self.notify = ctx.Semaphore(0)
+        self.stop_event = ctx.Event()
+        self.sessions = [Session(i, cam, ctx, self.notify, self.stop_event) for i, cam in enumerate(camera_indices)]
+        self.executor = executor
+        self.action_log = action_log
+        self.publisher = publisher # Every session's frames, tagged with its camera (not just the cursor owner's)
+        self.policy = policy or config.SESSION_CURSOR_POLICY
+        self.owner = None
+        self.owner_seen = 0.0
+
+    def start(self):
+        for s in self.sessions:
+            s.process.start()
+            s.start_time = time.perf_counter()
+        self.forward_config(settings.current) # Workers load config.py: catch them up on earlier live updates
+        return self
+
+    def forward_config(self, cfg):
+        # Live config handler for WORKER_KEYS: workers only apply the values that differ from theirs
+        changes = {name: getattr(cfg, name) for name in WORKER_KEYS}
+        for s in self.sessions:
+            s.config_q.put(changes)
+
+    def set_owner(self, owner):
+        if owner == self.owner: return
+        # Release anything the previous owner was holding and re-anchor relative movement
+        self.executor.controller.stop_drag()
+        self.executor.execute("NONE", None)
+        self.owner = owner
+        self.owner_seen = time.perf_counter()
+        print(f"Cursor owner: {'none' if owner is None else f'camera {self.sessions[owner].camera_index}'}")
+
+    def handle(self, s, frame_id, frame_ts, frame_size, hands_data):
+        was_locked = s.interpreter.locked_hand_type is not None
+        with metrics.time('interpret'):
+            action, coords, visual_list, extra_feedback = s.interpreter.process_hands(hands_data)
+        locked = s.interpreter.locked_hand_type is not None
+        s.block.set_lock(s.interpreter.locked_hand_type)
+        if self.action_log:
+            self.action_log.append(frame_ts, frame_id, action, coords, s.interpreter.locked_hand_type,
+                                   s.interpreter.last_mask, time.perf_counter() - frame_ts, camera=s.index)
+        if self.publisher:
+            self.publisher.publish(frame_id, frame_ts, frame_size, hands_data, action, coords,
+                                   s.interpreter.locked_hand_type, s.interpreter.last_mask, camera=s.index)
+
+        if locked and (self.owner is None or (self.policy == 'latest_lock' and not was_locked)):
+            self.set_owner(s.index)
+        if self.owner != s.index:
+            return
+        if not locked:
+            self.set_owner(None)
+            return
+        if any(h.type == s.interpreter.locked_hand_type for h in hands_data):
+            self.owner_seen = time.perf_counter()
+        self.executor.execute(action, coords, frame_ts)
+        metrics.observe('camera_to_cursor', time.perf_counter() - frame_ts)
+
+    def run(self):
+        config_version = settings.version
+        while any(s.process.is_alive() for s in self.sessions):
+            if settings.version != config_version: # Live config: manager-side handlers (interpreters, executor)
+                config_version = settings.version
+                settings.apply_pending()
+            if not self.notify.acquire(timeout=config.FRAME_WAIT_TIMEOUT):
+                continue
+            for s in self.sessions:
+                data = s.block.read(s.last_seq)
+                if data is None: continue
+                s.last_seq, frame_id, frame_ts, frame_size, hands_data = data
+                s.frames += 1
+                self.handle(s, frame_id, frame_ts, frame_size, hands_data)
+            if self.owner is not None and time.perf_counter() - self.owner_seen > config.SESSION_OWNER_TIMEOUT:
+                self.set_owner(None)
+
+    def get_stats(self):
+        now = time.perf_counter()
+        return [{
+            'camera': s.camera_index,
+            'frames': s.frames,
+            'fps': s.frames / (now - s.start_time) if s.start_time else 0.0,
+        } for s in self.sessions]
+
+    def stop(self):
+        self.stop_event.set()
+        for s in self.sessions:
+            s.process.join(2.0)
+            if s.process.is_alive(): s.process.terminate()
+            s.block.close()
@@ -0,0 +1,44 @@
+import argparse
+import time
+import config
+from core.gesture_stream import GestureClient
+from utils.recording import HAND_LABELS
+
+# Example subscriber for main.py --serve: prints the actions (or per-second stream stats) it receives.
+# Other programs can use core.gesture_stream.GestureClient the same way.
+
+def main():
+    parser = argparse.ArgumentParser(description="Read the TouchlessMouse gesture stream.")
+    parser.add_argument('socket', nargs='?', default=config.SERVE_SOCKET, help="Gesture socket (default: SERVE_SOCKET)")
+    parser.add_argument('--all', action='store_true', help="Print every frame, not only action changes")
+    parser.add_argument('--stats', action='store_true', help="Only print frames/s, missed frames and latency once per second")
+    args = parser.parse_args()
+
+    client = GestureClient(args.socket)
+    last_action = None
+    window_start, window_frames, latencies = time.perf_counter(), 0, []
+    try:
+        for frame in client:
+            now = time.perf_counter()
+            if args.stats:
+                window_frames += 1
+                latencies.append(now - frame.capture_ts)
+                if now - window_start >= 1.0:
+                    latencies.sort()
+                    print(f"{window_frames / (now - window_start):5.1f} frames/s  missed {client.missed}  "
+                          f"camera -> client p50 {latencies[len(latencies) // 2] * 1000:.1f} ms  max {latencies[-1] * 1000:.1f} ms")
+                    window_start, window_frames, latencies = now, 0, []
+                continue
+            if args.all or frame.action != last_action:
+                hands = ", ".join(f"{HAND_LABELS[h['label']]} {h['score']:.2f}" for h in frame.hands)
+                coords = f" at ({frame.coords[0]:.0f}, {frame.coords[1]:.0f})" if frame.coords else ""
+                print(f"#{frame.frame_id} cam {frame.camera} {frame.action}{coords}  lock {frame.locked_hand_type}  "
+                      f"hands [{hands}]  {(now - frame.capture_ts) * 1000:.1f} ms")
+                last_action = frame.action
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
+    print(f"Received {client.received} frames, missed {client.missed}")
+
+if __name__ == "__main__": main()
@@ -1,121 +1,363 @@
-import cv2
 import time
+STARTUP_T0 = time.perf_counter()
+import argparse
+import cv2
+from collections import deque
+from threading import Thread, Event
 import config
 from core.camera import CameraStream
-from core.detector import HandDetector
+from core.detector import HandDetector, load_mediapipe
 from core.interpreter import GestureInterpreter
 from core.controller import CursorController
-from utils.smoothing import ExponentialSmoothing
+from core.executor import ActionExecutor
+from core.overlay import OverlayRenderer
+from core.pipeline import LatestQueue, Stage
+from core.governor import AdaptiveGovernor
+from core.preprocess import FramePreprocessor
+from core.session import SessionManager, WORKER_KEYS
+from core.gesture_stream import GesturePublisher
+from core.output import NullBackend
+from utils.smoothing import create_filter
+from utils.recording import SessionRecorder
+from utils.action_log import ActionLog
+from utils.live_config import settings
+from utils.calibration import apply_calibration
+from utils.metrics import metrics
+from utils.startup import StartupProfile, run_parallel
+IMPORTS_DONE = time.perf_counter()
 
-def main():
-    # Initialize Modules
-    camera = CameraStream().start() 
-    detector = HandDetector()
-    interpreter = GestureInterpreter()
-    controller = CursorController()
-    smoother = ExponentialSmoothing(alpha=config.SMOOTHING_FACTOR)
-
-    p_time = 0
-    prev_x, prev_y = None, None 
-    last_lock_state = None # To detect transitions
-    
-    if config.SHOW_DEBUG_WINDOW:
-        window_name = "Touchless Mouse Debug"
-        cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
-        cv2.resizeWindow(window_name, config.DISPLAY_WIDTH, config.DISPLAY_HEIGHT)
-    
-    print("Touchless Mouse Started. Press 'q' to exit.")
+WINDOW_NAME = "Touchless Mouse Debug"
 
-    try:
-        while True:
-            frame = camera.read()
-            if frame is None: continue 
+def sync_lock_mode(detector, interpreter, last_lock_state):
+    # Detect lock transitions to switch between Search (2 hands) and Performance (1 hand) graphs
+    current_lock = interpreter.locked_hand_type
+    if current_lock != last_lock_state:
+        if current_lock is None:
+            switch_ms = detector.set_max_hands(2) # Search Mode
+        else:
+            switch_ms = detector.set_max_hands(1) # Performance Mode (Only 1 hand tracked)
+        print(f"Hand lock: {current_lock} (graph switch {switch_ms:.3f} ms)")
+    return current_lock
+
+def register_reload_handlers(interpreters, executor, camera=None, detector=None, governor=None, act_tasks=None):
+    # Live config changes that need more than the new value. They run on the tracking thread
+    # (settings.apply_pending()), so nothing is swapped under a frame in flight.
+    # act_tasks (PIPELINE_MODE): the interpreter / executor handlers are queued there and run by the act
+    # stage, which owns them, instead of on the detect thread that calls apply_pending().
+    def on_act(handler):
+        if act_tasks is None: return handler
+        return lambda cfg: act_tasks.append(lambda: handler(cfg))
+
+    def capture(cfg):
+        if governor:
+            governor.apply() # Respects its current mode / level, picks up the new defaults
+        else:
+            if camera: camera.set_resolution(cfg.FRAME_WIDTH, cfg.FRAME_HEIGHT)
+            if detector: detector.set_model_complexity(cfg.MODEL_COMPLEXITY)
+
+    def graphs(cfg):
+        print(f"Hand graphs rebuilt ({detector.reset_graphs():.1f} ms)")
+
+    def smoothing(cfg):
+        executor.smoother = create_filter()
+        executor.reanchor()
+
+    if camera or detector:
+        settings.on_change(('FRAME_WIDTH', 'FRAME_HEIGHT', 'MODEL_COMPLEXITY'), capture)
+    if detector:
+        settings.on_change(('MAX_HANDS', 'MIN_DETECTION_CONFIDENCE', 'MIN_TRACKING_CONFIDENCE', 'ROI_TRACKING'), graphs)
+    settings.on_change(('SMOOTHING_FILTER', 'SMOOTHING_FACTOR', 'ONE_EURO_MIN_CUTOFF', 'ONE_EURO_BETA',
+                        'ONE_EURO_D_CUTOFF', 'KALMAN_PROCESS_NOISE', 'KALMAN_MEASUREMENT_NOISE'), on_act(smoothing))
+    def gestures(cfg):
+        for interpreter in interpreters:
+            release = interpreter.reload_rules()
+            if release: executor.release(release) # Never leave the button held by a discarded drag
+    settings.on_change(('UNFREEZE_DELAY', 'DRAG_ACTIVATION_TIME', 'RIGHT_CLICK_DELAY', 'PREDICT_ENABLED',
+                        'PREDICT_MIN_HOLD', 'PREDICT_CONFIDENCE', 'PREDICT_CLICK_CONFIDENCE', 'PREDICT_CONFIRM_TIME'), on_act(gestures))
+
+def run_sequential(camera, detector, interpreter, executor, recorder=None, governor=None, overlay=None, action_log=None, publisher=None,
+                   preprocess=None):
+    # Capture -> detect -> interpret -> act, all on one thread.
+    # With a debug overlay, that loop runs on a "tracking" thread and the main thread runs the overlay
+    # (HighGUI), which only ever receives snapshots.
+    stopped = Event()
+
+    def track():
+        last_lock_state = None
+        config_version = settings.version
+        while not stopped.is_set():
+            if settings.version != config_version: # Live config changed (one int compare otherwise)
+                config_version = settings.version
+                settings.apply_pending()
+            # Only process real new frames (never run inference twice on the same frame)
+            frame_id, frame_ts, frame = camera.read_next(timeout=config.FRAME_WAIT_TIMEOUT)
+            if frame is None:
+                if camera.stopped: break
+                continue
+            if governor and not governor.should_process(frame_ts): continue
+            if preprocess:
+                frame = preprocess.process(frame, interpreter.locked_hand_type is not None)
+                if frame is None: continue # Static scene, nothing to detect
 
             # 1. Detect transition to Optimize Performance
-            current_lock = interpreter.locked_hand_type
-            if current_lock != last_lock_state:
-                if current_lock is None:
-                    detector.set_max_hands(2) # Search Mode
-                else:
-                    detector.set_max_hands(1) # Performance Mode (Only 1 hand tracked)
-                last_lock_state = current_lock
+            last_lock_state = sync_lock_mode(detector, interpreter, last_lock_state)
 
             # 2. Get Hands Data
             frame = detector.find_hands(frame)
             hands_data = detector.get_hands_info(frame)
+            if recorder: recorder.add(frame_id, frame_ts, hands_data, frame)
+            if governor: governor.update(frame_ts, detector.last_inference_time, bool(hands_data))
 
             # 3. Process Hands
-            action, coords, visual_list, extra_feedback = interpreter.process_hands(hands_data)
-            
+            with metrics.time('interpret'):
+                action, coords, visual_list, extra_feedback = interpreter.process_hands(hands_data)
+
             # --- EXECUTE ACTION (PRIORITY) ---
-            if action != "NONE" and action != "STOP":
-                x_raw, y_raw = coords
-                x_smooth, y_smooth = smoother.smooth(x_raw, y_raw)
-
-                if action in ["MOVE", "DRAG", "PRECISION", "DRAG_PRECISION"]:
-                    if prev_x is None:
-                        prev_x, prev_y = x_smooth, y_smooth
-                    else:
-                        dx = x_smooth - prev_x
-                        dy = y_smooth - prev_y
-                        sens = config.SENSITIVITY_PRECISION if "PRECISION" in action else config.SENSITIVITY
-                        if "DRAG" in action: controller.start_drag()
-                        controller.move_relative(dx * sens, dy * sens)
-                        prev_x, prev_y = x_smooth, y_smooth
-                elif action == "CLICK":
-                    controller.click()
-                    prev_x, prev_y = x_smooth, y_smooth
-                elif action == "RIGHT_CLICK":
-                    controller.right_click()
-                    prev_x, prev_y = x_smooth, y_smooth
-                elif action == "DROP":
-                    controller.stop_drag()
-                    prev_x, prev_y = x_smooth, y_smooth
-                elif action == "FREEZE":
-                    prev_x, prev_y = x_smooth, y_smooth
-            else:
-                prev_x, prev_y = None, None
-
-            # --- VISUAL FEEDBACK (OPTIONAL) ---
-            if config.SHOW_DEBUG_WINDOW:
-                # Global Feedback (Small White Circle)
-                for fb_type, fb_coords in extra_feedback:
-                    if fb_type == 'CIRCLE_WHITE':
-                        cv2.circle(frame, (int(fb_coords[0]), int(fb_coords[1])), 8, (255, 255, 255), cv2.FILLED)
-                        cv2.circle(frame, (int(fb_coords[0]), int(fb_coords[1])), 10, (0, 0, 0), 2)
-
-                # Active Hand Feedback
-                if interpreter.locked_hand_type:
-                    active_hand = next((h for h in hands_data if h['type'] == interpreter.locked_hand_type), None)
-                    if active_hand:
-                        lm_list = active_hand['lm_list']
-                        # Index (Green)
-                        cv2.circle(frame, (lm_list[8][1], lm_list[8][2]), 8, (0, 255, 0), cv2.FILLED)
-                        # Gestures
-                        for v_state, v_id in visual_list:
-                            color = (0, 165, 255) if v_state == 1 else (255, 255, 0) # Orange vs Cyan
-                            if v_state == 3: # STOP
-                                for fid in [8, 12, 16, 20]: cv2.circle(frame, (lm_list[fid][1], lm_list[fid][2]), 8, (0, 0, 255), cv2.FILLED)
-                            elif v_state == 4: # Sniper
-                                cv2.circle(frame, (lm_list[v_id][1], lm_list[v_id][2]), 8, (0, 0, 255), cv2.FILLED)
-                            elif v_state > 0:
-                                cv2.circle(frame, (lm_list[v_id][1], lm_list[v_id][2]), 8, color, cv2.FILLED)
-                        # Action Pops
-                        if action == "CLICK": cv2.circle(frame, coords, 8, (0, 255, 0), cv2.FILLED)
-                        elif action == "RIGHT_CLICK": cv2.circle(frame, coords, 12, (255, 255, 0), cv2.FILLED)
-
-                # FPS (Minimal)
-                c_time = time.time()
-                fps = 1 / (c_time - p_time) if (c_time - p_time) > 0 else 0
-                p_time = c_time
-                cv2.putText(frame, f'FPS: {int(fps)}', (20, 50), cv2.FONT_HERSHEY_PLAIN, 3, (255, 0, 0), 3)
-
-                cv2.imshow(window_name, frame)
-                if cv2.waitKey(1) & 0xFF == ord('q'): break
-    
+            executor.execute(action, coords, frame_ts)
+
+            # Capture-to-action latency (camera timestamp -> action issued)
+            latency = time.perf_counter() - frame_ts
+            metrics.observe('camera_to_cursor', latency)
+            if action_log:
+                action_log.append(frame_ts, frame_id, action, coords, interpreter.locked_hand_type, interpreter.last_mask, latency)
+            if publisher:
+                publisher.publish(frame_id, frame_ts, frame.shape, hands_data, action, coords, interpreter.locked_hand_type, interpreter.last_mask)
+
+            # --- VISUAL FEEDBACK (OPTIONAL, rate-limited snapshot) ---
+            if overlay:
+                overlay.submit(frame, hands_data, interpreter.locked_hand_type, action, coords, visual_list,
+                               extra_feedback, latency * 1000)
+
+    if overlay is None:
+        track()
+        return
+    tracker = Thread(target=track, name="tracking", daemon=True)
+    tracker.start()
+    try:
+        overlay.run(lambda: not tracker.is_alive())
+    finally:
+        stopped.set()
+        tracker.join(1.0)
+
+def run_pipeline(camera, detector, interpreter, executor, recorder=None, governor=None, overlay=None, action_log=None, publisher=None,
+                 preprocess=None, act_tasks=None):
+    # Each stage runs on its own thread, linked by latest-wins queues:
+    # camera -> [detect] -> [act] -> (overlay snapshots)
+    # A slow stage drops stale work instead of delaying the others.
+    detect_q = LatestQueue()
+    lock_state = [None]
+    config_version = [settings.version]
+
+    def camera_source(timeout):
+        frame_id, frame_ts, frame = camera.read_next(timeout=timeout)
+        if frame is None: return None
+        return frame_id, frame_ts, frame
+
+    def detect(item):
+        frame_id, frame_ts, frame = item
+        if settings.version != config_version[0]:
+            # Live config handlers run here: this stage owns the camera and detector. Interpreter / executor
+            # handlers only queue themselves on act_tasks (see register_reload_handlers)
+            config_version[0] = settings.version
+            settings.apply_pending()
+        if governor and not governor.should_process(frame_ts): return None
+        if preprocess:
+            frame = preprocess.process(frame, interpreter.locked_hand_type is not None)
+            if frame is None: return None
+        lock_state[0] = sync_lock_mode(detector, interpreter, lock_state[0])
+        frame = detector.find_hands(frame)
+        hands_data = detector.get_hands_info(frame)
+        if recorder: recorder.add(frame_id, frame_ts, hands_data, frame)
+        if governor: governor.update(frame_ts, detector.last_inference_time, bool(hands_data))
+        return frame_id, frame_ts, frame, hands_data
+
+    def act(item):
+        frame_id, frame_ts, frame, hands_data = item
+        while act_tasks: act_tasks.popleft()() # Gesture rules / filter reloads, between two frames
+        with metrics.time('interpret'):
+            action, coords, visual_list, extra_feedback = interpreter.process_hands(hands_data)
+        executor.execute(action, coords, frame_ts)
+        latency = time.perf_counter() - frame_ts
+        metrics.observe('camera_to_cursor', latency)
+        if action_log:
+            action_log.append(frame_ts, frame_id, action, coords, interpreter.locked_hand_type, interpreter.last_mask, latency)
+        if publisher:
+            publisher.publish(frame_id, frame_ts, frame.shape, hands_data, action, coords, interpreter.locked_hand_type, interpreter.last_mask)
+        if overlay:
+            overlay.submit(frame, hands_data, interpreter.locked_hand_type, action, coords, visual_list,
+                           extra_feedback, latency * 1000)
+        return None
+
+    stages = [
+        Stage("detect", detect, camera_source, detect_q),
+        Stage("act", act, detect_q.get),
+    ]
+    for stage in stages: stage.start()
+
+    try:
+        if overlay:
+            # HighGUI must stay on the main thread, so the overlay runs here
+            overlay.run(lambda: camera.stopped)
+        else:
+            while not camera.stopped: time.sleep(0.5)
+    finally:
+        for stage in stages: stage.stop()
+        detect_q.close()
+        for stage in stages: stage.join(1.0)
+        for stage in stages:
+            s = stage.get_stats()
+            print(f"Stage {s['name']}: {s['processed']} items, {s['fps']:.1f}/s, "
+                  f"wait {s['avg_wait_ms']:.1f} ms, busy {s['avg_busy_ms']:.1f} ms, dropped downstream {s['dropped_out']}")
+
+def run_sessions(camera_indices, executor, action_log=None, publisher=None):
+    # Multi-camera: one capture+detection process per camera, interpretation and cursor here (no debug window)
+    manager = SessionManager(camera_indices, executor, action_log=action_log, publisher=publisher).start()
+    register_reload_handlers([s.interpreter for s in manager.sessions], executor)
+    settings.on_change(WORKER_KEYS, manager.forward_config) # Camera / detection settings live in the workers
+    print(f"Touchless Mouse Started on cameras {camera_indices}. Press Ctrl+C to exit.")
+    try:
+        manager.run()
+    except KeyboardInterrupt: print("Stopping...")
+    finally:
+        manager.stop()
+        for s in manager.get_stats():
+            print(f"Camera {s['camera']}: {s['frames']} frames, {s['fps']:.1f}/s")
+
+def start_live_config():
+    # Sources of live config updates (handlers are registered once the components exist)
+    if config.CONFIG_WATCH:
+        settings.watch_file(config.__file__)
+    if config.CONFIG_SOCKET:
+        try:
+            settings.serve(config.CONFIG_SOCKET)
+            print(f"Config socket: {config.CONFIG_SOCKET} (configctl.py)")
+        except (OSError, RuntimeError) as e:
+            print(f"Config socket disabled: {e}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Touchless Mouse")
+    parser.add_argument('--cameras', metavar='LIST', help="Comma-separated camera indices, e.g. 0,1 (more than one = multi-camera sessions)")
+    parser.add_argument('--record', metavar='FILE', help="Record hand landmarks with timestamps to FILE (.npz) for benchmark.py")
+    parser.add_argument('--record-frames', action='store_true', help="Also record the camera frames (large files)")
+    parser.add_argument('--serve', nargs='?', const=config.SERVE_SOCKET, metavar='SOCKET',
+                        help="Publish hands and actions on a Unix socket for other programs (default: SERVE_SOCKET)")
+    parser.add_argument('--headless', action='store_true', help="No debug window and no cursor control (use with --serve)")
+    parser.add_argument('--startup-profile', action='store_true', help="Print a breakdown of import and initialisation time")
+    args = parser.parse_args()
+    profile = StartupProfile(STARTUP_T0)
+    profile.add('import modules', STARTUP_T0, IMPORTS_DONE)
+    recorder = SessionRecorder(args.record, save_frames=args.record_frames) if args.record else None
+    camera_indices = [int(c) for c in args.cameras.split(',')] if args.cameras else config.CAMERA_INDICES
+    action_log = ActionLog(config.ACTION_LOG_PATH) if config.ACTION_LOG_PATH else None
+    try:
+        apply_calibration(config.CALIBRATION_PATH)
+    except (OSError, ValueError) as e:
+        print(f"Calibration ignored: {e}")
+    start_live_config()
+    publisher = GesturePublisher(args.serve).start() if args.serve else None
+    if publisher: print(f"Publishing gestures on {args.serve}")
+
+    def create_controller():
+        # Headless: actions are still interpreted (and published), the real cursor is left alone
+        return CursorController(NullBackend()) if args.headless else CursorController()
+
+    if camera_indices and len(camera_indices) > 1:
+        with profile.step('output backend + screen size'):
+            controller = create_controller()
+        executor = ActionExecutor(controller, create_filter())
+        if args.startup_profile: print(profile.report())
+        try:
+            run_sessions(camera_indices, executor, action_log, publisher)
+        finally:
+            controller.close()
+            if action_log: action_log.close()
+            if publisher: publisher.close()
+            settings.stop()
+        return
+
+    # Initialize Modules: camera, model and output backend in parallel (each mostly waits on a driver / native code)
+    def open_camera():
+        with profile.step('open camera + first frame'):
+            return CameraStream(camera_indices[0] if camera_indices else None).start()
+
+    def load_detector():
+        with profile.step('import mediapipe'):
+            load_mediapipe()
+        with profile.step('build hand graphs'):
+            detector = HandDetector()
+            # The governor sheds load to the Lite model: build it now, not mid-session on the tracking thread
+            if config.GOVERNOR_ENABLED and config.MODEL_COMPLEXITY != 0:
+                detector.prepare_complexity(0)
+        with profile.step('warm-up inference'):
+            detector.warm_up()
+        return detector
+
+    def open_output():
+        with profile.step('output backend + screen size'):
+            return create_controller()
+
+    ready = run_parallel({'camera': open_camera, 'detector': load_detector, 'controller': open_output})
+    camera, detector, controller = ready['camera'], ready['detector'], ready['controller']
+    smoother = create_filter()
+    executor = ActionExecutor(controller, smoother)
+    interpreter = GestureInterpreter()
+    governor = AdaptiveGovernor(detector, camera) if config.GOVERNOR_ENABLED else None
+    preprocess = FramePreprocessor() if config.PREPROCESS_ENABLED else None
+    act_tasks = deque() if config.PIPELINE_MODE else None
+    register_reload_handlers([interpreter], executor, camera, detector, governor, act_tasks)
+
+    overlay = None
+    if config.SHOW_DEBUG_WINDOW and not args.headless:
+        with profile.step('debug window'):
+            overlay = OverlayRenderer(WINDOW_NAME)
+            overlay.open()
+
+    if config.METRICS_LOG_INTERVAL > 0: metrics.start_reporter(config.METRICS_LOG_INTERVAL)
+    if config.METRICS_HTTP_PORT: metrics.start_http(config.METRICS_HTTP_PORT)
+
+    if args.startup_profile: print(profile.report())
+    print(f"Touchless Mouse Started. Press {'q' if overlay else 'Ctrl+C'} to exit.")
+
+    try:
+        if config.PIPELINE_MODE:
+            run_pipeline(camera, detector, interpreter, executor, recorder, governor, overlay, action_log, publisher, preprocess, act_tasks)
+        else:
+            run_sequential(camera, detector, interpreter, executor, recorder, governor, overlay, action_log, publisher, preprocess)
+
     except KeyboardInterrupt: print("Stopping...")
     finally:
+        stats = camera.get_stats()
+        print(f"Camera: {stats['captured']} captured, {stats['dropped']} dropped, {stats['duplicate']} duplicate, "
+              f"{stats['reconnects']} reconnects, capture -> delivery {stats['delivery_ms']:.1f} ms")
+        if preprocess:
+            p = preprocess.get_stats()
+            inference = metrics.histograms.get('inference')
+            saved = p['gated'] * (inference.summary()['mean_ms'] if inference else 0.0)
+            print(f"Preprocess: {p['gated']}/{p['frames']} frames gated (~{saved:.0f} ms inference saved for "
+                  f"{p['gate_ms'] * p['frames']:.0f} ms of gating), {p['enhanced']} enhanced at {p['enhance_ms']:.2f} ms, "
+                  f"luminance {p['luminance']:.0f}")
         camera.release()
+        detector.close()
+        controller.close()
+        out = controller.get_stats()
+        print(f"Output: {out['moves_requested']} moves coalesced into {out['events_sent']} events, {out['buttons_dropped']} redundant button changes dropped")
+        if interpreter.machine.predict:
+            m = interpreter.machine
+            print(f"Predictive gestures: {m.early_fires}/{m.fires} holds fired early, {m.false_fires} false fires")
+        if recorder:
+            print(f"Recorded {recorder.save()} frames to {args.record}")
+        if action_log:
+            action_log.close()
+        if publisher:
+            s = publisher.get_stats()
+            print(f"Gesture stream: {s['published']} frames published, {s['connected']} connections ({s['subscribers']} still subscribed), "
+                  f"{s['skipped']} frames skipped for slow subscribers")
+            publisher.close()
+        metrics.stop_http()
+        settings.stop()
+        if config.METRICS_JSON_PATH:
+            metrics.dump_json(config.METRICS_JSON_PATH)
+        print(metrics.log_line())
         cv2.destroyAllWindows()
 
-if __name__ == "__main__": main()
\ No newline at end of file
+if __name__ == "__main__": main()
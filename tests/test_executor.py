@@ -0,0 +1,35 @@
+import pytest
+from core.executor import ActionExecutor
+from utils.smoothing import create_filter
+
+class Recorder:
+    def __init__(self):
+        self.moves = []
+
+    def move_relative(self, dx, dy):
+        self.moves.append((dx, dy))
+
+@pytest.mark.parametrize('name', ['exponential', 'one_euro', 'kalman'])
+def test_filter_restarts_after_hand_lost(name):
+    controller = Recorder()
+    executor = ActionExecutor(controller, create_filter(name), clock=lambda: 0.0)
+    t = 0.0
+    for _ in range(30):
+        executor.execute("MOVE", (100, 100), t); t += 1 / 30
+    for _ in range(30):
+        executor.execute("NONE", None, t); t += 1 / 30
+    controller.moves.clear()
+    for _ in range(30):
+        executor.execute("MOVE", (400, 100), t); t += 1 / 30
+    assert all(abs(dx) < 1e-9 and abs(dy) < 1e-9 for dx, dy in controller.moves)
+
+@pytest.mark.parametrize('name', ['one_euro', 'kalman'])
+def test_filter_restarts_after_frame_gap(name):
+    controller = Recorder()
+    executor = ActionExecutor(controller, create_filter(name), clock=lambda: 0.0)
+    executor.execute("MOVE", (100, 100), 0.0)
+    executor.execute("MOVE", (100, 100), 0.033)
+    controller.moves.clear()
+    executor.execute("MOVE", (400, 100), 2.0)
+    executor.execute("MOVE", (400, 100), 2.033)
+    assert all(abs(dx) < 1e-9 for dx, _ in controller.moves)
@@ -0,0 +1,17 @@
+import pytest
+from utils.live_config import OPTIONAL_KEYS, coerce
+
+def test_optional_keys_accept_none():
+    for name in OPTIONAL_KEYS:
+        assert coerce(name, None) is None
+
+def test_documented_none_values():
+    assert coerce('PREPROCESS_ENHANCE', None) is None
+    assert coerce('GOVERNOR_IDLE_RESOLUTION', None) is None
+    assert coerce('GOVERNOR_IDLE_RESOLUTION', [320, 240]) == (320, 240)
+
+def test_required_keys_reject_none():
+    with pytest.raises(TypeError):
+        coerce('SENSITIVITY', None)
+    with pytest.raises(TypeError):
+        coerce('PREPROCESS_ENHANCE', 3)
@@ -0,0 +1,169 @@
+import os
+import time
+import numpy as np
+import config
+from core import gestures
+from utils.recording import HAND_LABELS
+
+# Always-on log of the interpreter's per-frame output, in a fixed-size memory-mapped ring file.
+# Appending is one 32-byte record store plus a counter store into the mapping: no syscalls, no
+# allocation; the OS writes the pages back. The file survives crashes and restarts (the log
+# continues where it stopped), and analyze_actions.py reads it back with vectorized numpy.
+#
+# Layout: 64-byte header, then `capacity` records; record i lives in slot i % capacity.
+
+ACTIONS = ('NONE', 'MOVE', 'PRECISION', 'FREEZE', 'CLICK', 'RIGHT_CLICK', 'DRAG', 'DRAG_PRECISION', 'DROP', 'STOP',
+           'CANCEL') # Append only: records store the index
+ACTION_CODES = {name: i for i, name in enumerate(ACTIONS)}
+UNKNOWN_ACTION = 255
+
+MAGIC = b'TMACTLOG'
+VERSION = 1
+HEADER_SIZE = 64
+HEADER_DTYPE = np.dtype([('magic', 'S8'), ('version', '<u4'), ('record_size', '<u4'),
+                         ('capacity', '<u8'), ('count', '<u8')]) # count = records ever written
+RECORD_DTYPE = np.dtype([
+    ('time', '<f8'),       # Wall clock (epoch seconds) of the frame's capture
+    ('frame_id', '<i8'),
+    ('x', '<f4'),          # Action coords (mirrored view, REFERENCE_WIDTH pixels), NaN when the action has none
+    ('y', '<f4'),
+    ('action', 'u1'),      # Index into ACTIONS
+    ('lock', 'i1'),        # 0 = no hand locked, else HAND_LABELS index + 1
+    ('mask', 'u1'),        # Finger bitmask (core/gestures.py), 0 when no hand was interpreted
+    ('camera', 'u1'),      # Session index in multi-camera mode, else 0
+    ('latency_us', '<u4'), # Capture -> action issued
+])
+
+class ActionLog:
+    def __init__(self, path, capacity=None):
+        self.path = path
+        capacity = capacity or config.ACTION_LOG_CAPACITY
+        size = HEADER_SIZE + capacity * RECORD_DTYPE.itemsize
+        reuse = os.path.exists(path) and os.path.getsize(path) == size
+        self.raw = np.memmap(path, dtype=np.uint8, mode='r+' if reuse else 'w+', shape=(size,))
+        self.header = self.raw[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)
+        self.records = self.raw[HEADER_SIZE:].view(RECORD_DTYPE)
+        h = self.header[0]
+        if not (reuse and h['magic'] == MAGIC and h['version'] == VERSION
+                and h['record_size'] == RECORD_DTYPE.itemsize and h['capacity'] == capacity):
+            self.header[0] = (MAGIC, VERSION, RECORD_DTYPE.itemsize, capacity, 0)
+        self.capacity = capacity
+        self.count = int(self.header[0]['count'])
+        # Frame timestamps are perf_counter(); one offset converts them to wall clock
+        self.wall_offset = time.time() - time.perf_counter()
+
+    def append(self, frame_ts, frame_id, action, coords, locked_hand_type, mask, latency, camera=0):
+        x, y = coords if coords is not None else (np.nan, np.nan)
+        lock = HAND_LABELS.index(locked_hand_type) + 1 if locked_hand_type else 0
+        self.records[self.count % self.capacity] = (
+            frame_ts + self.wall_offset, frame_id, x, y, ACTION_CODES.get(action, UNKNOWN_ACTION),
+            lock, mask, camera, min(int(latency * 1e6), 0xFFFFFFFF))
+        self.count += 1
+        self.header['count'] = self.count # Published after the record
+
+    def close(self):
+        self.raw.flush()
+        del self.records, self.header, self.raw
+
+
+def read_action_log(path):
+    # All records still in the ring, oldest first (a copy, safe to read while the app is writing)
+    raw = np.memmap(path, dtype=np.uint8, mode='r')
+    header = raw[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0]
+    if header['magic'] != MAGIC or header['version'] != VERSION or header['record_size'] != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} is not an action log (version {VERSION})")
+    capacity, count = int(header['capacity']), int(header['count'])
+    records = raw[HEADER_SIZE:HEADER_SIZE + capacity * RECORD_DTYPE.itemsize].view(RECORD_DTYPE)
+    if count <= capacity:
+        return np.array(records[:count])
+    start = count % capacity
+    return np.concatenate([records[start:], records[:start]])
+
+
+# --- ANALYTICS (vectorized over the whole log) ---
+def rising_edges(flags):
+    # Indices where a boolean series turns on (not the first element: its prior state is unknown)
+    if len(flags) == 0:
+        return np.flatnonzero(flags)
+    return np.flatnonzero(flags & ~np.concatenate((flags[:1], flags[:-1])))
+
+def distribution_ms(seconds):
+    if len(seconds) == 0:
+        return {'count': 0}
+    p50, p90, p99 = np.percentile(seconds * 1000, [50, 90, 99])
+    return {'count': int(len(seconds)), 'p50_ms': float(p50), 'p90_ms': float(p90), 'p99_ms': float(p99),
+            'max_ms': float(seconds.max() * 1000)}
+
+def since_onset(t, onsets, events, strict=False):
+    # For each event index, time since the latest onset at (or, strict, before) it
+    k = np.searchsorted(onsets, events, side='left' if strict else 'right') - 1
+    valid = k >= 0
+    return t[events[valid]] - t[onsets[k[valid]]]
+
+def analyze(records, max_gap=1.0):
+    # Action rates, gesture -> action latencies and cursor jitter for a block of records.
+    # Frames further apart than max_gap seconds (app restarts, camera stalls) split the log into runs.
+    n = len(records)
+    if n == 0:
+        return {'frames': 0}
+    t = records['time']
+    action = records['action']
+    mask = records['mask'].astype(np.int64)
+    dt = np.diff(t)
+    duration = float(np.sum(dt[dt <= max_gap]))
+    report = {
+        'frames': n,
+        'start': float(t[0]),
+        'end': float(t[-1]),
+        'active_s': duration,
+        'fps': (n - 1) / duration if duration > 0 else 0.0,
+        'frame_gaps': int(np.sum(dt > max_gap)),
+        'frames_dropped': int(np.sum(np.clip(np.diff(records['frame_id']) - 1, 0, None)[dt <= max_gap])),
+        'locked_fraction': float(np.mean(records['lock'] > 0)),
+        'latency': distribution_ms(records['latency_us'] / 1e6),
+    }
+
+    codes = np.bincount(action, minlength=256)
+    report['actions'] = {name: {'count': int(codes[i]), 'per_min': codes[i] / duration * 60 if duration > 0 else 0.0}
+                         for i, name in enumerate(ACTIONS) if codes[i]}
+
+    # Gesture -> action latency: how long the user held / repeated the gesture before the action fired
+    index_up = (mask & gestures.INDEX) > 0
+    ring_up = ((mask & gestures.RING) > 0) | (((mask & gestures.PINKY) > 0) & ((mask & gestures.RING_LIFTED) > 0))
+    # Taps: sniper onsets as the pointer rule sees them (it only looks at pointing frames)
+    pointing = np.flatnonzero(np.isin(action, [ACTION_CODES[a] for a in ('MOVE', 'PRECISION', 'FREEZE', 'CLICK')]))
+    taps = pointing[rising_edges((mask[pointing] & gestures.SNIPER) > 0)]
+    rc_pose = rising_edges(index_up & ring_up)
+    drag_pose = rising_edges(index_up & ((mask & gestures.MIDDLE) > 0) & ~ring_up)
+    clicks = np.flatnonzero(action == ACTION_CODES['CLICK'])
+    right_clicks = np.flatnonzero(action == ACTION_CODES['RIGHT_CLICK'])
+    is_drag = np.isin(action, (ACTION_CODES['DRAG'], ACTION_CODES['DRAG_PRECISION']))
+    drags = rising_edges(is_drag)
+    report['click_latency'] = {
+        'CLICK': distribution_ms(since_onset(t, taps, clicks, strict=True)), # Fires on the second tap
+        'RIGHT_CLICK': distribution_ms(since_onset(t, rc_pose, right_clicks)),
+        'DRAG': distribution_ms(since_onset(t, drag_pose, drags)),
+    }
+
+    # Near misses: gestures that started but never produced their action (what "missed clicks" look like)
+    rc_fired = np.zeros(len(rc_pose), dtype=bool)
+    if len(rc_pose) and len(right_clicks):
+        k = np.searchsorted(rc_pose, right_clicks, side='right') - 1
+        rc_fired[k[k >= 0]] = True
+    report['near_misses'] = {
+        'right_click_holds_released_early': int(np.sum(~rc_fired)),
+        'taps_without_click': int(max(len(taps) - 2 * len(clicks), 0)),
+        'drags_rolled_back': int(codes[ACTION_CODES['CANCEL']]), # Predictive drags not confirmed (PREDICT_ENABLED)
+    }
+
+    # Jitter: RMS / p95 of the cursor's second difference while the same move action continues
+    report['jitter_px'] = {}
+    x, y = records['x'].astype(np.float64), records['y'].astype(np.float64)
+    for name in ('MOVE', 'PRECISION', 'DRAG', 'DRAG_PRECISION'):
+        same = action == ACTION_CODES[name]
+        run = same[:-2] & same[1:-1] & same[2:] & (dt[:-1] <= max_gap) & (dt[1:] <= max_gap)
+        if not run.any():
+            continue
+        d2 = np.hypot(x[2:] - 2 * x[1:-1] + x[:-2], y[2:] - 2 * y[1:-1] + y[:-2])[run]
+        report['jitter_px'][name] = {'rms': float(np.sqrt(np.mean(d2 ** 2))), 'p95': float(np.percentile(d2, 95))}
+    return report
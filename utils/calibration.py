@@ -0,0 +1,84 @@
+import json
+import os
+import time
+import numpy as np
+from utils.live_config import settings
+
+# Per-user gesture thresholds, measured by calibrate.py.
+# Every threshold is a ratio of two distances on the same hand (pinky separation / palm length, thumb
+# tip / thumb IP offset), so it holds at any capture resolution and any distance from the camera;
+# calibration only adapts them to one user's hand shape.
+
+CALIBRATION_VERSION = 2 # 2: pinky measured in the pointing pose (version 1 used an open hand)
+CALIBRATED_KEYS = ('PINKY_TRIGGER_RATIO', 'PINKY_RELEASE_RATIO', 'STOP_THUMB_SENSITIVITY')
+
+# Guided poses, in order: (name, prompt)
+STEPS = (
+    ('point', "Point with the index finger, other fingers folded"),
+    ('point_pinky', "Same pose, pinky stretched out (ring finger stays folded)"),
+    ('thumb_in', "Open hand, thumb folded against the palm"),
+    ('thumb_out', "Open hand, thumb stretched out to the side"),
+)
+
+# Where the thresholds sit between the two measured poses (0 = relaxed pose, 1 = extended pose)
+PINKY_TRIGGER_AT = 0.6
+PINKY_RELEASE_AT = 0.3
+
+def pinky_ratios(norm):
+    # Same measure as GestureInterpreter.update_sniper(), for (N, 21, 3) normalized landmarks.
+    # update_sniper() only uses it while the ring finger is folded, so both pinky poses are recorded that way.
+    palm = np.hypot(norm[:, 0, 0] - norm[:, 9, 0], norm[:, 0, 1] - norm[:, 9, 1])
+    separation = np.hypot(norm[:, 20, 0] - norm[:, 16, 0], norm[:, 20, 1] - norm[:, 16, 1])
+    return separation / np.where(palm == 0, 1, palm)
+
+def thumb_ratios(norm):
+    # Same measure as GestureInterpreter.finger_mask(): thumb up when this is above STOP_THUMB_SENSITIVITY
+    return np.abs(norm[:, 4, 0] - norm[:, 9, 0]) / np.maximum(np.abs(norm[:, 3, 0] - norm[:, 9, 0]), 1e-6)
+
+def compute_thresholds(samples):
+    # samples: {step name: (N, 21, 3) normalized landmarks}. Uses the 10th / 90th percentiles of each pose,
+    # so a few bad frames (pose changing, tracking glitch) do not move the thresholds.
+    rest = float(np.percentile(pinky_ratios(samples['point']), 90))
+    sniper = float(np.percentile(pinky_ratios(samples['point_pinky']), 10))
+    if sniper <= rest:
+        raise ValueError(f"pinky poses overlap (folded {rest:.2f}, out {sniper:.2f}): stretch the pinky further")
+    thumb_in = float(np.percentile(thumb_ratios(samples['thumb_in']), 90))
+    thumb_out = float(np.percentile(thumb_ratios(samples['thumb_out']), 10))
+    if thumb_out <= thumb_in:
+        raise ValueError(f"thumb poses overlap (folded {thumb_in:.2f}, out {thumb_out:.2f}): stretch the thumb further")
+    return {
+        'PINKY_TRIGGER_RATIO': rest + PINKY_TRIGGER_AT * (sniper - rest),
+        'PINKY_RELEASE_RATIO': rest + PINKY_RELEASE_AT * (sniper - rest),
+        'STOP_THUMB_SENSITIVITY': (thumb_in + thumb_out) / 2,
+    }
+
+def hand_size(samples, world=None):
+    # Palm length (wrist -> middle MCP): in frame widths, and in metres when world landmarks were available
+    norm = np.concatenate(list(samples.values()))
+    size = {'palm_frame_widths': float(np.median(np.hypot(*(norm[:, 9, :2] - norm[:, 0, :2]).T)))}
+    if world is not None and len(world):
+        size['palm_m'] = float(np.median(np.linalg.norm(world[:, 9] - world[:, 0], axis=1)))
+    return size
+
+def save_calibration(path, thresholds, hand=None):
+    data = {'version': CALIBRATION_VERSION, 'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'thresholds': thresholds, 'hand': hand or {}}
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+def load_calibration(path):
+    # Thresholds from a calibration file, None if there is none
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        data = json.load(f)
+    if data.get('version') != CALIBRATION_VERSION:
+        raise ValueError(f"{path}: unsupported calibration version {data.get('version')}, run calibrate.py again")
+    return {k: v for k, v in data['thresholds'].items() if k in CALIBRATED_KEYS}
+
+def apply_calibration(path):
+    # Applies a calibration file on top of config.py (through the live config, like any other update)
+    thresholds = load_calibration(path)
+    if thresholds:
+        settings.update(thresholds, source=os.path.basename(path))
+    return thresholds
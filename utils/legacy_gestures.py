@@ -0,0 +1,142 @@
+import numpy as np
+import config
+from core.interpreter import GestureInterpreter, TIP_IDS, PIP_IDS
+
+# Pairs for the batched distance: (wrist, middle MCP) = palm size, (pinky tip, ring tip) = separation
+PINKY_PAIR_A = np.array([0, 20])
+PINKY_PAIR_B = np.array([9, 16])
+
+# The hand-written gesture chain that core/gestures.py replaced, kept as the reference
+# for benchmark.py --gestures (per-frame cost and identical actions).
+
+class LegacyGestureInterpreter(GestureInterpreter):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.last_pinky_time = 0
+        self.is_extended_prev = False
+        self.double_tap_timeout = 0.4
+        self.pinky_release_time = 0
+
+        # Drag / Middle Finger State
+        self.middle_finger_start_time = 0
+        self.is_dragging = False
+
+        # Right Click State
+        self.rc_start_time = 0
+        self.rc_triggered = False
+        self.rc_needs_reset = False
+
+    def get_gesture(self, lm):
+        visual_states = []
+        if lm.shape[0] < 21: return "NONE", None, []
+
+        # Finger states for all 4 fingers at once (Tip above PIP = Up)
+        index_up, middle_up, ring_up, pinky_up = (lm[TIP_IDS, 1] < lm[PIP_IDS, 1]).tolist()
+
+        # Thumb Detection (tip and IP horizontal distance to the middle MCP)
+        dist_tip_center, dist_ip_center = np.abs(lm[[4, 3], 0] - lm[9, 0]).tolist()
+        thumb_up = dist_tip_center > (dist_ip_center * config.STOP_THUMB_SENSITIVITY)
+
+        x_index, y_index = float(lm[8, 0]), float(lm[8, 1])
+        
+        # STOP Logic (5 Fingers)
+        if index_up and middle_up and ring_up and pinky_up and thumb_up:
+            self.middle_finger_start_time = 0
+            self.is_dragging = False
+            self.rc_start_time = 0
+            self.rc_triggered = False
+            self.rc_needs_reset = False
+            visual_states.append((3, 0)) 
+            return "STOP", (x_index, y_index), visual_states
+
+        # Anatomical Assist
+        if pinky_up and not ring_up:
+             if lm[16, 1] < lm[13, 1]: ring_up = True
+
+        # Pinky Logic
+        if ring_up:
+            self.pinky_active = pinky_up
+        else:
+            # Palm size (wrist -> middle MCP) and pinky/ring tip separation in one batched op
+            diffs = lm[PINKY_PAIR_A, :2] - lm[PINKY_PAIR_B, :2]
+            palm_size, separation = np.hypot(diffs[:, 0], diffs[:, 1]).tolist()
+            if palm_size == 0: palm_size = 1
+            ratio = separation / palm_size
+            if not self.pinky_active:
+                if ratio > config.PINKY_TRIGGER_RATIO: self.pinky_active = True
+            else:
+                if ratio < config.PINKY_RELEASE_RATIO: self.pinky_active = False
+        is_sniper = self.pinky_active
+        
+        # Add visual feedback for Pinky (Sniper Mode)
+        if is_sniper:
+            visual_states.append((4, 20)) 
+        
+        # Right Click Logic
+        if index_up and ring_up:
+            self.middle_finger_start_time = 0
+            self.is_dragging = False
+            if self.rc_needs_reset:
+                visual_states.append((2, 16))
+                if middle_up: visual_states.append((2, 12))
+            else:
+                if self.rc_start_time == 0: self.rc_start_time = self.clock()
+                elapsed = self.clock() - self.rc_start_time
+                if elapsed > config.RIGHT_CLICK_DELAY:
+                    self.rc_triggered = True
+                    self.rc_needs_reset = True
+                    visual_states.append((2, 16))
+                    if middle_up: visual_states.append((2, 12))
+                    return "RIGHT_CLICK", (x_index, y_index), visual_states
+                else:
+                    visual_states.append((1, 16))
+                    if middle_up: visual_states.append((1, 12))
+        else:
+            self.rc_start_time = 0
+            self.rc_needs_reset = False
+            self.rc_triggered = False
+
+            # Drag Logic
+            drag_state_val = 0
+            if index_up and middle_up and not ring_up: 
+                if self.middle_finger_start_time == 0: self.middle_finger_start_time = self.clock()
+                elapsed = self.clock() - self.middle_finger_start_time
+                if elapsed > config.DRAG_ACTIVATION_TIME:
+                    self.is_dragging = True
+                    drag_state_val = 2 
+                else:
+                    drag_state_val = 1 
+            else:
+                self.middle_finger_start_time = 0
+                if self.is_dragging:
+                    self.is_dragging = False
+                    return "DROP", (x_index, y_index), []
+            if drag_state_val > 0:
+                 visual_states.append((drag_state_val, 12))
+
+        # Combined Action
+        if self.is_dragging:
+            if is_sniper: return "DRAG_PRECISION", (x_index, y_index), visual_states
+            else: return "DRAG", (x_index, y_index), visual_states
+
+        if index_up:
+            if is_sniper:
+                self.pinky_release_time = self.clock()
+                action = "PRECISION" 
+                if not self.is_extended_prev:
+                    current_time = self.clock()
+                    dt = current_time - self.last_pinky_time
+                    if dt < self.double_tap_timeout:
+                        action = "CLICK"
+                        self.last_pinky_time = 0 
+                    else:
+                        self.last_pinky_time = current_time
+                self.is_extended_prev = True
+                return action, (x_index, y_index), visual_states
+            else:
+                self.is_extended_prev = False
+                if self.clock() - self.pinky_release_time < config.UNFREEZE_DELAY:
+                    return "FREEZE", (x_index, y_index), visual_states
+                return "MOVE", (x_index, y_index), visual_states
+
+        return "NONE", None, visual_states
@@ -0,0 +1,178 @@
+import json
+import os
+import socket
+import time
+from collections import namedtuple
+from threading import Thread, Lock
+import config
+
+# Runtime configuration without restarts.
+#
+# `settings.current` is an immutable, typed snapshot of every UPPERCASE name in config.py
+# (a namedtuple: attribute access, no module globals). Updates build a new snapshot and swap the
+# reference, so a reader that takes `cfg = settings.current` once per frame sees one consistent
+# configuration for the whole frame. The config module is kept in sync for code that only reads
+# a value at construction time.
+#
+# Updates come from:
+#   - config.py itself, watched for changes (edit and save, CONFIG_WATCH)
+#   - a local control socket (CONFIG_SOCKET), one JSON object per line, see configctl.py
+#
+# Settings that need more than a new value (resolution, model, filters, gesture timings) are
+# applied by handlers registered with on_change(). Handlers run on the tracking thread, in
+# apply_pending(), never on the watcher / socket thread.
+
+CONFIG_NAMES = tuple(name for name in dir(config) if name.isupper())
+CONFIG_TYPES = {name: type(getattr(config, name)) for name in CONFIG_NAMES}
+ConfigSnapshot = namedtuple('ConfigSnapshot', CONFIG_NAMES)
+
+# Only read when the app starts (threads, files, windows, processes)
+RESTART_KEYS = frozenset((
+    'CAMERA_INDEX', 'CAMERA_INDICES', 'FRAME_BUFFER_SIZE', 'PIPELINE_MODE', 'SHOW_DEBUG_WINDOW',
+    'DISPLAY_WIDTH', 'DISPLAY_HEIGHT', 'OUTPUT_BACKEND', 'OUTPUT_RATE_HZ', 'ACTION_LOG_PATH',
+    'ACTION_LOG_CAPACITY', 'METRICS_ENABLED', 'METRICS_WINDOW', 'METRICS_LOG_INTERVAL',
+    'METRICS_HTTP_PORT', 'SESSION_CURSOR_POLICY', 'CONFIG_WATCH', 'CONFIG_SOCKET', 'CALIBRATION_PATH',
+    'SERVE_SOCKET', 'CAMERA_BACKEND', 'CAMERA_FOURCC', 'CAMERA_PROBE_FRAMES', 'CAMERA_DRIVER_BUFFERS',
+    'CAMERA_RECONNECT_DELAY', 'CAMERA_RECONNECT_MAX_DELAY', 'GOVERNOR_ENABLED', 'FPS_TARGET', 'OVERLAY_RATE_HZ',
+    'PREPROCESS_ENABLED', 'PUBLISH_STALL_TIMEOUT',
+))
+
+# Settings whose documented values include None (besides those that default to None)
+OPTIONAL_KEYS = frozenset((
+    'PREPROCESS_ENHANCE', 'GOVERNOR_IDLE_RESOLUTION', 'CALIBRATION_PATH', 'ACTION_LOG_PATH',
+))
+
+def coerce(name, value):
+    # Checks a new value against the type of its default in config.py
+    if name not in CONFIG_TYPES:
+        raise KeyError(f"Unknown setting {name}")
+    expected = CONFIG_TYPES[name]
+    if expected is type(None) or (value is None and name in OPTIONAL_KEYS):
+        return value
+    if expected is float and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if expected is tuple and isinstance(value, (list, tuple)):
+        return tuple(value)
+    if type(value) is not expected:
+        raise TypeError(f"{name} must be {expected.__name__}, got {type(value).__name__}")
+    return value
+
+def read_config_file(path):
+    # UPPERCASE assignments of a config.py-style file
+    namespace = {}
+    with open(path) as f:
+        exec(compile(f.read(), path, 'exec'), namespace)
+    return {name: value for name, value in namespace.items() if name.isupper()}
+
+
+class LiveConfig:
+    def __init__(self):
+        self.current = ConfigSnapshot(*(getattr(config, name) for name in CONFIG_NAMES))
+        self.version = 0 # Bumped on every applied update (cheap "anything changed?" check)
+        self.lock = Lock()
+        self.pending = set() # Changed keys whose handlers have not run yet
+        self.handlers = []   # (keys, handler)
+        self.threads = []
+        self.server = None
+
+    def on_change(self, keys, handler):
+        # handler(cfg) runs in apply_pending() when any of `keys` changed
+        self.handlers.append((frozenset(keys), handler))
+
+    def update(self, changes, source='api'):
+        # Validates everything first: a bad value rejects the whole update.
+        # Returns (changed keys, keys that only take effect after a restart)
+        values = {name: coerce(name, value) for name, value in changes.items()}
+        with self.lock:
+            changed = {name: v for name, v in values.items() if getattr(self.current, name) != v}
+            if not changed:
+                return [], []
+            for name, value in changed.items():
+                setattr(config, name, value)
+            self.current = self.current._replace(**changed) # Atomic swap
+            self.pending.update(changed)
+            self.version += 1
+        restart = sorted(set(changed) & RESTART_KEYS)
+        print(f"Config ({source}): " + ", ".join(f"{k}={v!r}" for k, v in changed.items())
+              + (f" (restart needed for {', '.join(restart)})" if restart else ""))
+        return sorted(changed), restart
+
+    def apply_pending(self):
+        # Call from the thread that owns the components (tracking loop) when `version` changed
+        with self.lock:
+            keys, self.pending = self.pending, set()
+        cfg = self.current
+        for handler_keys, handler in self.handlers:
+            if handler_keys & keys:
+                handler(cfg)
+
+    # --- SOURCES ---
+    def watch_file(self, path, interval=1.0):
+        # Only values edited in the file are applied, so a save does not undo socket / calibration updates
+        def run():
+            mtime = os.path.getmtime(path)
+            saved = read_config_file(path)
+            while True:
+                time.sleep(interval)
+                try:
+                    m = os.path.getmtime(path)
+                    if m == mtime: continue
+                    mtime = m
+                    values = read_config_file(path)
+                    edited = {k: v for k, v in values.items() if k in CONFIG_TYPES and (k not in saved or saved[k] != v)}
+                    self.update(edited, source=os.path.basename(path))
+                    saved = values
+                except Exception as e: # Half-saved file, typo, wrong type: keep running on the old snapshot
+                    print(f"Config ({os.path.basename(path)}) ignored: {e}")
+        t = Thread(target=run, name="config-watch", daemon=True)
+        t.start()
+        self.threads.append(t)
+
+    def handle_request(self, line):
+        # One JSON object per line: {"SENSITIVITY": 25} updates, {} just returns the current config
+        try:
+            changes = json.loads(line)
+            if not isinstance(changes, dict): raise ValueError("expected a JSON object")
+            changed, restart = self.update(changes, source='socket')
+            return {'ok': True, 'version': self.version, 'changed': changed, 'restart': restart,
+                    'config': self.current._asdict() if not changes else None}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def serve(self, path):
+        # Local control socket (Unix domain socket at `path`; only the local user can reach it)
+        if not hasattr(socket, 'AF_UNIX'):
+            raise RuntimeError("control socket needs Unix domain sockets")
+        if os.path.exists(path): os.unlink(path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(path)
+        os.chmod(path, 0o600)
+        self.server.listen(4)
+
+        def client(conn):
+            with conn, conn.makefile('rw') as f:
+                for line in f:
+                    if not line.strip(): continue
+                    f.write(json.dumps(self.handle_request(line), default=list) + "\n")
+                    f.flush()
+
+        def run():
+            while self.server is not None:
+                try:
+                    conn, _ = self.server.accept()
+                except OSError:
+                    return
+                Thread(target=client, args=(conn,), name="config-client", daemon=True).start()
+        t = Thread(target=run, name="config-socket", daemon=True)
+        t.start()
+        self.threads.append(t)
+
+    def stop(self):
+        if self.server is not None:
+            path = self.server.getsockname()
+            self.server.close()
+            self.server = None
+            if os.path.exists(path): os.unlink(path)
+
+
+settings = LiveConfig()
@@ -0,0 +1,161 @@
+import json
+import time
+import numpy as np
+from threading import Thread
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import config
+
+QUANTILES = (50, 90, 99)
+
+class RollingHistogram:
+    # Last `size` samples in a preallocated ring (seconds). Percentiles are computed on read, not on write.
+    def __init__(self, size=1024):
+        self.samples = np.zeros(size, dtype=np.float64)
+        self.count = 0 # Total samples ever observed
+        self.total = 0.0
+
+    def add(self, value):
+        self.samples[self.count % len(self.samples)] = value
+        self.count += 1
+        self.total += value
+
+    def window(self):
+        return self.samples[:min(self.count, len(self.samples))]
+
+    def recent(self, n):
+        # Last n samples, oldest first (a copy)
+        n = min(n, self.count, len(self.samples))
+        idx = np.arange(self.count - n, self.count) % len(self.samples)
+        return self.samples[idx]
+
+    def summary(self):
+        w = self.window()
+        if len(w) == 0:
+            return {'count': 0, 'mean_ms': 0.0, **{f'p{q}_ms': 0.0 for q in QUANTILES}}
+        values = np.percentile(w, QUANTILES) * 1000
+        return {
+            'count': self.count,
+            'mean_ms': float(w.mean() * 1000),
+            **{f'p{q}_ms': float(v) for q, v in zip(QUANTILES, values)},
+        }
+
+
+class _Timer:
+    __slots__ = ('metrics', 'name', 't0')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.t0)
+
+
+class Metrics:
+    # Registry of named latency histograms.
+    # Hot path: metrics.observe('stage', seconds) or `with metrics.time('stage'):` -> one ring write.
+    # Writers on different threads touch different histograms, so no lock is taken.
+    def __init__(self, enabled=True, window=1024):
+        self.enabled = enabled
+        self.window = window
+        self.histograms = {}
+        self.counters = {}
+        self.start_time = time.time()
+        self.server = None
+
+    def observe(self, name, seconds):
+        if not self.enabled: return
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = RollingHistogram(self.window)
+        hist.add(seconds)
+
+    def time(self, name):
+        return _Timer(self, name)
+
+    def inc(self, name, n=1):
+        if not self.enabled: return
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        return {
+            'uptime_s': time.time() - self.start_time,
+            'latency': {name: hist.summary() for name, hist in list(self.histograms.items())},
+            'counters': dict(self.counters),
+        }
+
+    # --- EXPORT ---
+    def log_line(self):
+        parts = []
+        for name, s in self.snapshot()['latency'].items():
+            parts.append(f"{name} {s['p50_ms']:.1f}/{s['p99_ms']:.1f}")
+        return "Latency p50/p99 ms: " + ", ".join(parts)
+
+    def dump_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def prometheus_text(self):
+        snap = self.snapshot()
+        lines = [
+            "# HELP touchless_stage_latency_seconds Per-stage latency over the rolling window",
+            "# TYPE touchless_stage_latency_seconds summary",
+        ]
+        for name, hist in list(self.histograms.items()):
+            w = hist.window()
+            if len(w) == 0: continue
+            for q, v in zip(QUANTILES, np.percentile(w, QUANTILES)):
+                lines.append(f'touchless_stage_latency_seconds{{stage="{name}",quantile="{q / 100}"}} {v:.6f}')
+            lines.append(f'touchless_stage_latency_seconds_sum{{stage="{name}"}} {hist.total:.6f}')
+            lines.append(f'touchless_stage_latency_seconds_count{{stage="{name}"}} {hist.count}')
+        for name, value in snap['counters'].items():
+            lines.append(f"# TYPE touchless_{name}_total counter")
+            lines.append(f"touchless_{name}_total {value}")
+        lines.append(f"touchless_uptime_seconds {snap['uptime_s']:.1f}")
+        return "\n".join(lines) + "\n"
+
+    def start_reporter(self, interval):
+        # Periodic one-line summary (useful when running headless)
+        def loop():
+            while True:
+                time.sleep(interval)
+                if self.histograms: print(self.log_line())
+        Thread(target=loop, name="metrics-log", daemon=True).start()
+
+    def start_http(self, port, host='127.0.0.1'):
+        # Local endpoint: /metrics (Prometheus text) and /metrics.json
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body, ctype = metrics.prometheus_text().encode(), 'text/plain; version=0.0.4'
+                elif self.path == '/metrics.json':
+                    body, ctype = json.dumps(metrics.snapshot()).encode(), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', ctype)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass # Keep the console clean
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        Thread(target=self.server.serve_forever, name="metrics-http", daemon=True).start()
+
+    def stop_http(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server = None
+
+
+# Shared instance used by all modules
+metrics = Metrics(enabled=config.METRICS_ENABLED, window=config.METRICS_WINDOW)
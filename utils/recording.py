@@ -0,0 +1,103 @@
+import numpy as np
+import config
+from core.detector import HandInfo, normalize_landmarks
+
+HAND_LABELS = ('Left', 'Right')
+
+class SessionRecorder:
+    # Records get_hands_info() output (and optionally the raw frames) with timestamps to a .npz file.
+    # Timestamps are stored relative to the first recorded frame.
+    def __init__(self, path, save_frames=False, max_hands=None):
+        self.path = path
+        self.save_frames = save_frames
+        self.max_hands = max_hands or max(config.MAX_HANDS, 1)
+        self.frame_ids = []
+        self.timestamps = []
+        self.landmarks = [] # (max_hands, 21, 3) per frame, NaN where no hand
+        self.labels = []    # (max_hands,) per frame: index into HAND_LABELS, -1 = no hand
+        self.scores = []
+        self.frames = []
+        self.frame_sizes = [] # (h, w) per frame: the governor changes the capture size while recording
+        self.frame_size = None
+        self.t0 = None
+
+    def add(self, frame_id, timestamp, hands_data, frame=None):
+        if self.t0 is None:
+            self.t0 = timestamp
+        if frame is not None:
+            self.frame_size = frame.shape[:2]
+
+        lm = np.full((self.max_hands, 21, 3), np.nan, dtype=np.float32)
+        labels = np.full(self.max_hands, -1, dtype=np.int8)
+        scores = np.zeros(self.max_hands, dtype=np.float32)
+        for i, hand in enumerate(hands_data[:self.max_hands]):
+            lm[i] = hand.lm # Copy out of the detector's landmark pool
+            labels[i] = HAND_LABELS.index(hand.type)
+            scores[i] = hand.score
+
+        self.frame_ids.append(frame_id)
+        self.timestamps.append(timestamp - self.t0)
+        self.landmarks.append(lm)
+        self.labels.append(labels)
+        self.scores.append(scores)
+        self.frame_sizes.append(self.frame_size or (config.FRAME_HEIGHT, config.FRAME_WIDTH))
+        if self.save_frames and frame is not None:
+            self.frames.append(frame.copy())
+
+    def save(self):
+        data = {
+            'frame_ids': np.asarray(self.frame_ids, dtype=np.int64),
+            'timestamps': np.asarray(self.timestamps, dtype=np.float64),
+            'landmarks': np.asarray(self.landmarks, dtype=np.float32).reshape(-1, self.max_hands, 21, 3),
+            'labels': np.asarray(self.labels, dtype=np.int8).reshape(-1, self.max_hands),
+            'scores': np.asarray(self.scores, dtype=np.float32).reshape(-1, self.max_hands),
+            'frame_sizes': np.asarray(self.frame_sizes, dtype=np.int32).reshape(-1, 2),
+            'frame_size': np.asarray(self.frame_sizes[0] if self.frame_sizes else (config.FRAME_HEIGHT, config.FRAME_WIDTH),
+                                     dtype=np.int32), # First frame's size (files written before 'frame_sizes')
+        }
+        if self.frames:
+            # Mixed sizes are zero-padded to the largest one; frame_at() crops them back
+            h = max(f.shape[0] for f in self.frames)
+            w = max(f.shape[1] for f in self.frames)
+            frames = np.zeros((len(self.frames), h, w) + self.frames[0].shape[2:], dtype=self.frames[0].dtype)
+            for i, f in enumerate(self.frames):
+                frames[i, :f.shape[0], :f.shape[1]] = f
+            data['frames'] = frames
+        np.savez_compressed(self.path, **data)
+        return len(self.frame_ids)
+
+
+def load_recording(path):
+    # Loads a SessionRecorder file into a plain dict of arrays
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+def frame_size_at(rec, i):
+    # (h, w) of frame i
+    size = rec['frame_sizes'][i] if 'frame_sizes' in rec else rec['frame_size']
+    return int(size[0]), int(size[1])
+
+def frame_at(rec, i):
+    # Recorded frame i at its capture size (a view into the padded array)
+    h, w = frame_size_at(rec, i)
+    return rec['frames'][i, :h, :w]
+
+def hands_from_recording(rec, i):
+    # Rebuilds the HandInfo list of frame i, exactly as get_hands_info() returned it
+    hands_data = []
+    width = frame_size_at(rec, i)[1]
+    for j in range(rec['labels'].shape[1]):
+        label = rec['labels'][i, j]
+        if label < 0:
+            continue
+        lm = rec['landmarks'][i, j]
+        x_min, y_min = lm[:, :2].min(axis=0)
+        x_max, y_max = lm[:, :2].max(axis=0)
+        hands_data.append(HandInfo(
+            HAND_LABELS[label],
+            float(rec['scores'][i, j]),
+            lm,
+            (int(x_min), int(y_min), int(x_max - x_min), int(y_max - y_min)),
+            normalize_landmarks(lm, width)
+        ))
+    return hands_data
@@ -0,0 +1,308 @@
+import time
+import tracemalloc
+import numpy as np
+import config
+from core import gestures
+from core.interpreter import GestureInterpreter
+from core.executor import ActionExecutor
+from core.controller import CursorController
+from core.output import NullBackend
+from utils.smoothing import create_filter
+from utils.recording import load_recording, hands_from_recording, frame_at, frame_size_at
+
+REPLAY_EPOCH = 1_000_000.0 # Virtual clock origin, far from 0 so "0 = unset" timers behave like live
+
+class VirtualClock:
+    # Drop-in for time.time(): returns whatever the replay driver set
+    def __init__(self, t=REPLAY_EPOCH):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+def percentiles_ms(samples):
+    if not samples:
+        return {'p50': 0.0, 'p99': 0.0}
+    p50, p99 = np.percentile(np.asarray(samples) * 1000, [50, 99])
+    return {'p50': float(p50), 'p99': float(p99)}
+
+def run_length(actions):
+    # ['MOVE', 'MOVE', 'CLICK'] -> [['MOVE', 2], ['CLICK', 1]]
+    seq = []
+    for action in actions:
+        if seq and seq[-1][0] == action:
+            seq[-1][1] += 1
+        else:
+            seq.append([action, 1])
+    return seq
+
+
+class ReplayDriver:
+    # Feeds a recording through (HandDetector) -> GestureInterpreter -> ActionExecutor -> CursorController,
+    # with a recording NullBackend instead of the real cursor and synchronous output (deterministic).
+    # detect=True re-runs MediaPipe on the recorded frames instead of using the recorded landmarks.
+    def __init__(self, path, detect=False):
+        self.rec = load_recording(path)
+        self.detect = detect
+        if detect and 'frames' not in self.rec:
+            raise ValueError(f"{path} has no frames (record with --record-frames to replay detection)")
+
+        self.clock = VirtualClock()
+        self.interpreter = GestureInterpreter(clock=self.clock)
+        self.output = NullBackend(clock=self.clock, record=True)
+        self.controller = CursorController(self.output, rate_hz=0)
+        # Executor on the virtual clock too: capture -> execute latency is 0 in replay, so no prediction lead
+        self.executor = ActionExecutor(self.controller, create_filter(), clock=self.clock)
+        self.detector = None
+        self.preprocess = None
+        if detect:
+            from core.detector import HandDetector # MediaPipe only needed for video replay
+            from core.preprocess import FramePreprocessor
+            self.detector = HandDetector()
+            self.preprocess = FramePreprocessor() if config.PREPROCESS_ENABLED else None
+
+    def run(self, track_alloc=False):
+        # track_alloc: measure Python/NumPy/OpenCV allocations per frame (slower, so fps is not comparable)
+        timings = {'detect': [], 'interpret': [], 'execute': []}
+        allocs = []
+        actions = []
+        last_lock_state = None
+        n = len(self.rec['timestamps'])
+
+        if track_alloc: tracemalloc.start()
+        t_start = time.perf_counter()
+        for i in range(n):
+            self.clock.t = REPLAY_EPOCH + float(self.rec['timestamps'][i])
+            if track_alloc:
+                tracemalloc.reset_peak()
+                mem_before = tracemalloc.get_traced_memory()[0]
+
+            t0 = time.perf_counter()
+            if self.detector is not None:
+                current_lock = self.interpreter.locked_hand_type
+                if current_lock != last_lock_state:
+                    self.detector.set_max_hands(2 if current_lock is None else 1)
+                    last_lock_state = current_lock
+                frame = frame_at(self.rec, i)
+                if self.preprocess:
+                    frame = self.preprocess.process(frame, current_lock is not None)
+                    if frame is None: continue # Gated like live: no detection, no interpretation
+                frame = self.detector.find_hands(frame)
+                hands_data = self.detector.get_hands_info(frame)
+            else:
+                hands_data = hands_from_recording(self.rec, i)
+            t1 = time.perf_counter()
+            action, coords, visual_list, extra_feedback = self.interpreter.process_hands(hands_data)
+            t2 = time.perf_counter()
+            self.executor.execute(action, coords, self.clock.t)
+            t3 = time.perf_counter()
+
+            if self.detector is not None: timings['detect'].append(t1 - t0)
+            timings['interpret'].append(t2 - t1)
+            timings['execute'].append(t3 - t2)
+            actions.append(action)
+            if track_alloc: allocs.append(tracemalloc.get_traced_memory()[1] - mem_before)
+        elapsed = time.perf_counter() - t_start
+        if track_alloc: tracemalloc.stop()
+
+        if self.detector is not None:
+            self.detector.close()
+
+        counts = {}
+        for action in actions:
+            counts[action] = counts.get(action, 0) + 1
+        report = {
+            'frames': n,
+            'fps': n / elapsed if elapsed > 0 else 0.0,
+            'latency_ms': {stage: percentiles_ms(samples) for stage, samples in timings.items() if samples},
+            'action_counts': counts,
+            'actions': run_length(actions),
+            'output_events': self.output.count,
+        }
+        if self.preprocess is not None:
+            report['preprocess'] = self.preprocess.get_stats()
+        if allocs:
+            # Peak bytes allocated while handling one frame; a 640x480 BGR frame copy is ~900 KB
+            kb = float(np.mean(allocs)) / 1024
+            report['alloc'] = {
+                'kb_per_frame': kb,
+                'max_kb_per_frame': float(np.max(allocs)) / 1024,
+                'mb_per_s_at_target_fps': kb * config.FPS_TARGET / 1024,
+            }
+        return report
+
+
+def filter_trace(rec):
+    # Index fingertip trace of the first recorded hand: (timestamps, (N, 2) positions), frames without a hand skipped
+    # Positions in REFERENCE_WIDTH pixels, like the cursor path sees them
+    present = rec['labels'][:, 0] >= 0
+    widths = rec['frame_sizes'][:, 1] if 'frame_sizes' in rec else np.full(len(present), rec['frame_size'][1])
+    scale = config.REFERENCE_WIDTH / widths[present].astype(np.float64)
+    return rec['timestamps'][present], rec['landmarks'][present, 0, 8, :2].astype(np.float64) * scale[:, None]
+
+def compare_filters(path, names=('exponential', 'one_euro', 'kalman'), max_lag_frames=15):
+    # Jitter: RMS of the output's second difference (px/frame^2), high-frequency shake left in the cursor.
+    # Lag: frame shift that best aligns the output with the raw trace, converted to ms.
+    ts, raw = filter_trace(load_recording(path))
+    results = {}
+    if len(ts) < max_lag_frames * 2:
+        return results
+    frame_dt = float(np.median(np.diff(ts)))
+    raw_jitter = float(np.sqrt(np.mean(np.diff(raw, n=2, axis=0) ** 2)))
+    results['raw'] = {'jitter_px': raw_jitter, 'lag_ms': 0.0, 'cost_us': 0.0}
+
+    for name in names:
+        filt = create_filter(name)
+        out = np.empty_like(raw)
+        t0 = time.perf_counter()
+        for i in range(len(ts)):
+            out[i] = filt.smooth(raw[i, 0], raw[i, 1], float(ts[i]))
+        cost = (time.perf_counter() - t0) / len(ts)
+
+        errors = [np.mean((out[k:] - raw[:len(raw) - k]) ** 2) for k in range(max_lag_frames)]
+        results[name] = {
+            'jitter_px': float(np.sqrt(np.mean(np.diff(out, n=2, axis=0) ** 2))),
+            'lag_ms': int(np.argmin(errors)) * frame_dt * 1000,
+            'cost_us': cost * 1e6,
+        }
+    return results
+
+def compare_interpreters(path, repeat=5):
+    # Per-frame GestureInterpreter cost, rule machine vs the hand-written chain it replaced,
+    # on the recorded landmarks (best of `repeat` runs). 'identical': both produced the same actions.
+    from utils.legacy_gestures import LegacyGestureInterpreter
+    rec = load_recording(path)
+    n = len(rec['timestamps'])
+    frames = [(REPLAY_EPOCH + float(rec['timestamps'][i]), hands_from_recording(rec, i)) for i in range(n)]
+    results, sequences = {}, {}
+    if not n:
+        return results
+    for name, cls in (('rules', GestureInterpreter), ('legacy', LegacyGestureInterpreter)):
+        best = None
+        for _ in range(repeat):
+            clock = VirtualClock()
+            interpreter = cls(clock=clock)
+            samples, actions = [], []
+            for t, hands_data in frames:
+                clock.t = t
+                t0 = time.perf_counter()
+                action, coords, visual_list, extra_feedback = interpreter.process_hands(hands_data)
+                samples.append(time.perf_counter() - t0)
+                actions.append(action)
+            if best is None or sum(samples) < sum(best):
+                best = samples
+        sequences[name] = actions
+        results[name] = {
+            'cost_us': sum(best) / n * 1e6,
+            'p99_us': float(np.percentile(best, 99)) * 1e6,
+        }
+    results['identical'] = sequences['rules'] == sequences['legacy']
+    return results
+
+def compare_prediction(path):
+    # Hold gestures (right click, drag) with the fixed timers vs predictive early fire (PREDICT_*),
+    # on the recorded landmarks. Per hold:
+    #   latency_ms: pose onset -> action fired (median, p99)
+    #   false_fires: early fires let go before PREDICT_CONFIRM_TIME (drags rolled back, right clicks sent anyway)
+    #   not_in_fixed: predictive fires the fixed timers never completed (pose let go before the full hold)
+    rec = load_recording(path)
+    n = len(rec['timestamps'])
+    logs = {}
+    for name, predict in (('fixed', False), ('predictive', True)):
+        clock = VirtualClock()
+        interpreter = GestureInterpreter(clock=clock, predict=predict)
+        interpreter.machine.log = []
+        for i in range(n):
+            clock.t = REPLAY_EPOCH + float(rec['timestamps'][i])
+            interpreter.process_hands(hands_from_recording(rec, i))
+        logs[name] = interpreter.machine.log
+
+    fixed_fires = {(hold, onset) for kind, hold, onset, t, early in logs['fixed'] if kind == 'fire'}
+    results = {}
+    for hold in (h.name for h in gestures.default_holds()):
+        r = results[hold] = {}
+        for name, log in logs.items():
+            fires = [(onset, t, early) for kind, h, onset, t, early in log if kind == 'fire' and h == hold]
+            r[name] = {
+                'fires': len(fires),
+                'latency_ms': percentiles_ms([t - onset for onset, t, early in fires]),
+                'early': sum(early for onset, t, early in fires),
+                'false_fires': sum(1 for kind, h, *_ in log if kind == 'false_fire' and h == hold),
+            }
+        p = r['predictive']
+        p['false_fire_rate'] = p['false_fires'] / p['early'] if p['early'] else 0.0
+        p['not_in_fixed'] = sum(1 for kind, h, onset, t, early in logs['predictive']
+                                if kind == 'fire' and h == hold and (h, onset) not in fixed_fires)
+    return results
+
+def subscriber_process(path, results):
+    # One compare_subscribers() client (its own process): publish -> receive latency of every frame
+    from core.gesture_stream import GestureClient
+    client = GestureClient(path)
+    latencies = []
+    try:
+        while True:
+            frame = client.next()
+            latencies.append(time.perf_counter() - frame.publish_ts)
+    except EOFError:
+        pass
+    results.put((client.received, client.missed, latencies))
+
+def compare_subscribers(path, max_subscribers=4, rate=1000.0, messages=2000):
+    # Gesture stream (main.py --serve) with 1..max_subscribers client processes: the recorded frames
+    # (looped) are published at `rate` Hz, well above camera rate, to show where back-pressure starts.
+    import multiprocessing as mp
+    import os
+    import tempfile
+    from core.gesture_stream import GesturePublisher
+    rec = load_recording(path)
+    n = len(rec['timestamps'])
+    if not n:
+        return {}
+    interpreter = GestureInterpreter(clock=VirtualClock())
+    frames = []
+    for i in range(n):
+        interpreter.clock.t = REPLAY_EPOCH + float(rec['timestamps'][i])
+        hands_data = hands_from_recording(rec, i)
+        action, coords, visual_list, extra_feedback = interpreter.process_hands(hands_data)
+        frames.append((frame_size_at(rec, i), hands_data, action, coords, interpreter.locked_hand_type, interpreter.last_mask))
+
+    ctx = mp.get_context('spawn')
+    sock_path = os.path.join(tempfile.gettempdir(), f"touchless-bench-{os.getpid()}.sock")
+    results = {}
+    for k in range(1, max_subscribers + 1):
+        publisher = GesturePublisher(sock_path).start()
+        queue = ctx.Queue()
+        procs = [ctx.Process(target=subscriber_process, args=(sock_path, queue), daemon=True) for _ in range(k)]
+        for p in procs: p.start()
+        deadline = time.perf_counter() + 30
+        while publisher.get_stats()['subscribers'] < k and time.perf_counter() < deadline:
+            time.sleep(0.01)
+
+        cost = []
+        t_next = t_start = time.perf_counter()
+        for m in range(messages):
+            frame_size, hands_data, action, coords, lock, mask = frames[m % n]
+            t0 = time.perf_counter()
+            publisher.publish(m, t0, frame_size, hands_data, action, coords, lock, mask)
+            cost.append(time.perf_counter() - t0)
+            t_next += 1.0 / rate
+            time.sleep(max(0.0, t_next - time.perf_counter()))
+        elapsed = time.perf_counter() - t_start
+        time.sleep(0.2) # Let the sender thread drain
+        publisher.close() # Subscribers see EOF
+
+        stats = [queue.get(timeout=30) for _ in procs]
+        for p in procs: p.join(5)
+        received = sum(s[0] for s in stats)
+        missed = sum(s[1] for s in stats)
+        latencies = [lat for s in stats for lat in s[2]]
+        results[k] = {
+            'rate_hz': messages / elapsed,
+            'received_per_s': received / k / elapsed,
+            'missed_pct': missed / max(received + missed, 1) * 100,
+            'publish_us': float(np.median(cost)) * 1e6,
+            'latency_ms': percentiles_ms(latencies),
+        }
+    return results
@@ -1,12 +1,18 @@
+import math
 import numpy as np
+import config
 
 class ExponentialSmoothing:
+    # Legacy frame-based filter (SMOOTHING_FILTER = 'exponential'). t / lead are accepted and ignored.
     def __init__(self, alpha=2):
         self.base_alpha = alpha # Config value (e.g., 2)
+        self.reset()
+
+    def reset(self):
         self.prev_x = 0.0
         self.prev_y = 0.0
 
-    def smooth(self, curr_x, curr_y):
+    def smooth(self, curr_x, curr_y, t=None, lead=0.0):
         # Initialize
         if self.prev_x == 0 and self.prev_y == 0:
             self.prev_x, self.prev_y = float(curr_x), float(curr_y)
@@ -38,4 +44,108 @@ class ExponentialSmoothing:
 
         self.prev_x, self.prev_y = smooth_x, smooth_y
         
-        return int(smooth_x), int(smooth_y)
\ No newline at end of file
+        return int(smooth_x), int(smooth_y)
+
+# --- TIME-AWARE FILTERS ---
+# Same smooth() call as ExponentialSmoothing, plus:
+#   t:    frame timestamp in seconds (None = assume 1 / FPS_TARGET since the previous call)
+#   lead: seconds to extrapolate forward (latency compensation), 0 = plain filtering
+# They return floats, so no sub-pixel precision is lost.
+
+def _alpha(cutoff, dt):
+    # Smoothing factor of a first-order low-pass filter with the given cutoff frequency (Hz)
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+class OneEuroFilter:
+    # 1€ filter (Casiez et al., CHI 2012): the cutoff rises with speed, so it is
+    # smooth when the hand is still and responsive when it moves.
+    def __init__(self, min_cutoff=1.0, beta=0.01, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.t = None
+        self.x = self.y = None     # Filtered position
+        self.vx = self.vy = 0.0    # Filtered velocity (px/s)
+
+    def smooth(self, curr_x, curr_y, t=None, lead=0.0):
+        if self.x is None:
+            self.x, self.y, self.t = float(curr_x), float(curr_y), t
+            return self.x, self.y
+
+        dt = (t - self.t) if (t is not None and self.t is not None) else 1.0 / config.FPS_TARGET
+        if dt <= 0:
+            return self.x + self.vx * lead, self.y + self.vy * lead
+        self.t = t
+
+        a_d = _alpha(self.d_cutoff, dt)
+        self.vx += a_d * ((curr_x - self.x) / dt - self.vx)
+        self.vy += a_d * ((curr_y - self.y) / dt - self.vy)
+
+        speed = math.hypot(self.vx, self.vy)
+        a = _alpha(self.min_cutoff + self.beta * speed, dt)
+        self.x += a * (curr_x - self.x)
+        self.y += a * (curr_y - self.y)
+        return self.x + self.vx * lead, self.y + self.vy * lead
+
+
+class KalmanFilter:
+    # Constant-velocity Kalman filter, independent per axis.
+    # State [position, velocity], white-noise acceleration model.
+    #   process_noise:     acceleration spectral density (px^2/s^3). Higher = follows faster, less smoothing
+    #   measurement_noise: landmark jitter variance (px^2). Higher = more smoothing
+    def __init__(self, process_noise=2000.0, measurement_noise=4.0):
+        self.q = process_noise
+        self.r = measurement_noise
+        self.reset()
+
+    def reset(self):
+        self.t = None
+        self.state = None # [[p, v, P00, P01, P11] for x, for y]
+
+    def _step(self, s, z, dt):
+        p, v, p00, p01, p11 = s
+        # Predict
+        p += v * dt
+        p00 += dt * (2 * p01 + dt * p11) + self.q * dt ** 3 / 3
+        p01 += dt * p11 + self.q * dt ** 2 / 2
+        p11 += self.q * dt
+        # Update (we only measure position)
+        k0 = p00 / (p00 + self.r)
+        k1 = p01 / (p00 + self.r)
+        y = z - p
+        p += k0 * y
+        v += k1 * y
+        p11 -= k1 * p01
+        p01 -= k0 * p01
+        p00 -= k0 * p00
+        s[:] = p, v, p00, p01, p11
+
+    def smooth(self, curr_x, curr_y, t=None, lead=0.0):
+        if self.state is None:
+            self.state = [[float(curr_x), 0.0, self.r, 0.0, 1e4], [float(curr_y), 0.0, self.r, 0.0, 1e4]]
+            self.t = t
+            return float(curr_x), float(curr_y)
+
+        dt = (t - self.t) if (t is not None and self.t is not None) else 1.0 / config.FPS_TARGET
+        if dt > 0:
+            self.t = t
+            self._step(self.state[0], curr_x, dt)
+            self._step(self.state[1], curr_y, dt)
+        sx, sy = self.state
+        return sx[0] + sx[1] * lead, sy[0] + sy[1] * lead
+
+
+def create_filter(name=None):
+    # Cursor filter selected in config.py (SMOOTHING_FILTER)
+    name = name or config.SMOOTHING_FILTER
+    if name == 'exponential':
+        return ExponentialSmoothing(alpha=config.SMOOTHING_FACTOR)
+    if name == 'one_euro':
+        return OneEuroFilter(config.ONE_EURO_MIN_CUTOFF, config.ONE_EURO_BETA, config.ONE_EURO_D_CUTOFF)
+    if name == 'kalman':
+        return KalmanFilter(config.KALMAN_PROCESS_NOISE, config.KALMAN_MEASUREMENT_NOISE)
+    raise ValueError(f"Unknown SMOOTHING_FILTER: {name}")
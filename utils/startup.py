@@ -0,0 +1,42 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from threading import Lock, current_thread
+
+class StartupProfile:
+    # Wall-clock breakdown of startup (main.py --startup-profile).
+    # Steps may run on parallel threads; each is reported with its start offset from t0 and its duration.
+    def __init__(self, t0=None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.steps = [] # (name, start, end, thread name)
+        self.lock = Lock()
+
+    def add(self, name, start, end):
+        with self.lock:
+            self.steps.append((name, start, end, current_thread().name))
+
+    @contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter())
+
+    def report(self):
+        lines = ["Startup profile (start offset, duration, step, thread):"]
+        for name, start, end, thread in sorted(self.steps, key=lambda s: s[1]):
+            lines.append(f"  {(start - self.t0) * 1000:8.1f} ms  {(end - start) * 1000:8.1f} ms  {name:<28} {thread}")
+        busy = sum(end - start for _, start, end, _ in self.steps)
+        total = time.perf_counter() - self.t0
+        lines.append(f"  Ready after {total * 1000:.1f} ms ({busy * 1000:.1f} ms of work, overlapped by the parallel steps)")
+        return "\n".join(lines)
+
+
+def run_parallel(tasks):
+    # tasks: {name: callable}. Runs them all at once on worker threads (camera open, model load and
+    # screen queries mostly wait on I/O or native code) and returns {name: result}.
+    # The first exception is re-raised once every task has finished.
+    with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix='startup') as pool:
+        futures = {name: pool.submit(func) for name, func in tasks.items()}
+    return {name: future.result() for name, future in futures.items()}